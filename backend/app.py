@@ -1,31 +1,64 @@
-from flask import Flask, request
+from flask import Flask, Response, g, request, stream_with_context
 from flask_cors import CORS
 from flask_restful import Api, Resource
-from database import Database
+from database import WORD_FIELDS, create_database, pragmas_from_env
+import export
+import logging_config
+import importer
+from quiz import InsufficientWordsError, WordSampler
+from cache import TTLCache, UserCache
+import metrics
+from writer import WriteQueue, create_writer
 import jwt
 import logging
 import traceback
 import json
 import sqlite3
 import functools
+import hmac
+import random
+import time
 from datetime import datetime
 from sqlalchemy import text
 import os
 import traceback
 from datetime import date
 
-# Configure logging with more detail
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# 日志通过队列在后台线程输出，级别、格式、请求日志抽样等见 logging_config
+app_logging = logging_config.settings_from_env()
+logging_config.configure_logging(app_logging)
 logger = logging.getLogger(__name__)
 
 # 配置应用
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default_secret_key_for_development')
 app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']  # 为 JWT 使用相同的密钥
+app.config['DATABASE_PATH'] = os.environ.get('DATABASE_PATH', 'vocabulary.db')
+app.config['SQLITE_PRAGMAS'] = pragmas_from_env()  # SQLITE_PRAGMA_<NAME> 覆盖连接配置
+app.config.update(app_logging)
+# 已验证用户的缓存：多进程部署时其他进程删除/重置用户后，最多这么久生效
+app.config['PRINCIPAL_CACHE_TTL'] = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+app.config['PRINCIPAL_CACHE_SIZE'] = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+# 学习统计缓存的内存上限和过期时间
+app.config['ANALYTICS_CACHE_MAX_BYTES'] = int(os.environ.get('ANALYTICS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['ANALYTICS_CACHE_TTL'] = int(os.environ.get('ANALYTICS_CACHE_TTL', 300))
+# 是否开放 /api/checkin/debug 诊断接口，默认关闭
+app.config['CHECKIN_DIAGNOSTICS'] = os.environ.get('CHECKIN_DIAGNOSTICS', '').lower() in ('1', 'true', 'yes', 'on')
+# 是否统计请求耗时和每个请求的 SQL 并在 /metrics 输出，默认开启
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on')
+# /metrics 的访问令牌，设置后需要带 Authorization: Bearer <令牌> 访问；未设置时只允许本机访问
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+# 学习统计等分析查询是否使用单独的只读连接（mode=ro、query_only），默认开启
+app.config['SQLITE_SNAPSHOT_READS'] = os.environ.get('SQLITE_SNAPSHOT_READS', '1').lower() in ('1', 'true', 'yes', 'on')
+# 存储后端：sqlite 为每个线程一个 sqlite3 连接，sqlalchemy 为 SQLAlchemy Core 与连接池（见 sa_database.py）
+app.config['DB_BACKEND'] = os.environ.get('DB_BACKEND', 'sqlite')
+# sqlalchemy 后端连接池保持的连接数和允许临时多开的连接数
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+app.config['DB_POOL_MAX_OVERFLOW'] = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 8))
+# 答题、打卡等写操作的组提交：空为各自直接写入，thread 为进程内写入线程，其他值为写入进程地址（见 writer.py）
+app.config['DB_WRITER'] = os.environ.get('DB_WRITER', '')
+# 进程内写入线程合并写操作的时间窗口（毫秒）
+app.config['DB_WRITER_BATCH_MS'] = float(os.environ.get('DB_WRITER_BATCH_MS', 2))
 
 # Configure CORS
 CORS(app, 
@@ -44,46 +77,101 @@ api = Api(app)
 # JWT配置
 # app.config['SECRET_KEY'] = 'your-secret-key'  # 在生产环境中应该使用环境变量
 
-db = Database()
+db = create_database(app.config['DB_BACKEND'], app.config['DATABASE_PATH'], pragmas=app.config['SQLITE_PRAGMAS'],
+                     instrument=app.config['METRICS_ENABLED'], snapshot_reads=app.config['SQLITE_SNAPSHOT_READS'],
+                     pool_size=app.config['DB_POOL_SIZE'], max_overflow=app.config['DB_POOL_MAX_OVERFLOW'],
+                     writer=create_writer(app.config['DB_WRITER'], app.config['DATABASE_PATH'],
+                                          app.config['SQLITE_PRAGMAS'], app.config['DB_WRITER_BATCH_MS'] / 1000,
+                                          backend=app.config['DB_BACKEND']))
+word_sampler = WordSampler(db)
+
+# user_id -> 用户信息，token_required 命中时不再查询数据库
+principal_cache = TTLCache(maxsize=app.config['PRINCIPAL_CACHE_SIZE'], ttl=app.config['PRINCIPAL_CACHE_TTL'])
+# token -> 解码后的 claims，在 token 过期前有效
+token_claims_cache = TTLCache(maxsize=app.config['PRINCIPAL_CACHE_SIZE'], ttl=24 * 3600)
+# 用户的学习统计结果，答题、复习、打卡和重置时失效；命中前按主键读取用户的数据版本号，
+# 其他 worker 进程的写入也会让本进程的结果失效
+analytics_cache = UserCache(
+    max_bytes=app.config['ANALYTICS_CACHE_MAX_BYTES'], ttl=app.config['ANALYTICS_CACHE_TTL'],
+    version_source=db.get_user_data_version
+)
+
+# 按接口统计的请求耗时和 SQL，endpoint 为 flask-restful 的接口名（资源类名小写）
+metrics_registry = metrics.Registry()
+request_latency = metrics_registry.histogram(
+    'http_request_duration_seconds', '请求处理耗时（秒），流式响应只计到开始输出',
+    ('endpoint', 'method', 'status')
+)
+request_sql_statements = metrics_registry.histogram(
+    'http_request_sql_statements', '每个请求执行的 SQL 语句数，含触发器中的语句',
+    ('endpoint', 'method'), buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+request_sql_seconds = metrics_registry.histogram(
+    'http_request_sql_seconds', '每个请求在数据库连接上的耗时（秒）', ('endpoint', 'method')
+)
+request_sql_vm_steps = metrics_registry.counter(
+    'http_request_sql_vm_steps_total', 'SQLite 虚拟机指令数，按进度回调的间隔取整', ('endpoint', 'method')
+)
+
+
+def collect_runtime_metrics():
+    """抓取时读取数据库连接数和各缓存的计数"""
+    caches = {'analytics': analytics_cache, 'principals': principal_cache, 'token_claims': token_claims_cache}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    families = [
+        ('sqlite_connections_opened_total', 'counter', '累计打开的 SQLite 连接数',
+         [({}, db.connections_opened)]),
+        ('cache_hits_total', 'counter', '缓存命中次数',
+         [({'cache': name}, s['hits']) for name, s in stats.items()]),
+        ('cache_misses_total', 'counter', '缓存未命中次数',
+         [({'cache': name}, s['misses']) for name, s in stats.items()]),
+        ('cache_entries', 'gauge', '缓存当前的条目数（analytics 为用户数）',
+         [({'cache': name}, s['users'] if 'users' in s else s['size']) for name, s in stats.items()]),
+        ('cache_bytes', 'gauge', 'analytics 缓存估算的内存占用',
+         [({'cache': 'analytics'}, stats['analytics']['bytes'])]),
+    ]
+    if isinstance(db.writer, WriteQueue):
+        writer_stats = db.writer.stats()
+        families += [
+            ('db_writer_batches_total', 'counter', '写入线程提交的事务数',
+             [({}, writer_stats['batches'])]),
+            ('db_writer_operations_total', 'counter', '写入线程在这些事务中执行的写操作数',
+             [({}, writer_stats['operations'])]),
+        ]
+    return families
+
+
+metrics_registry.add_collector(collect_runtime_metrics)
 
 @app.before_request
 def log_request_info():
-    """Log detailed request information"""
-    logger.debug("=" * 50)
-    logger.debug("Request Details:")
-    logger.debug(f"Method: {request.method}")
-    logger.debug(f"URL: {request.url}")
-    logger.debug(f"Headers:\n" + "\n".join(f"  {k}: {v}" for k, v in request.headers.items()))
-    
-    if request.data:
-        try:
-            # Try to parse and log JSON data
-            data = json.loads(request.data)
-            # Hide password in logs
-            if 'password' in data:
-                data['password'] = '****'
-            logger.debug(f"JSON Body: {json.dumps(data, indent=2, ensure_ascii=False)}")
-        except:
-            logger.debug(f"Raw Body: {request.data}")
-    
-    logger.debug("=" * 50)
+    """记录请求开始时间和 SQL 统计快照，并决定本次请求是否写请求日志"""
+    g.request_start = time.perf_counter()
+    g.request_logged = logging_config.should_sample(app.config['REQUEST_LOG_SAMPLE_RATE'])
+    if app.config['METRICS_ENABLED']:
+        g.sql_start = db.query_stats().snapshot()
 
 @app.after_request
 def after_request(response):
     """Log response and add CORS headers"""
-    logger.debug("=" * 50)
-    logger.debug("Response Details:")
-    logger.debug(f"Status: {response.status}")
-    logger.debug(f"Headers:\n" + "\n".join(f"  {k}: {v}" for k, v in response.headers.items()))
-    
-    try:
-        if response.json:
-            logger.debug(f"JSON Response: {json.dumps(response.json, indent=2, ensure_ascii=False)}")
-    except:
-        if response.data:
-            logger.debug(f"Raw Response: {response.data}")
-    
-    logger.debug("=" * 50)
+    start = g.get('request_start')
+    if start is not None and app.config['METRICS_ENABLED']:
+        observe_request(response, time.perf_counter() - start)
+    if start is not None and (g.get('request_logged') or response.status_code >= 500):
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+        if app.config['REQUEST_LOG_BODIES']:
+            limit = app.config['REQUEST_LOG_BODY_MAX']
+            # 只记录 JSON 请求体，单词表上传等流式请求体不读入内存
+            if request.is_json:
+                fields['request_body'] = logging_config.mask_json_body(request.get_data(), limit)
+            if not response.is_streamed:
+                fields['response_body'] = logging_config.truncate_body(response.get_data(), limit)
+        logger.info('request', extra={logging_config.REQUEST_FIELD: fields})
 
     # Add CORS headers
     response.headers.add('Access-Control-Allow-Origin', '*')
@@ -93,6 +181,33 @@ def after_request(response):
     
     return response
 
+def observe_request(response, elapsed):
+    """把请求耗时和本次请求的 SQL 增量记入指标"""
+    endpoint = request.endpoint or 'unmatched'
+    request_latency.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    sql_start = g.get('sql_start')
+    if sql_start is None:
+        return
+    statements, vm_steps, seconds = (end - begin for end, begin in zip(db.query_stats().snapshot(), sql_start))
+    request_sql_statements.observe(statements, endpoint=endpoint, method=request.method)
+    request_sql_seconds.observe(seconds, endpoint=endpoint, method=request.method)
+    if vm_steps:
+        request_sql_vm_steps.inc(vm_steps, endpoint=endpoint, method=request.method)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 文本格式的指标，关闭 METRICS_ENABLED 时返回 404，需要 METRICS_TOKEN 或本机访问"""
+    if not app.config['METRICS_ENABLED']:
+        return {'message': 'Not found'}, 404
+    token = app.config['METRICS_TOKEN']
+    if token:
+        auth = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth.encode(), f'Bearer {token}'.encode()):
+            return {'message': 'Forbidden'}, 403
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return {'message': 'Forbidden'}, 403
+    return Response(metrics_registry.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
+
 @app.errorhandler(Exception)
 def handle_error(error):
     """Global error handler"""
@@ -112,12 +227,9 @@ def handle_error(error):
         logger.error(f"URL: {request.url}")
         logger.error(f"Headers: {request.headers}")
         
-        # Try to log request body safely
-        if request.data:
-            try:
-                logger.error(f"Request Body: {request.data.decode('utf-8')}")
-            except Exception as decode_error:
-                logger.error(f"Could not decode request body: {decode_error}")
+        # 请求体只在开启时记录，且截取前 REQUEST_LOG_BODY_MAX 字节
+        if app.config['REQUEST_LOG_BODIES'] and request.is_json:
+            logger.error(f"Request Body: {logging_config.mask_json_body(request.get_data(), app.config['REQUEST_LOG_BODY_MAX'])}")
     except Exception as context_error:
         logger.error(f"Error logging request context: {context_error}")
     
@@ -139,6 +251,32 @@ def handle_error(error):
         'timestamp': datetime.now().isoformat()
     }, 500
 
+def decode_token(token):
+    """解码并校验 JWT，结果按 token 缓存到其过期时间"""
+    data = token_claims_cache.get(token)
+    if data is None:
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        exp = data.get('exp')
+        token_claims_cache.set(token, data, ttl=exp - time.time() if exp else None)
+    return data
+
+def get_principal(user_id):
+    """获取已验证的用户，命中缓存时不访问数据库；不存在的用户不缓存"""
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = db.get_user_by_id(user_id)
+        if user:
+            principal_cache.set(user_id, user)
+    return user
+
+def invalidate_principal(user_id):
+    """用户被删除或重置后清除其缓存"""
+    principal_cache.invalidate(user_id)
+
+def invalidate_analytics(user_id):
+    """用户有新的学习数据（答题、复习、打卡、重置）后清除其统计缓存"""
+    analytics_cache.invalidate(user_id)
+
 def token_required(f):
     """JWT token验证装饰器"""
     @functools.wraps(f)
@@ -160,7 +298,7 @@ def token_required(f):
         
         try:
             # 解码 token
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            data = decode_token(token)
             
             # 获取用户 ID
             current_user = data.get('user_id')
@@ -173,7 +311,7 @@ def token_required(f):
                 }, 401
             
             # 检查用户是否存在
-            user = db.get_user_by_id(current_user)
+            user = get_principal(current_user)
             if not user:
                 logger.warning(f"Token contains non-existent user ID: {current_user}")
                 return {
@@ -275,21 +413,55 @@ class RegisterResource(Resource):
             return {'message': 'Internal server error', 'error': str(e), 'traceback': traceback.format_exc()}, 500
 
 class WordResource(Resource):
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    PAGE_PARAMS = ('after_id', 'limit', 'fields', 'pos')
+
     @token_required
     def get(self, current_user):
-        """获取所有单词"""
+        """
+        获取单词列表
+
+        不带参数时返回全部单词（兼容旧客户端）；带 after_id、limit、fields、pos
+        任一参数时按 id 键集分页，返回 {items, next_after_id, total, limit}。
+        """
         try:
-            words = db.get_all_words()
-            logger.info("Fetched all words for user: %s", current_user)
-            return [{
-                'id': word[0],
-                'word': word[1],
-                'part_of_speech': word[2],
-                'meaning': word[3],
-                'frequency': word[4],
-                'correct_times': word[5],
-                'wrong_times': word[6]
-            } for word in words]
+            if not any(param in request.args for param in self.PAGE_PARAMS):
+                words = list(db.iter_words())
+                logger.info("Fetched all words for user: %s", current_user)
+                return words
+
+            after_id = request.args.get('after_id', default=0, type=int)
+            limit = request.args.get('limit', default=self.DEFAULT_PAGE_SIZE, type=int)
+            part_of_speech = request.args.get('pos') or None
+
+            if after_id < 0 or limit < 1 or limit > self.MAX_PAGE_SIZE:
+                return {
+                    'message': f'分页参数错误，limit 应在 1-{self.MAX_PAGE_SIZE} 之间',
+                    'error_type': 'InvalidPagination'
+                }, 400
+
+            fields = None
+            if request.args.get('fields'):
+                fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+                # 分页游标依赖 id，始终返回
+                if 'id' not in fields:
+                    fields.insert(0, 'id')
+                invalid = [field for field in fields if field not in WORD_FIELDS]
+                if invalid:
+                    return {
+                        'message': f"不支持的字段：{', '.join(invalid)}",
+                        'error_type': 'InvalidFields'
+                    }, 400
+
+            items = list(db.iter_words(after_id, limit, fields, part_of_speech))
+            logger.info(f"Fetched {len(items)} words after id {after_id} for user: {current_user}")
+            return {
+                'items': items,
+                'next_after_id': items[-1]['id'] if len(items) == limit else None,
+                'total': db.count_words(part_of_speech),
+                'limit': limit
+            }
             
         except Exception as e:
             logger.error("Error during fetching words: %s", str(e), exc_info=True)
@@ -375,7 +547,14 @@ class WordResource(Resource):
                 logger.debug(f"Update query: {update_query}")
                 logger.debug(f"Update values: {update_values}")
 
-                cursor.execute(update_query, update_values)
+                try:
+                    cursor.execute(update_query, update_values)
+                except sqlite3.IntegrityError:
+                    logger.warning(f"Word already exists: {data.get('word')}")
+                    return {
+                        'message': '单词已存在',
+                        'error_details': f"Word {data.get('word')} already exists"
+                    }, 409
                 conn.commit()
 
                 logger.info(f"Word {word_id} updated successfully")
@@ -446,19 +625,13 @@ class WordResource(Resource):
                 }, 400
 
             # 使用数据库方法添加单词
-            result = db.add_word(
+            word_id = db.add_word(
                 word=data['word'], 
                 part_of_speech=data['part_of_speech'], 
                 meaning=data['meaning']
             )
 
-            if result:
-                # 获取最后插入的单词ID
-                with db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT last_insert_rowid()')
-                    word_id = cursor.fetchone()[0]
-
+            if word_id:
                 logger.info(f"Word added successfully: {data['word']}")
                 return {
                     'message': '单词添加成功',
@@ -531,6 +704,51 @@ class WordResource(Resource):
                 'details': str(e)
             }, 500
 
+class WordSearchResource(Resource):
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    MAX_QUERY_LENGTH = 100
+
+    @token_required
+    def get(self, current_user):
+        """
+        搜索单词和释义
+
+        ?q= 为查询字符串，按子串匹配（1-2 个字符时为单词前缀和子串扫描）；
+        ?limit= 和 ?offset= 分页，返回 {items, query, limit, offset, next_offset}
+        """
+        query = request.args.get('q', '').strip()
+        if not query or len(query) > self.MAX_QUERY_LENGTH:
+            return {
+                'message': f'q 不能为空且不超过 {self.MAX_QUERY_LENGTH} 个字符',
+                'error_type': 'InvalidQuery'
+            }, 400
+
+        limit = request.args.get('limit', default=self.DEFAULT_PAGE_SIZE, type=int)
+        offset = request.args.get('offset', default=0, type=int)
+        if offset < 0 or limit < 1 or limit > self.MAX_PAGE_SIZE:
+            return {
+                'message': f'分页参数错误，limit 应在 1-{self.MAX_PAGE_SIZE} 之间',
+                'error_type': 'InvalidPagination'
+            }, 400
+
+        try:
+            items, has_more = db.search_words(query, limit, offset)
+            logger.info(f"Searched words for {query!r}: {len(items)} results for user: {current_user}")
+            return {
+                'items': items,
+                'query': query,
+                'limit': limit,
+                'offset': offset,
+                'next_offset': offset + limit if has_more else None
+            }, 200
+        except Exception as e:
+            logger.error(f"Error searching words for {query!r}: {str(e)}")
+            return {
+                'message': '搜索单词失败',
+                'error': str(e)
+            }, 500
+
 class WrongWordsResource(Resource):
     @token_required
     def get(self, current_user):
@@ -538,49 +756,12 @@ class WrongWordsResource(Resource):
         try:
             logger.info(f"Retrieving wrong words for user: {current_user}")
             
-            # 使用数据库连接获取错误单词
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 获取用户学习记录中错误次数多于正确次数的单词
-                cursor.execute('''
-                    SELECT DISTINCT 
-                        w.id, 
-                        w.word, 
-                        w.part_of_speech,
-                        w.meaning,
-                        w.correct_times,
-                        w.wrong_times,
-                        w.frequency
-                    FROM words w
-                    JOIN learning_records lr ON w.id = lr.word_id
-                    WHERE lr.user_id = ? 
-                    AND w.wrong_times > w.correct_times
-                    ORDER BY w.wrong_times DESC
-                    LIMIT 20
-                ''', (current_user,))
-                
-                wrong_words = cursor.fetchall()
-                
-                logger.info(f"Found {len(wrong_words)} wrong words for user {current_user}")
-                
-                result = [
-                    {
-                        'id': word[0],
-                        'word': word[1],
-                        'part_of_speech': word[2],
-                        'meaning': word[3],
-                        'correct_times': word[4],
-                        'wrong_times': word[5],
-                        'frequency': word[6]
-                    } for word in wrong_words
-                ]
-                
-                # 记录返回的错误单词详情
-                for word in result:
-                    logger.debug(f"Wrong word: {word['word']} - Wrong times: {word['wrong_times']}, Correct times: {word['correct_times']}")
-                
-                return result, 200
+            # 获取用户答过的单词中错误次数多于正确次数的单词
+            result = db.get_user_wrong_words(current_user)
+            
+            logger.info(f"Found {len(result)} wrong words for user {current_user}")
+            
+            return result, 200
         
         except Exception as e:
             logger.error(f"Error retrieving wrong words for user {current_user}: {str(e)}")
@@ -631,15 +812,10 @@ class LearningResource(Resource):
             if not word_id or is_correct is None:
                 return {'message': '缺少必要参数'}, 400
 
-            # 更新学习记录
-            db.add_learning_record(current_user, word_id, is_correct)
-            
-            # 更新单词统计
-            db.update_word_stats(word_id, is_correct)
-            
-            # 更新用户分数 - 根据正确性给予不同分数
+            # 根据正确性给予不同分数；学习记录、单词统计和用户分数在同一事务中写入
             score_change = 3 if is_correct else -2
-            db.update_user_score(current_user, score_change)
+            db.record_answer(current_user, word_id, is_correct, score_change)
+            invalidate_analytics(current_user)
 
             return {
                 'message': '学习记录已更新',
@@ -654,47 +830,90 @@ class LearningResource(Resource):
                 'error': str(e)
             }, 500
 
+class LearningBatchResource(Resource):
+    MAX_BATCH_SIZE = 500
+
+    @token_required
+    def post(self, current_user):
+        """批量提交学习结果"""
+        try:
+            data = request.get_json()
+            if isinstance(data, dict):
+                data = data.get('answers')
+            if not data or not isinstance(data, list):
+                return {'message': '没有提供数据'}, 400
+
+            if len(data) > self.MAX_BATCH_SIZE:
+                return {'message': f'单次最多提交{self.MAX_BATCH_SIZE}条学习记录'}, 400
+
+            answers = []
+            for index, item in enumerate(data):
+                if not isinstance(item, dict) or not item.get('word_id'):
+                    return {'message': '缺少必要参数', 'index': index}, 400
+
+                quality = item.get('quality')
+                if quality is not None:
+                    if not isinstance(quality, int) or quality < 0 or quality > 5:
+                        return {'message': '质量评分必须是0-5之间的整数', 'index': index}, 400
+                    # 与 /api/review-words 相同的计分规则
+                    is_correct = quality >= 3
+                    score_change = quality * 2
+                elif item.get('is_correct') is not None:
+                    # 与 /api/learn 相同的计分规则
+                    is_correct = bool(item['is_correct'])
+                    score_change = 3 if is_correct else -2
+                else:
+                    return {'message': '缺少必要参数', 'index': index}, 400
+
+                answered_at = None
+                if item.get('answered_at'):
+                    try:
+                        answered_at = datetime.fromisoformat(str(item['answered_at']))
+                    except ValueError:
+                        return {'message': '作答时间格式错误，应为ISO 8601格式', 'index': index}, 400
+                    if answered_at.tzinfo is not None:
+                        # 统一转换为服务器本地时间
+                        answered_at = answered_at.astimezone().replace(tzinfo=None)
+
+                answers.append({
+                    'word_id': item['word_id'],
+                    'is_correct': is_correct,
+                    'quality': quality,
+                    'score_change': score_change,
+                    'answered_at': answered_at
+                })
+
+            score_change = db.record_answers(current_user, answers)
+            invalidate_analytics(current_user)
+
+            return {
+                'message': '学习记录已更新',
+                'count': len(answers),
+                'score_change': score_change
+            }, 200
+
+        except Exception as e:
+            logger.error(f"Error submitting learning batch: {str(e)}")
+            return {
+                'message': '批量提交学习记录失败',
+                'error': str(e)
+            }, 500
+
 class ResetProgressResource(Resource):
     @token_required
     def post(self, current_user):
         """重置用户的学习进度"""
         try:
-            # 开始重置进度的事务
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 重置单词学习进度
-                cursor.execute('DELETE FROM user_words WHERE user_id = ?', (current_user,))
-                
-                # 重置复习记录
-                cursor.execute('DELETE FROM review_records WHERE user_id = ?', (current_user,))
-                
-                # 重置打卡记录
-                cursor.execute('DELETE FROM checkin_records WHERE user_id = ?', (current_user,))
-                
-                # 重置用户统计信息
-                cursor.execute('''
-                    UPDATE users 
-                    SET 
-                        total_learned_words = 0, 
-                        total_review_words = 0, 
-                        total_correct_words = 0, 
-                        total_wrong_words = 0,
-                        current_streak = 0,
-                        max_streak = 0
-                    WHERE id = ?
-                ''', (current_user,))
-                
-                # 提交事务
-                conn.commit()
-                
-                logger.info(f"User {current_user} has reset all progress")
-                
-                return {
-                    'message': '成功重置所有学习进度',
-                    'success': True
-                }, 200
-        
+            db.reset_user_progress(current_user)
+            invalidate_principal(current_user)
+            invalidate_analytics(current_user)
+            logger.info(f"User {current_user} has reset all progress")
+
+            return {
+                'message': '成功重置所有学习进度',
+                'success': True
+            }, 200
+
         except Exception as e:
             logger.error(f"Error resetting progress for user {current_user}: {str(e)}", exc_info=True)
             return {
@@ -707,27 +926,10 @@ class LearningStatsResource(Resource):
     def get(self, current_user):
         """获取用户学习统计"""
         try:
-            # 使用数据库连接获取学习统计
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT 
-                        COUNT(DISTINCT word_id) as total_learned,
-                        ROUND(AVG(CASE WHEN is_correct = 1 THEN 1.0 ELSE 0.0 END), 2) as correct_rate,
-                        MAX(date) as last_learning_date
-                    FROM learning_records
-                    WHERE user_id = ?
-                ''', (current_user,))
-                
-                stats = cursor.fetchone()
-                
-                result = {
-                    'totalLearned': stats[0] or 0,
-                    'correctRate': stats[1] or 0,
-                    'lastLearningDate': stats[2]
-                }
-                
-                return result, 200
+            result = analytics_cache.get_or_compute(
+                current_user, 'learning_stats', lambda: db.get_learning_stats(current_user)
+            )
+            return result, 200
         
         except Exception as e:
             logger.error(f"Error retrieving learning stats: {str(e)}")
@@ -742,40 +944,10 @@ class LearningTrendResource(Resource):
     def get(self, current_user):
         """获取用户学习趋势"""
         try:
-            # 使用数据库连接获取学习趋势
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    WITH weeks AS (
-                        SELECT 
-                            strftime('%Y-%W', date) AS week,
-                            COUNT(DISTINCT word_id) AS words_learned,
-                            ROUND(AVG(CASE WHEN is_correct = 1 THEN 1.0 ELSE 0.0 END), 2) AS weekly_accuracy
-                        FROM learning_records
-                        WHERE user_id = ?
-                        GROUP BY week
-                        ORDER BY week DESC
-                        LIMIT 4
-                    )
-                    SELECT 
-                        week, 
-                        words_learned, 
-                        weekly_accuracy
-                    FROM weeks
-                    ORDER BY week
-                ''', (current_user,))
-                
-                trend_data = cursor.fetchall()
-                
-                result = [
-                    {
-                        'week': row[0],
-                        'wordsLearned': row[1],
-                        'accuracy': row[2]
-                    } for row in trend_data
-                ]
-                
-                return result, 200
+            result = analytics_cache.get_or_compute(
+                current_user, 'learning_trend', lambda: db.get_learning_trend(current_user)
+            )
+            return result, 200
         
         except Exception as e:
             logger.error(f"Error retrieving learning trend: {str(e)}")
@@ -786,62 +958,53 @@ class LearningTrendResource(Resource):
             }, 500
 
 class MultipleChoiceResource(Resource):
+    MAX_QUIZ_SIZE = 50
+
     @token_required
     def get(self, current_user):
-        """获取随机多选题"""
+        """
+        获取随机多选题
+
+        不带参数时返回一道题；?count=N 时一次返回 N 道题，正确答案互不重复
+        """
+        count = request.args.get('count')
+        if count is not None:
+            try:
+                count = int(count)
+            except ValueError:
+                count = 0
+            if not 1 <= count <= self.MAX_QUIZ_SIZE:
+                return {
+                    'message': f'count 必须是 1 到 {self.MAX_QUIZ_SIZE} 之间的整数',
+                    'error_type': 'InvalidCount'
+                }, 400
+
         try:
-            # 使用数据库连接获取随机单词
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 随机选择一个单词作为正确答案
-                cursor.execute('''
-                    SELECT id, word, meaning 
-                    FROM words 
-                    ORDER BY RANDOM() 
-                    LIMIT 1
-                ''')
-                correct_word = cursor.fetchone()
-                
-                if not correct_word:
+            if count is None:
+                question = word_sampler.question()
+                if question is None:
                     return {
                         'message': '词库中没有单词',
                         'error_type': 'EmptyWordBank'
                     }, 404
-                
-                # 随机选择3个不同的单词作为干扰选项
-                cursor.execute('''
-                    SELECT meaning 
-                    FROM words 
-                    WHERE id != ? 
-                    ORDER BY RANDOM() 
-                    LIMIT 3
-                ''', (correct_word[0],))
-                
-                wrong_words = cursor.fetchall()
-                
-                # 如果没有足够的干扰选项，返回错误
-                if len(wrong_words) < 3:
-                    return {
-                        'message': '词库中单词数量不足',
-                        'error_type': 'InsufficientWords'
-                    }, 400
-                
-                # 构建选项列表（包含正确答案和干扰选项）
-                options = [word[0] for word in wrong_words]
-                options.append(correct_word[2])
-                
-                # 随机打乱选项顺序
-                import random
-                random.shuffle(options)
-                
+                return question, 200
+
+            questions = word_sampler.quiz(count)
+            if not questions:
                 return {
-                    'id': correct_word[0],     # 添加单词ID
-                    'question': correct_word[1],  # 英文单词
-                    'options': options,           # 打乱后的中文选项
-                    'correct_answer': correct_word[2]  # 正确的中文含义
-                }, 200
-                
+                    'message': '词库中没有单词',
+                    'error_type': 'EmptyWordBank'
+                }, 404
+            return {
+                'questions': questions,
+                'count': len(questions)
+            }, 200
+
+        except InsufficientWordsError:
+            return {
+                'message': '词库中单词数量不足',
+                'error_type': 'InsufficientWords'
+            }, 400
         except Exception as e:
             logger.error(f"Error generating multiple choice question: {str(e)}")
             return {
@@ -851,80 +1014,28 @@ class MultipleChoiceResource(Resource):
             }, 500
 
 class RandomWordResource(Resource):
+    WORD_COUNT = 10
+
     @token_required
     def get(self, current_user):
         """获取随机单词进行背诵"""
         try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 获取用户已经掌握的单词（正确次数大于错误次数的单词）
-                cursor.execute('''
-                    SELECT word_id
-                    FROM learning_records
-                    WHERE user_id = ?
-                    GROUP BY word_id
-                    HAVING SUM(CASE WHEN is_correct = 1 THEN 1 ELSE -1 END) > 0
-                ''', (current_user,))
-                mastered_words = {row[0] for row in cursor.fetchall()}
-                
-                # 优先选择未掌握的单词，按错误次数降序排序
-                cursor.execute('''
-                    SELECT 
-                        w.id,
-                        w.word,
-                        w.part_of_speech,
-                        w.meaning,
-                        w.correct_times,
-                        w.wrong_times
-                    FROM words w
-                    WHERE w.id NOT IN (
-                        SELECT word_id
-                        FROM learning_records
-                        WHERE user_id = ?
-                        GROUP BY word_id
-                        HAVING SUM(CASE WHEN is_correct = 1 THEN 1 ELSE -1 END) > 0
-                    )
-                    ORDER BY 
-                        w.wrong_times DESC,
-                        RANDOM()
-                    LIMIT 10
-                ''', (current_user,))
-                
-                unmastered_words = cursor.fetchall()
-                
-                # 如果未掌握的单词不足10个，补充一些随机单词
-                if len(unmastered_words) < 10:
-                    remaining_count = 10 - len(unmastered_words)
-                    cursor.execute('''
-                        SELECT 
-                            w.id,
-                            w.word,
-                            w.part_of_speech,
-                            w.meaning,
-                            w.correct_times,
-                            w.wrong_times
-                        FROM words w
-                        WHERE w.id NOT IN ({})
-                        ORDER BY RANDOM()
-                        LIMIT ?
-                    '''.format(','.join('?' * len(unmastered_words)) if unmastered_words else 'SELECT -1'),
-                    tuple(word[0] for word in unmastered_words) + (remaining_count,))
-                    
-                    unmastered_words.extend(cursor.fetchall())
-                
-                # 格式化返回数据
-                words_data = [{
-                    'id': word[0],
-                    'word': word[1],
-                    'part_of_speech': word[2],
-                    'meaning': word[3],
-                    'correct_times': word[4],
-                    'wrong_times': word[5]
-                } for word in unmastered_words]
-                
-                return words_data, 200
-                
+            # 优先选择答过但未掌握的单词，从最薄弱的一批中随机取
+            candidates = db.get_unmastered_words(current_user, limit=self.WORD_COUNT * 3)
+            words_data = random.sample(candidates, min(self.WORD_COUNT, len(candidates)))
+
+            # 不足时从词库中随机补充，优先未掌握的单词
+            remaining_count = self.WORD_COUNT - len(words_data)
+            if remaining_count > 0:
+                chosen = {word['id'] for word in words_data}
+                sampled = [word_id for word_id in word_sampler.sample_ids(remaining_count * 3 + len(chosen))
+                           if word_id not in chosen]
+                mastered = db.get_mastered_word_ids(current_user, sampled)
+                sampled.sort(key=lambda word_id: word_id in mastered)
+                words_data.extend(db.get_words_by_ids(sampled[:remaining_count]))
+
+            return words_data, 200
+
         except Exception as e:
             logger.error(f"Error fetching random words: {str(e)}")
             return {
@@ -967,19 +1078,11 @@ class ReviewWordsResource(Resource):
             if not isinstance(quality, int) or quality < 0 or quality > 5:
                 return {'message': '质量评分必须是0-5之间的整数'}, 400
 
-            # 更新复习进度
-            db.update_word_progress(current_user, word_id, quality)
-            
-            # 更新学习记录
+            # 复习进度、学习记录、单词统计和用户分数在同一事务中写入
             is_correct = quality >= 3
-            db.add_learning_record(current_user, word_id, is_correct)
-            
-            # 更新单词统计
-            db.update_word_stats(word_id, is_correct)
-            
-            # 更新用户分数
             score_change = quality * 2  # 根据质量评分给予相应分数
-            db.update_user_score(current_user, score_change)
+            db.record_answer(current_user, word_id, is_correct, score_change, quality=quality)
+            invalidate_analytics(current_user)
 
             # 返回成功响应
             return {
@@ -1001,7 +1104,9 @@ class LearningDetailsResource(Resource):
     def get(self, current_user):
         """获取学习详情统计数据"""
         try:
-            details = db.get_learning_details(current_user)
+            details = analytics_cache.get_or_compute(
+                current_user, 'learning_details', lambda: db.get_learning_details(current_user)
+            )
             return {
                 'message': '获取学习详情成功',
                 'data': details
@@ -1018,7 +1123,9 @@ class TimeDistributionResource(Resource):
     def get(self, current_user):
         """获取学习时间分布数据"""
         try:
-            distribution = db.get_time_distribution(current_user)
+            distribution = analytics_cache.get_or_compute(
+                current_user, 'time_distribution', lambda: db.get_time_distribution(current_user)
+            )
             return {
                 'message': '获取时间分布成功',
                 'data': distribution
@@ -1035,7 +1142,9 @@ class MasteryDistributionResource(Resource):
     def get(self, current_user):
         """获取单词掌握度分布"""
         try:
-            distribution = db.get_mastery_distribution(current_user)
+            distribution = analytics_cache.get_or_compute(
+                current_user, 'mastery_distribution', lambda: db.get_mastery_distribution(current_user)
+            )
             return {
                 'message': '获取掌握度分布成功',
                 'data': distribution
@@ -1065,6 +1174,139 @@ class LearningHistoryResource(Resource):
                 'error': str(e)
             }, 500
 
+def export_response(chunks, fmt, filename):
+    """把导出生成器包装为流式下载响应"""
+    return Response(
+        stream_with_context(chunks),
+        mimetype=export.EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'}
+    )
+
+def parse_export_args():
+    """解析导出接口的 format 和 since 参数，返回 (format, since, error)"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in export.EXPORT_FORMATS:
+        return None, None, ({'message': f"不支持的导出格式：{fmt}", 'error_type': 'InvalidFormat'}, 400)
+    try:
+        since = export.parse_since(request.args.get('since'))
+    except ValueError:
+        return None, None, ({'message': '时间格式错误，应为ISO 8601格式', 'error_type': 'InvalidSince'}, 400)
+    return fmt, since, None
+
+class ExportWordsResource(Resource):
+    @token_required
+    def get(self, current_user):
+        """流式导出单词库"""
+        fmt, since, error = parse_export_args()
+        if error:
+            return error
+        logger.info(f"User {current_user} exporting words as {fmt} since {since}")
+        return export_response(export.export_words(db, fmt, since), fmt, 'words')
+
+class ExportHistoryResource(Resource):
+    @token_required
+    def get(self, current_user):
+        """流式导出当前用户的全部学习记录"""
+        fmt, since, error = parse_export_args()
+        if error:
+            return error
+        logger.info(f"User {current_user} exporting learning history as {fmt} since {since}")
+        return export_response(export.export_history(db, current_user, fmt, since), fmt, 'learning_history')
+
+class WordImportResource(Resource):
+    @token_required
+    def post(self, current_user):
+        """
+        批量导入单词表
+
+        以 multipart 表单的 file 字段上传，或直接把文件内容作为请求体发送。
+        格式由 ?format= 指定，未指定时按文件扩展名推断；?update=1 时覆盖已存在单词的词性和释义。
+        """
+        upload = request.files.get('file')
+        if upload is not None:
+            stream, filename = upload.stream, upload.filename
+        else:
+            stream, filename = request.stream, None
+
+        fmt = request.args.get('format') or importer.guess_format(filename)
+        if fmt not in importer.IMPORT_FORMATS:
+            return {
+                'message': f"不支持的导入格式：{fmt}" if fmt else '无法推断文件格式，请指定 format 参数',
+                'error_type': 'InvalidFormat'
+            }, 400
+
+        update_existing = request.args.get('update', '').lower() in ('1', 'true', 'yes')
+        logger.info(f"User {current_user} importing words as {fmt}, update={update_existing}")
+        try:
+            result = importer.import_words(db, importer.open_text(stream), fmt, update_existing=update_existing)
+        except (ValueError, UnicodeDecodeError) as e:
+            logger.warning(f"Word import failed: {str(e)}")
+            return {
+                'message': '单词表解析失败',
+                'error': str(e)
+            }, 400
+
+        return {
+            'message': f"导入完成，新增 {result['inserted']} 个单词",
+            **result
+        }, 200
+
+class CacheStatsResource(Resource):
+    @token_required
+    def get(self, current_user):
+        """获取进程内各缓存的命中/未命中计数"""
+        return {
+            'analytics': analytics_cache.stats(),
+            'principals': principal_cache.stats(),
+            'token_claims': token_claims_cache.stats()
+        }, 200
+
+class DashboardResource(Resource):
+    SECTIONS = ('score', 'stats', 'wrong_words', 'checkin', 'words')
+
+    @token_required
+    def get(self, current_user):
+        """
+        一次请求获取仪表盘所需的全部数据
+
+        各部分在同一个连接的同一个只读事务中查询；?include=score,stats 只返回指定部分
+        """
+        include = request.args.get('include')
+        sections = [name.strip() for name in include.split(',') if name.strip()] if include else list(self.SECTIONS)
+        unknown = [name for name in sections if name not in self.SECTIONS]
+        if unknown:
+            return {
+                'message': f"未知的仪表盘数据：{', '.join(unknown)}",
+                'error_type': 'InvalidSection',
+                'sections': list(self.SECTIONS)
+            }, 400
+
+        try:
+            result = {}
+            with db.read_transaction():
+                if 'score' in sections:
+                    result['score'] = db.get_user_score(current_user)
+                if 'stats' in sections:
+                    result['stats'] = analytics_cache.get_or_compute(
+                        current_user, 'learning_stats', lambda: db.get_learning_stats(current_user)
+                    )
+                if 'wrong_words' in sections:
+                    wrong_words = db.get_user_wrong_words(current_user)
+                    result['wrong_words'] = {'count': len(wrong_words), 'items': wrong_words}
+                if 'checkin' in sections:
+                    result['checkin'] = db.get_checkin_summary(current_user)
+                if 'words' in sections:
+                    result['words'] = {'total': db.count_words()}
+            return result, 200
+
+        except Exception as e:
+            logger.error(f"Error building dashboard for user {current_user}: {str(e)}", exc_info=True)
+            return {
+                'message': '获取仪表盘数据失败',
+                'error': str(e),
+                'error_type': type(e).__name__
+            }, 500
+
 class ScheduleReviewResource(Resource):
     @token_required
     def post(self, current_user):
@@ -1085,6 +1327,7 @@ class ScheduleReviewResource(Resource):
 
             # 安排复习时间
             db.schedule_word_review(current_user, word_id, days)
+            invalidate_analytics(current_user)
             
             return {
                 'message': f'已安排{days}天后复习'
@@ -1097,51 +1340,61 @@ class ScheduleReviewResource(Resource):
                 'error': str(e)
             }, 500
 
+class ReviewForecastResource(Resource):
+    MAX_FORECAST_DAYS = 365
+    SCOPES = ('user', 'system')
+
+    @token_required
+    def get(self, current_user):
+        """
+        预测未来每天到期的复习数量
+
+        ?days=N 指定天数（默认 14）；?scope=system 返回全站的预测，默认为当前用户
+        """
+        try:
+            days = int(request.args.get('days', 14))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.MAX_FORECAST_DAYS:
+            return {
+                'message': f'days 必须是 1 到 {self.MAX_FORECAST_DAYS} 之间的整数',
+                'error_type': 'InvalidDays'
+            }, 400
+
+        scope = request.args.get('scope', 'user')
+        if scope not in self.SCOPES:
+            return {
+                'message': f"scope 必须是 {' 或 '.join(self.SCOPES)}",
+                'error_type': 'InvalidScope'
+            }, 400
+
+        try:
+            forecast = db.get_review_forecast(current_user if scope == 'user' else None, days)
+            forecast['scope'] = scope
+            return forecast, 200
+        except Exception as e:
+            logger.error(f"Error forecasting reviews for user {current_user}: {str(e)}")
+            return {
+                'message': '获取复习预测失败',
+                'error': str(e)
+            }, 500
+
 class CheckinResource(Resource):
     @token_required
     def get(self, current_user):
         """获取打卡状态和统计信息"""
         try:
-            logger.info(f"Fetching checkin status for user {current_user}")
-            
-            # 调试：检查用户的打卡记录
-            try:
-                debug_info = db.debug_checkin_records(current_user)
-                logger.info(f"Debug checkin records: {debug_info}")
-            except Exception as debug_error:
-                logger.warning(f"Error in debug_checkin_records: {str(debug_error)}")
-            
-            # 获取今日打卡状态
-            today_status = None
-            try:
-                today_status = db.get_checkin_status(current_user)
-                logger.info(f"Today's checkin status: {today_status}")
-            except Exception as status_error:
-                logger.warning(f"Error getting today's checkin status: {str(status_error)}")
-            
-            # 获取打卡统计信息
-            stats = None
-            try:
-                stats = db.get_checkin_stats(current_user)
-                logger.info(f"Checkin stats: {stats}")
-            except Exception as stats_error:
-                logger.warning(f"Error getting checkin stats: {str(stats_error)}")
-            
-            # 如果两个方法都失败，抛出异常
-            if today_status is None and stats is None:
-                raise Exception(f"无法获取用户 {current_user} 的打卡信息")
-            
+            summary = db.get_checkin_summary(current_user)
             return {
                 'message': '获取打卡信息成功',
-                'today_status': today_status,
-                'stats': stats
+                'today_status': summary['today_status'],
+                'stats': summary['stats']
             }, 200
         except Exception as e:
             logger.error(f"Error getting checkin info for user {current_user}: {str(e)}", exc_info=True)
             return {
                 'message': '获取打卡信息失败',
-                'error': str(e),
-                'details': traceback.format_exc()
+                'error': str(e)
             }, 500
 
     @token_required
@@ -1171,6 +1424,7 @@ class CheckinResource(Resource):
 
             # 提交打卡
             result = db.submit_checkin(current_user, checkin_date, checkin_type)
+            invalidate_analytics(current_user)
             
             return {
                 'message': '打卡成功',
@@ -1184,13 +1438,31 @@ class CheckinResource(Resource):
                 'error': str(e)
             }, 400
 
+class CheckinDiagnosticsResource(Resource):
+    @token_required
+    def get(self, current_user):
+        """打卡记录与打卡状态计数器的诊断信息，需设置 CHECKIN_DIAGNOSTICS=1 开启"""
+        if not app.config['CHECKIN_DIAGNOSTICS']:
+            return {'message': '诊断接口未开启'}, 404
+        try:
+            return db.debug_checkin_records(current_user), 200
+        except Exception as e:
+            logger.error(f"Error debugging checkin records for user {current_user}: {str(e)}", exc_info=True)
+            return {
+                'message': '获取打卡诊断信息失败',
+                'error': str(e)
+            }, 500
+
 # 注册API路由
 api.add_resource(AuthResource, '/api/auth/login')
 api.add_resource(RegisterResource, '/api/auth/register')
 api.add_resource(WordResource, '/api/words', '/api/words/<int:word_id>')
+api.add_resource(WordImportResource, '/api/words/import')
+api.add_resource(WordSearchResource, '/api/words/search')
 api.add_resource(WrongWordsResource, '/api/wrong-words')
 api.add_resource(ScoreResource, '/api/score')
 api.add_resource(LearningResource, '/api/learn')
+api.add_resource(LearningBatchResource, '/api/learn/batch')
 api.add_resource(ResetProgressResource, '/api/reset-progress')
 api.add_resource(LearningStatsResource, '/api/learning-stats')
 api.add_resource(LearningTrendResource, '/api/learning-trend')
@@ -1202,7 +1474,13 @@ api.add_resource(TimeDistributionResource, '/api/time-distribution')
 api.add_resource(MasteryDistributionResource, '/api/mastery-distribution')
 api.add_resource(LearningHistoryResource, '/api/learning-history')
 api.add_resource(ScheduleReviewResource, '/api/schedule-review')
+api.add_resource(ExportWordsResource, '/api/export/words')
+api.add_resource(ExportHistoryResource, '/api/export/history')
+api.add_resource(ReviewForecastResource, '/api/review-forecast')
 api.add_resource(CheckinResource, '/api/checkin')
+api.add_resource(CheckinDiagnosticsResource, '/api/checkin/debug')
+api.add_resource(CacheStatsResource, '/api/cache-stats')
+api.add_resource(DashboardResource, '/api/dashboard')
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,252 @@
+"""
+asyncio 服务模式
+
+用任意 ASGI 服务器运行与 Flask 应用相同的 API::
+
+    uvicorn asgi:application --workers 2
+    ASGI_DB_THREADS=16 hypercorn asgi:application
+
+事件循环负责连接、读取请求体和发送响应，请求处理（Flask 路由、Resource 以及
+其中的全部 Database 调用）在 AsyncDatabase 的专用线程池中执行，线程数即同时
+执行的请求数和池化 SQLite 连接数。与 gunicorn 同步 worker 相比，慢速上传、
+空闲的长轮询连接只占用事件循环，不占用处理线程。
+
+流式响应（如导出）的生成器使用处理线程的数据库连接，只能在该线程中读取。同时
+边读边发送的流式响应最多 ASGI_STREAM_THREADS 个（默认为线程数的一半），期间
+线程随客户端的读取速度等待；超过时先在线程中把剩余内容读入临时文件再由事件循环
+发送，读得慢的客户端不会占满线程池。
+"""
+import asyncio
+import functools
+import logging
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 请求体超过该大小时写入临时文件
+SPOOL_MAX_BYTES = 1024 * 1024
+# 在线程池中每次读取的响应体大小，普通响应一次读完，流式响应分批发送
+RESPONSE_BATCH_BYTES = 64 * 1024
+
+
+class AsyncDatabase:
+    """数据库线程池：请求处理和其中的 Database 调用都在这里执行，每个线程使用各自的池化连接"""
+
+    def __init__(self, db, max_workers=8):
+        """
+        :param db: Database 实例，每个线程使用各自的池化连接
+        :param max_workers: 线程数，即最多同时执行的数据库操作数
+        """
+        self.db = db
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    async def run(self, func, *args, **kwargs):
+        """在数据库线程池中执行 func(*args, **kwargs)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self):
+        """等待进行中的操作完成，然后关闭线程池"""
+        self._executor.shutdown(wait=True)
+
+
+def _latin1(value):
+    return value.encode('utf-8').decode('latin-1')
+
+
+def build_environ(scope, body, length):
+    """
+    由 ASGI 请求构造 WSGI environ
+
+    :param scope: ASGI http scope
+    :param body: 已读完的请求体文件对象
+    :param length: 请求体长度，分块传输的请求也按读到的长度设置 CONTENT_LENGTH
+    """
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': _latin1(scope.get('root_path', '')),
+        'PATH_INFO': _latin1(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    environ['CONTENT_LENGTH'] = str(length)
+    return environ
+
+
+def _pull(iterator, limit=RESPONSE_BATCH_BYTES):
+    """从 WSGI 响应迭代器读取不超过 limit 字节的若干块，返回 (块列表, 是否已读完)"""
+    batch, size = [], 0
+    for chunk in iterator:
+        if chunk:
+            batch.append(chunk)
+            size += len(chunk)
+        if size >= limit:
+            return batch, False
+    return batch, True
+
+
+class ASGIApp:
+    """在数据库线程池中运行 WSGI 应用的 ASGI 应用"""
+
+    def __init__(self, wsgi_app, adb, max_streams=None):
+        """
+        :param wsgi_app: WSGI 应用，如 Flask 的 app.wsgi_app
+        :param adb: AsyncDatabase，请求在其线程池中处理
+        :param max_streams: 同时边读边发送的流式响应数，默认为线程数的一半（至少 1）
+        """
+        self.wsgi_app = wsgi_app
+        self.adb = adb
+        if max_streams is None:
+            max_streams = max(1, adb.max_workers // 2)
+        self._streams = threading.BoundedSemaphore(max_streams)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                logger.info(f"ASGI app started with {self.adb.max_workers} database threads")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.adb.run(self.adb.db.close)
+                self.adb.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        # 请求体在事件循环中读完，慢速客户端不占用处理线程
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            length = 0
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                length += body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+
+            loop = asyncio.get_running_loop()
+            messages, spool = await self.adb.run(self._handle, build_environ(scope, body, length), send, loop)
+            try:
+                for message in messages:
+                    await send(message)
+                if spool is not None:
+                    while True:
+                        chunk = spool.read(RESPONSE_BATCH_BYTES)
+                        more = len(chunk) == RESPONSE_BATCH_BYTES
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                        if not more:
+                            break
+            finally:
+                if spool is not None:
+                    spool.close()
+        finally:
+            body.close()
+
+    def _handle(self, environ, send, loop):
+        """
+        在线程池中处理一个请求
+
+        普通响应读完后返回要发送的消息，由事件循环发送；流式响应（如导出）的
+        生成器使用本线程的数据库连接，必须在同一线程中读完。未超过 max_streams 时
+        逐批交给事件循环发送并等待发送完成，客户端读得慢时本线程随之等待；超过时
+        把剩余内容读入临时文件，由事件循环发送。
+
+        :return: (要发送的消息列表, 之后要发送的临时文件或 None)
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            iterator = iter(result)
+            batch, done = _pull(iterator)
+            start = {'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']}
+            if done:
+                return [start, {'type': 'http.response.body', 'body': b''.join(batch)}], None
+
+            if not self._streams.acquire(blocking=False):
+                spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+                while True:
+                    spool.writelines(batch)
+                    if done:
+                        break
+                    batch, done = _pull(iterator)
+                spool.seek(0)
+                return [start], spool
+
+            try:
+                emit(start)
+                while not done:
+                    emit({'type': 'http.response.body', 'body': b''.join(batch), 'more_body': True})
+                    batch, done = _pull(iterator)
+            finally:
+                self._streams.release()
+            return [{'type': 'http.response.body', 'body': b''.join(batch)}], None
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+def create_app(flask_app, db, max_workers=None, max_streams=None):
+    """
+    创建 ASGI 应用
+
+    :param flask_app: Flask 应用
+    :param db: Flask 应用使用的 Database
+    :param max_workers: 数据库线程数，默认读取 ASGI_DB_THREADS 环境变量（8）
+    :param max_streams: 同时边读边发送的流式响应数，默认读取 ASGI_STREAM_THREADS 环境变量（线程数的一半）
+    """
+    if max_workers is None:
+        max_workers = int(os.environ.get('ASGI_DB_THREADS', 8))
+    if max_streams is None and os.environ.get('ASGI_STREAM_THREADS'):
+        max_streams = int(os.environ['ASGI_STREAM_THREADS'])
+    return ASGIApp(flask_app.wsgi_app, AsyncDatabase(db, max_workers), max_streams)
+
+
+def __getattr__(name):
+    # 只有被 ASGI 服务器加载时才导入 Flask 应用并创建 application
+    if name == 'application':
+        import app as flask_module
+        globals()['application'] = create_app(flask_module.app, flask_module.db)
+        return globals()['application']
+    raise AttributeError(name)
@@ -0,0 +1,310 @@
+"""
+同步 Flask 与 asyncio（ASGI）服务模式的负载测试
+
+在合成数据（见 synthetic.py）上，同时运行两类客户端：
+
+- 活跃客户端：不断请求仪表盘、学习统计、搜索和答题接口，记录每秒请求数和 p50/p99；
+- 空闲学习者：模拟长轮询、弱网上的学习者，连接建立后要等 --idle-seconds 秒才发出
+  请求体，随后立即发起下一个这样的请求。
+
+同步模式按 gunicorn 同步 worker 的方式处理：--workers 个线程从同一队列取请求，
+每个请求从读取请求体到写完响应都占用一个线程。asyncio 模式使用 asgi.create_app，
+请求体由事件循环读取，处理线程数同为 --workers。两种模式都在进程内直接调用
+WSGI/ASGI 应用，不包括网络和 HTTP 解析的开销::
+
+    python benchmarks/bench_asgi.py --scale small --workers 8 --active 16 --idle 200
+    python benchmarks/bench_asgi.py --idle 0,50,200 --duration 20 --output asgi.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import jwt
+from werkzeug.test import EnvironBuilder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+from bench_suite import bind_app, import_app  # noqa: E402
+from database import Database  # noqa: E402
+import asgi  # noqa: E402
+
+
+class Workload:
+    """活跃客户端的请求组合和空闲学习者的请求"""
+
+    def __init__(self, app_module, scale, seed=42):
+        self.app_module = app_module
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def token(self, user_id):
+        token = self._tokens.get(user_id)
+        if token is None:
+            token = self._tokens[user_id] = jwt.encode(
+                {'user_id': user_id, 'exp': int(time.time()) + 86400},
+                self.app_module.app.config['SECRET_KEY'], algorithm='HS256'
+            )
+        return token
+
+    def _answer(self, user_id):
+        with self._lock:
+            word_id = self.rng.randint(1, self.scale.words)
+            is_correct = self.rng.random() < 0.7
+        return 'POST', '/api/learn', user_id, json.dumps({'word_id': word_id, 'is_correct': is_correct}).encode()
+
+    def active_request(self):
+        """返回 (method, url, user_id, body)"""
+        with self._lock:
+            user_id = self.rng.randint(1, self.scale.users)
+            kind = self.rng.random()
+            word = self.rng.randint(1, self.scale.words)
+        if kind < 0.3:
+            return 'GET', '/api/dashboard', user_id, b''
+        if kind < 0.5:
+            return 'GET', '/api/learning-stats', user_id, b''
+        if kind < 0.7:
+            return 'GET', f'/api/words/search?q=word{word}', user_id, b''
+        return self._answer(user_id)
+
+    def idle_request(self):
+        with self._lock:
+            user_id = self.rng.randint(1, self.scale.users)
+        return self._answer(user_id)
+
+
+class Recorder:
+    """记录测量窗口内完成的请求"""
+
+    def __init__(self):
+        self.latencies = []
+        self.idle_completed = 0
+        self.errors = 0
+        self.measuring = False
+        self._lock = threading.Lock()
+
+    def record(self, latency, status, idle=False):
+        if not self.measuring:
+            return
+        with self._lock:
+            if status >= 500:
+                self.errors += 1
+            if idle:
+                self.idle_completed += 1
+            else:
+                self.latencies.append(latency)
+
+    def summary(self, seconds):
+        times = sorted(self.latencies)
+        n = len(times)
+        if not n:
+            return {'requests': 0, 'requests_per_second': 0, 'errors': self.errors,
+                    'idle_completed': self.idle_completed}
+        return {
+            'requests': n,
+            'requests_per_second': round(n / seconds, 1),
+            'p50_ms': round(times[n // 2] * 1000, 2),
+            'p99_ms': round(times[min(n - 1, int(n * 0.99))] * 1000, 2),
+            'max_ms': round(times[-1] * 1000, 2),
+            'errors': self.errors,
+            'idle_completed': self.idle_completed,
+        }
+
+
+class SlowInput(io.BytesIO):
+    """在 ready_at 之前阻塞读取的请求体，模拟同步 worker 等待慢速客户端"""
+
+    def __init__(self, body, ready_at):
+        super().__init__(body)
+        self.ready_at = ready_at
+
+    def _wait(self):
+        delay = self.ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self, *args):
+        self._wait()
+        return super().read(*args)
+
+    def readinto(self, buffer):
+        self._wait()
+        return super().readinto(buffer)
+
+
+def _environ(workload, method, url, user_id, body):
+    parts = urlsplit(url)
+    return EnvironBuilder(
+        path=parts.path, query_string=parts.query, method=method, data=body or None,
+        content_type='application/json' if body else None,
+        headers={'Authorization': f'Bearer {workload.token(user_id)}'},
+    ).get_environ()
+
+
+def run_sync(workload, workers, active, idle, idle_seconds, warmup, duration):
+    """同步模式：workers 个线程处理共享队列中的请求"""
+    wsgi_app = workload.app_module.app.wsgi_app
+    recorder = Recorder()
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync-worker')
+
+    def handle(environ, submitted, is_idle):
+        status = {}
+
+        def start_response(line, headers, exc_info=None):
+            status['code'] = int(line.split(' ', 1)[0])
+
+        result = wsgi_app(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        recorder.record(time.monotonic() - submitted, status['code'], is_idle)
+
+    def submit_idle(_=None):
+        if stop.is_set():
+            return
+        method, url, user_id, body = workload.idle_request()
+        environ = _environ(workload, method, url, user_id, body)
+        now = time.monotonic()
+        environ['wsgi.input'] = SlowInput(body, now + idle_seconds)
+        pool.submit(handle, environ, now, True).add_done_callback(submit_idle)
+
+    def active_client():
+        while not stop.is_set():
+            environ = _environ(workload, *workload.active_request())
+            pool.submit(handle, environ, time.monotonic(), False).result()
+
+    for _ in range(idle):
+        submit_idle()
+    clients = [threading.Thread(target=active_client, daemon=True) for _ in range(active)]
+    for t in clients:
+        t.start()
+    time.sleep(warmup)
+    recorder.measuring = True
+    time.sleep(duration)
+    recorder.measuring = False
+    stop.set()
+    for t in clients:
+        t.join()
+    pool.shutdown(wait=True)
+    return recorder.summary(duration)
+
+
+def run_async(workload, workers, active, idle, idle_seconds, warmup, duration):
+    """asyncio 模式：事件循环读取请求体，workers 个线程处理请求"""
+    application = asgi.create_app(workload.app_module.app, workload.app_module.db, workers)
+    recorder = Recorder()
+
+    async def request(method, url, user_id, body, delay=0.0):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': parts.path, 'query_string': parts.query.encode(), 'root_path': '',
+            'server': ('bench', 80), 'client': ('127.0.0.1', 0),
+            'headers': [(b'authorization', f'Bearer {workload.token(user_id)}'.encode()),
+                        (b'content-type', b'application/json')],
+        }
+        status = {}
+
+        async def receive():
+            if delay:
+                await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+
+        await application(scope, receive, send)
+        return status['code']
+
+    async def active_client(stop):
+        while not stop.is_set():
+            args = workload.active_request()
+            start = time.monotonic()
+            code = await request(*args)
+            recorder.record(time.monotonic() - start, code)
+
+    async def idle_learner(stop):
+        while not stop.is_set():
+            args = workload.idle_request()
+            start = time.monotonic()
+            code = await request(*args, delay=idle_seconds)
+            recorder.record(time.monotonic() - start, code, idle=True)
+
+    async def main():
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(active_client(stop)) for _ in range(active)]
+        tasks += [asyncio.create_task(idle_learner(stop)) for _ in range(idle)]
+        await asyncio.sleep(warmup)
+        recorder.measuring = True
+        await asyncio.sleep(duration)
+        recorder.measuring = False
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    try:
+        asyncio.run(main())
+    finally:
+        application.adb.close()
+    return recorder.summary(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='同步 Flask 与 asyncio 服务模式的负载测试')
+    parser.add_argument('--scale', choices=sorted(synthetic.SCALES), default='small', help='合成数据规模')
+    parser.add_argument('--workers', type=int, default=8, help='同步 worker 数 / asyncio 模式的数据库线程数')
+    parser.add_argument('--active', type=int, default=16, help='活跃客户端数')
+    parser.add_argument('--idle', default='0,200', help='逗号分隔的空闲学习者数量，逐个测试')
+    parser.add_argument('--idle-seconds', type=float, default=2.0, help='空闲学习者每个请求发出请求体前的等待时间')
+    parser.add_argument('--warmup', type=float, default=2.0, help='每轮开始测量前的预热时间（秒）')
+    parser.add_argument('--duration', type=float, default=10.0, help='每轮测量时间（秒）')
+    parser.add_argument('--output', default=None, help='结果 JSON 文件路径')
+    args = parser.parse_args()
+
+    idle_counts = [int(value) for value in args.idle.split(',')]
+    scale = synthetic.SCALES[args.scale]
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app_module = import_app(tmpdir)
+        db_path = os.path.join(tmpdir, 'bench.db')
+        seconds = synthetic.generate(db_path, *scale)
+        print(f"[{args.scale}] generated {scale.users:,} users, {scale.words:,} words in {seconds:.1f}s")
+
+        for idle in idle_counts:
+            for mode, run in (('sync', run_sync), ('asyncio', run_async)):
+                bind_app(app_module, Database(db_path, instrument=app_module.app.config['METRICS_ENABLED']))
+                workload = Workload(app_module, scale)
+                summary = run(workload, args.workers, args.active, idle, args.idle_seconds,
+                              args.warmup, args.duration)
+                results.append({'mode': mode, 'idle': idle, **summary})
+                print(f"  {mode:<8} idle={idle:<5} {summary['requests_per_second']:>9} req/s"
+                      f"  p50 {summary.get('p50_ms', '-'):>9} ms  p99 {summary.get('p99_ms', '-'):>9} ms"
+                      f"  idle done {summary['idle_completed']:>6}  errors {summary['errors']}")
+        app_module.db.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'scale': args.scale, 'workers': args.workers, 'active': args.active,
+                'idle_seconds': args.idle_seconds, 'duration': args.duration, 'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
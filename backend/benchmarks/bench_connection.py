@@ -0,0 +1,91 @@
+"""
+连接池基准测试
+
+模拟 gunicorn 多个 worker 进程并发处理请求，对比两种连接方式：
+
+* connect-per-call: 每次数据库操作都 sqlite3.connect()/close()（旧实现）
+* pooled: 通过 Database.get_connection() 复用线程内已配置好的连接
+
+每个模拟请求执行 5 次数据库操作，与一次 /api/review-words POST
+（token_required 的用户查询 + 4 次写入）所使用的连接数相同。
+
+用法::
+
+    python benchmarks/bench_connection.py --workers 4 --requests 2000
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+OPS_PER_REQUEST = 5
+QUERY = 'SELECT id, username FROM users WHERE id = ?'
+
+
+def _connect_per_call(db_path, requests):
+    for _ in range(requests):
+        for _ in range(OPS_PER_REQUEST):
+            conn = sqlite3.connect(db_path)
+            try:
+                conn.execute(QUERY, (1,)).fetchone()
+            finally:
+                conn.close()
+
+
+def _pooled(db_path, requests):
+    db = Database(db_path)
+    for _ in range(requests):
+        for _ in range(OPS_PER_REQUEST):
+            with db.get_connection() as conn:
+                conn.execute(QUERY, (1,)).fetchone()
+    db.close()
+
+
+def run(mode, db_path, workers, requests):
+    """启动 workers 个进程，每个进程处理 requests 个模拟请求，返回耗时（秒）"""
+    target = _pooled if mode == 'pooled' else _connect_per_call
+    processes = [
+        multiprocessing.Process(target=target, args=(db_path, requests))
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4, help='模拟的 gunicorn worker 数量')
+    parser.add_argument('--requests', type=int, default=2000, help='每个 worker 处理的请求数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        db = Database(db_path)
+        db.register_user('bench', 'bench')
+        db.close()
+
+        total_requests = args.workers * args.requests
+        print(f"workers={args.workers} requests/worker={args.requests} ops/request={OPS_PER_REQUEST}")
+        results = {}
+        for mode in ('connect-per-call', 'pooled'):
+            elapsed = run(mode, db_path, args.workers, args.requests)
+            results[mode] = elapsed
+            print(f"{mode:>17}: {elapsed:.3f}s  "
+                  f"{total_requests / elapsed:,.0f} req/s  "
+                  f"{elapsed / total_requests * 1e6:.1f} us/req")
+        print(f"speedup: {results['connect-per-call'] / results['pooled']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
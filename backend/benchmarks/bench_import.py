@@ -0,0 +1,82 @@
+"""
+单词表批量导入基准测试
+
+生成一个包含 N 行的 CSV 单词表，分别用逐条 add_word 和 importer.import_words
+（分块 executemany）导入空数据库，比较每秒导入行数。
+
+用法::
+
+    python benchmarks/bench_import.py --rows 1000000 --baseline-rows 20000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importer  # noqa: E402
+from database import Database  # noqa: E402
+
+
+def write_word_list(path, rows):
+    """生成带表头的 CSV 单词表"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'part_of_speech', 'meaning'])
+        for i in range(rows):
+            writer.writerow([f'word{i}', 'n.', f'释义{i}'])
+
+
+def bench_add_word(db_path, csv_path, rows):
+    """逐条调用 add_word 导入前 rows 行"""
+    db = Database(db_path)
+    try:
+        with open(csv_path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            start = time.perf_counter()
+            for index, (word, pos, meaning) in enumerate(reader):
+                if index >= rows:
+                    break
+                db.add_word(word, pos, meaning)
+            return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def bench_importer(db_path, csv_path, chunk_size):
+    """用 importer 分块导入整个文件"""
+    db = Database(db_path)
+    try:
+        with open(csv_path, 'rb') as binary:
+            return importer.import_words(db, importer.open_text(binary), 'csv', chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单词表批量导入基准测试')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='单词表行数')
+    parser.add_argument('--baseline-rows', type=int, default=20_000, help='逐条 add_word 导入的行数')
+    parser.add_argument('--chunk-size', type=int, default=10_000, help='每个事务写入的行数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, 'words.csv')
+        write_word_list(csv_path, args.rows)
+
+        baseline_rows = min(args.baseline_rows, args.rows)
+        elapsed = bench_add_word(os.path.join(tmpdir, 'baseline.db'), csv_path, baseline_rows)
+        baseline_rate = baseline_rows / elapsed
+        print(f"add_word:      {baseline_rows:>10,} rows in {elapsed:8.2f}s  {baseline_rate:>12,.0f} rows/s")
+
+        result = bench_importer(os.path.join(tmpdir, 'import.db'), csv_path, args.chunk_size)
+        print(f"import_words:  {result['read']:>10,} rows in {result['seconds']:8.2f}s  "
+              f"{result['rows_per_second']:>12,} rows/s  ({result['rows_per_second'] / baseline_rate:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
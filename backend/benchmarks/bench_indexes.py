@@ -0,0 +1,176 @@
+"""
+热点查询索引基准测试
+
+生成一个包含大量 learning_records 的数据库，分别在没有二级索引（迁移前）
+和执行 migrations.migrate() 之后测量各接口使用的查询耗时。
+
+用法::
+
+    python benchmarks/bench_indexes.py --rows 10000000 --users 10000 --words 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations  # noqa: E402
+from database import Database  # noqa: E402
+
+# 各接口中依赖 learning_records / words / word_learning_progress 的查询
+QUERIES = {
+    'wrong-words': ('''
+        SELECT DISTINCT w.id, w.word, w.part_of_speech, w.meaning,
+               w.correct_times, w.wrong_times, w.frequency
+        FROM words w
+        JOIN learning_records lr ON w.id = lr.word_id
+        WHERE lr.user_id = ? AND w.wrong_times > w.correct_times
+        ORDER BY w.wrong_times DESC
+        LIMIT 20
+    ''', lambda user_id, word: (user_id,)),
+    'random-word mastery': ('''
+        SELECT word_id
+        FROM learning_records
+        WHERE user_id = ?
+        GROUP BY word_id
+        HAVING SUM(CASE WHEN is_correct = 1 THEN 1 ELSE -1 END) > 0
+    ''', lambda user_id, word: (user_id,)),
+    'learning-stats': ('''
+        SELECT COUNT(DISTINCT word_id),
+               ROUND(AVG(CASE WHEN is_correct = 1 THEN 1.0 ELSE 0.0 END), 2),
+               MAX(date)
+        FROM learning_records
+        WHERE user_id = ?
+    ''', lambda user_id, word: (user_id,)),
+    'learning-trend': ('''
+        SELECT strftime('%Y-%W', date) AS week,
+               COUNT(DISTINCT word_id),
+               ROUND(AVG(CASE WHEN is_correct = 1 THEN 1.0 ELSE 0.0 END), 2)
+        FROM learning_records
+        WHERE user_id = ?
+        GROUP BY week
+        ORDER BY week DESC
+        LIMIT 4
+    ''', lambda user_id, word: (user_id,)),
+    'checkin daily stats': ('''
+        SELECT COUNT(*),
+               SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN is_correct = 0 THEN 1 ELSE 0 END)
+        FROM learning_records
+        WHERE user_id = ? AND date = ?
+    ''', lambda user_id, word: (user_id, date.today().isoformat())),
+    'review due': ('''
+        SELECT word_id FROM word_learning_progress
+        WHERE user_id = ? AND next_review_date <= date('now')
+        ORDER BY next_review_date
+        LIMIT 10
+    ''', lambda user_id, word: (user_id,)),
+    'add_word duplicate check': (
+        'SELECT id FROM words WHERE word = ?',
+        lambda user_id, word: (word,)
+    ),
+}
+
+
+def populate(db_path, rows, users, words, batch=100000):
+    """批量生成测试数据"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    rng = random.Random(42)
+    today = date.today()
+
+    conn.executemany(
+        'INSERT INTO users (username, password) VALUES (?, ?)',
+        ((f'user{i}', 'x') for i in range(users))
+    )
+    conn.executemany(
+        'INSERT INTO words (word, part_of_speech, meaning, frequency, correct_times, wrong_times) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        ((f'word{i}', 'n.', f'释义{i}', 0, rng.randint(0, 20), rng.randint(0, 20)) for i in range(words))
+    )
+    conn.commit()
+
+    dates = [(today - timedelta(days=d)).isoformat() for d in range(365)]
+    inserted = 0
+    while inserted < rows:
+        count = min(batch, rows - inserted)
+        conn.executemany(
+            'INSERT INTO learning_records (user_id, word_id, is_correct, date) VALUES (?, ?, ?, ?)',
+            ((rng.randint(1, users), rng.randint(1, words), rng.random() < 0.7, rng.choice(dates))
+             for _ in range(count))
+        )
+        conn.commit()
+        inserted += count
+
+    progress_rows = min(rows // 10, users * words)
+    conn.executemany(
+        'INSERT OR IGNORE INTO word_learning_progress (user_id, word_id, next_review_date) VALUES (?, ?, ?)',
+        ((rng.randint(1, users), rng.randint(1, words),
+          (today + timedelta(days=rng.randint(-30, 30))).isoformat())
+         for _ in range(progress_rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def time_queries(conn, users, words, iterations):
+    """每个查询执行 iterations 次，返回平均耗时（毫秒）"""
+    rng = random.Random(7)
+    results = {}
+    for name, (sql, make_params) in QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            conn.execute(sql, make_params(rng.randint(1, users), f'word{rng.randint(0, words - 1)}')).fetchall()
+        results[name] = (time.perf_counter() - start) / iterations * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点查询索引基准测试')
+    parser.add_argument('--rows', type=int, default=10_000_000, help='learning_records 行数')
+    parser.add_argument('--users', type=int, default=10_000, help='用户数量')
+    parser.add_argument('--words', type=int, default=20_000, help='单词数量')
+    parser.add_argument('--iterations', type=int, default=20, help='每个查询的执行次数')
+    parser.add_argument('--db', default=None, help='数据库路径，默认使用临时目录')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = args.db or os.path.join(tmpdir, 'bench.db')
+
+        # 建表后回退到迁移前的结构，再导入数据
+        Database(db_path).close()
+        conn = sqlite3.connect(db_path)
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+        ).fetchall():
+            conn.execute(f'DROP INDEX {name}')
+        conn.execute('PRAGMA user_version = 0')
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        populate(db_path, args.rows, args.users, args.words)
+        print(f"populated {args.rows:,} learning_records in {time.perf_counter() - start:.1f}s")
+
+        conn = sqlite3.connect(db_path)
+        before = time_queries(conn, args.users, args.words, args.iterations)
+
+        start = time.perf_counter()
+        migrations.migrate(conn)
+        print(f"migrate + ANALYZE took {time.perf_counter() - start:.1f}s")
+
+        after = time_queries(conn, args.users, args.words, args.iterations)
+        conn.close()
+
+        print(f"{'query':<26}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for name in QUERIES:
+            print(f"{name:<26}{before[name]:>14.3f}{after[name]:>14.3f}{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+多选题生成基准测试
+
+在不同大小的词库上比较原来的 ORDER BY RANDOM() 出题查询和 WordSampler
+的单题延迟，WordSampler 的延迟应与词库大小无关。
+
+用法::
+
+    python benchmarks/bench_quiz.py --sizes 1000 10000 100000 --iterations 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from quiz import WordSampler  # noqa: E402
+
+
+def order_by_random_question(db):
+    """原 MultipleChoiceResource 的两次 ORDER BY RANDOM() 查询"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, word, meaning FROM words ORDER BY RANDOM() LIMIT 1')
+        correct = cursor.fetchone()
+        cursor.execute('SELECT meaning FROM words WHERE id != ? ORDER BY RANDOM() LIMIT 3', (correct[0],))
+        return correct, cursor.fetchall()
+
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多选题生成基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='词库大小')
+    parser.add_argument('--iterations', type=int, default=200, help='每种方式的出题次数')
+    args = parser.parse_args()
+
+    print(f"{'words':>10}{'ORDER BY RANDOM() (ms)':>26}{'WordSampler (ms)':>20}{'load (ms)':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(os.path.join(tmpdir, 'bench.db'))
+            db.bulk_insert_words((f'word{i}', 'n.', f'释义{i}') for i in range(size))
+
+            sampler = WordSampler(db)
+            start = time.perf_counter()
+            sampler.refresh()
+            load = (time.perf_counter() - start) * 1000
+
+            baseline = time_per_call(lambda: order_by_random_question(db), args.iterations)
+            sampled = time_per_call(sampler.question, args.iterations)
+            print(f"{size:>10,}{baseline:>26.3f}{sampled:>20.3f}{load:>12.1f}")
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+复习进度批量重排基准测试
+
+生成 M 个用户、每个用户在若干单词上的学习记录（带回答质量），比较
+scheduler.reschedule 的纯 Python 与 NumPy 实现的吞吐量，并检查两者结果一致。
+
+用法::
+
+    python benchmarks/bench_reschedule.py --users 2000 --words-per-user 200 --reviews-per-word 10
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+import scheduler  # noqa: E402
+
+
+def populate(db_path, users, words_per_user, reviews_per_word):
+    """批量生成用户、单词和按时间排列的学习记录"""
+    db = Database(db_path)
+    db.bulk_insert_words((f'word{i}', 'n.', f'释义{i}') for i in range(words_per_user))
+    db.close()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    # 学习记录上的汇总触发器与本测试无关，去掉以加快生成
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'learning_records'").fetchall():
+        conn.execute(f'DROP TRIGGER {name}')
+    conn.executemany(
+        'INSERT INTO users (username, password) VALUES (?, ?)',
+        ((f'user{i}', 'x') for i in range(users))
+    )
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=365)
+    for user_id in range(1, users + 1):
+        rows = []
+        for word_id in range(1, words_per_user + 1):
+            day = start + timedelta(days=rng.randint(0, 30))
+            for _ in range(reviews_per_word):
+                day += timedelta(days=rng.randint(1, 20))
+                quality = rng.randint(0, 5)
+                rows.append((user_id, word_id, quality >= 3, day.isoformat(),
+                             f'{day.isoformat()} 12:00:00', quality))
+        conn.executemany(
+            'INSERT INTO learning_records (user_id, word_id, is_correct, date, created_at, quality) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+def snapshot(db):
+    with db.get_connection() as conn:
+        return conn.execute('''
+            SELECT user_id, word_id, next_review_date, review_interval, ease_factor
+            FROM word_learning_progress ORDER BY user_id, word_id
+        ''').fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='复习进度批量重排基准测试')
+    parser.add_argument('--users', type=int, default=2000, help='用户数量')
+    parser.add_argument('--words-per-user', type=int, default=200, help='每个用户学习的单词数量')
+    parser.add_argument('--reviews-per-word', type=int, default=10, help='每个单词的作答次数')
+    parser.add_argument('--chunk-size', type=int, default=200000, help='每批读取的学习记录数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        start = time.perf_counter()
+        populate(db_path, args.users, args.words_per_user, args.reviews_per_word)
+        total = args.users * args.words_per_user * args.reviews_per_word
+        print(f"populated {total:,} learning records in {time.perf_counter() - start:.1f}s")
+
+        db = Database(db_path)
+        engines = [False, True] if scheduler.np is not None else [False]
+        snapshots = []
+        for use_numpy in engines:
+            result = scheduler.reschedule(db, chunk_size=args.chunk_size, use_numpy=use_numpy)
+            snapshots.append(snapshot(db))
+            print(f"{result['engine']:<10}{result['seconds']:>10.2f} s{result['records_per_second']:>14,} records/s"
+                  f"{result['pairs']:>12,} pairs")
+        db.close()
+
+        if len(snapshots) == 2:
+            print(f"results identical: {snapshots[0] == snapshots[1]}")
+
+
+if __name__ == '__main__':
+    main()
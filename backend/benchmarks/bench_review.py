@@ -0,0 +1,108 @@
+"""
+复习队列基准测试
+
+生成 N 个单词、M 个用户以及每个用户若干条复习进度，比较原来 LEFT JOIN
+全部单词的复习查询与 get_words_for_review（到期索引 + 新单词游标）的耗时。
+
+用法::
+
+    python benchmarks/bench_review.py --words 100000 --users 10000 --progress-per-user 100
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+# 原 get_words_for_review 的查询
+LEGACY_QUERY = '''
+    SELECT w.id, w.word, w.part_of_speech, w.meaning, w.correct_times, w.wrong_times,
+           wlp.next_review_date, wlp.review_interval
+    FROM words w
+    LEFT JOIN word_learning_progress wlp
+        ON w.id = wlp.word_id AND wlp.user_id = ?
+    WHERE wlp.next_review_date <= date('now') OR wlp.next_review_date IS NULL
+    ORDER BY CASE WHEN wlp.next_review_date IS NULL THEN 1 ELSE 0 END, wlp.next_review_date ASC
+    LIMIT ?
+'''
+
+
+def populate(db_path, words, users, progress_per_user):
+    """批量生成单词、用户和复习进度"""
+    db = Database(db_path)
+    db.bulk_insert_words((f'word{i}', 'n.', f'释义{i}') for i in range(words))
+    db.close()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    rng = random.Random(42)
+    today = date.today()
+    conn.executemany(
+        'INSERT INTO users (username, password) VALUES (?, ?)',
+        ((f'user{i}', 'x') for i in range(users))
+    )
+    for user_id in range(1, users + 1):
+        # 每个用户学过前面一段单词，复习日期分布在前后 30 天
+        conn.executemany(
+            'INSERT INTO word_learning_progress (user_id, word_id, next_review_date, review_interval) '
+            'VALUES (?, ?, ?, ?)',
+            ((user_id, word_id, (today + timedelta(days=rng.randint(-30, 30))).isoformat(), 1)
+             for word_id in range(1, progress_per_user + 1))
+        )
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='复习队列基准测试')
+    parser.add_argument('--words', type=int, default=100_000, help='单词数量')
+    parser.add_argument('--users', type=int, default=10_000, help='用户数量')
+    parser.add_argument('--progress-per-user', type=int, default=100, help='每个用户的复习进度条数')
+    parser.add_argument('--limit', type=int, default=10, help='每次取的单词数量')
+    parser.add_argument('--iterations', type=int, default=200, help='每种方式的调用次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        start = time.perf_counter()
+        populate(db_path, args.words, args.users, args.progress_per_user)
+        print(f"populated {args.words:,} words, {args.users:,} users, "
+              f"{args.users * args.progress_per_user:,} progress rows in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(7)
+        user_ids = [rng.randint(1, args.users) for _ in range(args.iterations)]
+
+        db = Database(db_path)
+        with db.get_connection() as conn:
+            start = time.perf_counter()
+            for user_id in user_ids:
+                conn.execute(LEGACY_QUERY, (user_id, args.limit)).fetchall()
+            legacy = (time.perf_counter() - start) / args.iterations * 1000
+
+        # 第一次调用会把新单词游标推进到已学单词之后
+        start = time.perf_counter()
+        for user_id in user_ids:
+            db.get_words_for_review(user_id, args.limit)
+        first = (time.perf_counter() - start) / args.iterations * 1000
+
+        start = time.perf_counter()
+        for user_id in user_ids:
+            db.get_words_for_review(user_id, args.limit)
+        steady = (time.perf_counter() - start) / args.iterations * 1000
+        db.close()
+
+        print(f"{'LEFT JOIN words (legacy)':<34}{legacy:>10.3f} ms")
+        print(f"{'due queue, cold cursor':<34}{first:>10.3f} ms")
+        print(f"{'due queue, warm cursor':<34}{steady:>10.3f} ms  ({legacy / steady:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,476 @@
+"""
+Database 方法与 API 接口的基准测试套件
+
+在一个或多个规模的合成数据（见 synthetic.py）上，逐个计时 Database 的每个公开方法，
+并通过 Flask 测试客户端计时每个 API 接口，结果写入 JSON 文件。指定 --baseline 时
+与之前的结果比较，中位数变慢超过阈值的用例视为性能回退，以非零状态码退出::
+
+    python benchmarks/bench_suite.py --scales small,medium --output bench.json
+    python benchmarks/bench_suite.py --scales medium --baseline bench.json --only 'review|random|multiple'
+    python benchmarks/bench_suite.py --backend sqlalchemy --baseline bench.json --output bench-sa.json
+
+Database 新增的公开方法或 app 新增的接口没有对应用例时，会列在结果的 uncovered 中。
+读操作的用例排在写操作之前；写操作会修改数据，同一规模下之后的结果以修改后的数据为准。
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+import scheduler  # noqa: E402
+from database import STORAGE_BACKENDS, Database, create_database  # noqa: E402
+from quiz import WordSampler  # noqa: E402
+
+# name: 结果中的名称；call: 被计时的函数；setup: 每次调用前执行（不计时），返回 call 的参数；
+# covers: 覆盖的 Database 方法名或 "METHOD /rule"
+Case = namedtuple('Case', ['name', 'call', 'setup', 'covers'])
+
+# 不单独计时的 Database 方法（连接与事务管理，其他用例都会用到）
+EXCLUDED_METHODS = {'get_connection', 'transaction', 'read_transaction', 'close', 'query_stats'}
+
+
+def case(name, call, setup=None, covers=None):
+    return Case(name, call, setup, covers or name.split(' [')[0])
+
+
+class Context:
+    """一个规模下用例共享的数据库、随机数和唯一值计数器"""
+
+    def __init__(self, db, scale, seed=7):
+        self.db = db
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.counter = 0
+        # 重置进度、打卡等破坏性操作使用单独的用户，不影响其他用例读取的数据
+        db.register_user('bench-scratch', synthetic.PASSWORD)
+        with db.get_connection() as conn:
+            self.scratch_user = conn.execute(
+                'SELECT id FROM users WHERE username = ?', ('bench-scratch',)
+            ).fetchone()[0]
+
+    def user(self):
+        return self.rng.randint(1, self.scale.users)
+
+    def word(self):
+        return self.rng.randint(1, self.scale.words)
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}-{self.counter}'
+
+    def unique_date(self):
+        """打卡用的不重复日期，早于合成数据中的打卡"""
+        self.counter += 1
+        return date(2000, 1, 1) + timedelta(days=self.counter)
+
+    def new_word_id(self):
+        """添加一个单词并返回其 ID，供删除类用例使用"""
+        word = self.unique('bench-delete')
+        self.db.add_word(word, 'n.', '待删除')
+        with self.db.get_connection() as conn:
+            return conn.execute('SELECT id FROM words WHERE word = ?', (word,)).fetchone()[0]
+
+    def answers(self, count):
+        now = datetime.now()
+        return [
+            {'word_id': self.word(), 'is_correct': quality >= 3, 'score_change': quality * 2,
+             'quality': quality, 'answered_at': now}
+            for quality in (self.rng.randint(0, 5) for _ in range(count))
+        ]
+
+
+def database_cases(ctx):
+    db = ctx.db
+    user = lambda i: (ctx.user(),)  # noqa: E731
+    return [
+        # 读操作
+        case('login_user', lambda u: db.login_user(synthetic.username(u), synthetic.PASSWORD), user),
+        case('get_user_by_id', db.get_user_by_id, user),
+        case('get_user_score', db.get_user_score, user),
+        case('get_all_words', db.get_all_words),
+        case('iter_words [page=1000]', lambda after: list(db.iter_words(after_id=after, limit=1000)),
+             lambda i: (ctx.rng.randint(0, max(ctx.scale.words - 1000, 0)),)),
+        case('count_words', db.count_words),
+        case('get_data_version', lambda: db.get_data_version('words')),
+        case('get_user_data_version', db.get_user_data_version, user),
+        case('search_words', db.search_words, lambda i: (f'd{ctx.word()}',)),
+        case('search_words [2 chars]', lambda: db.search_words('wo')),
+        # 1-2 个字符且没有匹配时需要扫描整个 words 表
+        case('search_words [2 chars, no match]', lambda: db.search_words('zq')),
+        case('get_word_details', db.get_word_details, lambda i: (ctx.word(),)),
+        case('get_words_by_ids', db.get_words_by_ids, lambda i: ([ctx.word() for _ in range(10)],)),
+        case('get_wrong_words', db.get_wrong_words, user),
+        case('get_user_wrong_words', db.get_user_wrong_words, user),
+        case('get_unmastered_words', db.get_unmastered_words, user),
+        case('get_mastered_word_ids', db.get_mastered_word_ids,
+             lambda i: (ctx.user(), [ctx.word() for _ in range(10)])),
+        case('get_words_for_review', db.get_words_for_review, user),
+        case('get_learning_stats', db.get_learning_stats, user),
+        case('get_learning_trend', db.get_learning_trend, user),
+        case('get_daily_stats', lambda u: db.get_daily_stats(u, date.today() - timedelta(days=1)), user),
+        case('get_learning_details', db.get_learning_details, user),
+        case('get_time_distribution', db.get_time_distribution, user),
+        case('get_mastery_distribution', db.get_mastery_distribution, user),
+        case('get_learning_history', db.get_learning_history, user),
+        case('iter_learning_history', lambda u: list(db.iter_learning_history(u)), user),
+        case('iter_review_history', lambda u: list(db.iter_review_history(u)), user),
+        case('get_review_forecast [user]', db.get_review_forecast, user),
+        case('get_review_forecast [system]', lambda: db.get_review_forecast(None)),
+        case('get_checkin_summary', db.get_checkin_summary, user),
+        case('debug_checkin_records', db.debug_checkin_records, user),
+        case('calculate_next_interval', lambda: db.calculate_next_interval(6, 2.5, 4)),
+        # 写操作
+        case('register_user', lambda name: db.register_user(name, synthetic.PASSWORD),
+             lambda i: (ctx.unique('bench-user'),)),
+        case('add_word', lambda word: db.add_word(word, 'n.', '基准测试'), lambda i: (ctx.unique('bench-word'),)),
+        case('bulk_insert_words [1000]', lambda rows: db.bulk_insert_words(rows),
+             lambda i: ([(ctx.unique('bench-bulk'), 'n.', '基准测试') for _ in range(1000)],)),
+        case('update_word_stats', db.update_word_stats, lambda i: (ctx.word(), ctx.rng.random() < 0.5)),
+        case('update_user_score', db.update_user_score, lambda i: (ctx.user(), 2)),
+        case('add_learning_record', db.add_learning_record, lambda i: (ctx.user(), ctx.word(), True)),
+        case('update_word_progress', db.update_word_progress, lambda i: (ctx.user(), ctx.word(), 4)),
+        case('record_answer', db.record_answer, lambda i: (ctx.user(), ctx.word(), True, 8, 4)),
+        case('record_answers [10]', db.record_answers, lambda i: (ctx.user(), ctx.answers(10))),
+        case('save_review_progress [100]', db.save_review_progress,
+             lambda i: ([(ctx.user(), ctx.word(), date.today().isoformat(), 6, 2.5) for _ in range(100)],)),
+        case('schedule_word_review', db.schedule_word_review, lambda i: (ctx.user(), ctx.word(), 3)),
+        case('advance_review_cursor', db.advance_review_cursor, lambda i: (ctx.scratch_user, i, i + 1)),
+        case('rebuild_daily_stats [user]', db.rebuild_daily_stats, user),
+        case('submit_checkin', db.submit_checkin, lambda i: (ctx.scratch_user, ctx.unique_date())),
+        case('reset_user_checkin_progress', db.reset_user_checkin_progress, lambda i: (ctx.scratch_user,)),
+        case('reset_user_progress', db.reset_user_progress, lambda i: (ctx.scratch_user,)),
+        case('delete_word', db.delete_word, lambda i: (ctx.new_word_id(),)),
+    ]
+
+
+def resource_cases(ctx, client, app_module):
+    tokens = {}
+
+    def headers(user_id):
+        token = tokens.get(user_id)
+        if token is None:
+            token = tokens[user_id] = jwt.encode(
+                {'user_id': user_id, 'exp': int(time.time()) + 86400},
+                app_module.app.config['SECRET_KEY'], algorithm='HS256'
+            )
+        return {'Authorization': f'Bearer {token}'}
+
+    def request(method, url, user_id=None, **kwargs):
+        response = client.open(url, method=method, headers=headers(user_id) if user_id else None, **kwargs)
+        response.get_data()
+        return response.status_code
+
+    def get(rule, url=None, variant=None, user_id=None):
+        name = f'GET {rule}' + (f' [{variant}]' if variant else '')
+        return case(name, lambda u: request('GET', url or rule, u), lambda i: (user_id or ctx.user(),),
+                    covers=f'GET {rule}')
+
+    def send(method, rule, make, variant=None):
+        """make(i) 返回 (url, user_id, request 的其他参数)"""
+        name = f'{method} {rule}' + (f' [{variant}]' if variant else '')
+        return case(name, lambda url, u, kwargs: request(method, url, u, **kwargs), make,
+                    covers=f'{method} {rule}')
+
+    def csv_body(count):
+        return '\n'.join(f'{ctx.unique("bench-import")},n.,导入' for _ in range(count)).encode('utf-8')
+
+    return [
+        # 读接口
+        get('/api/words', '/api/words?limit=100', 'page=100'),
+        get('/api/words', variant='all'),
+        get('/api/words/search', '/api/words/search?q=word12'),
+        get('/api/wrong-words'),
+        get('/api/score'),
+        get('/api/learning-stats'),
+        get('/api/learning-trend'),
+        get('/api/multiple-choice'),
+        get('/api/multiple-choice', '/api/multiple-choice?count=10', 'count=10'),
+        get('/api/random-word'),
+        get('/api/review-words'),
+        get('/api/learning-details'),
+        get('/api/time-distribution'),
+        get('/api/mastery-distribution'),
+        get('/api/learning-history'),
+        get('/api/export/words'),
+        get('/api/export/history'),
+        get('/api/review-forecast'),
+        get('/api/review-forecast', '/api/review-forecast?scope=system', 'system'),
+        get('/api/checkin'),
+        get('/api/checkin/debug'),
+        get('/api/cache-stats'),
+        get('/api/dashboard'),
+        get('/metrics'),
+        send('POST', '/api/auth/login', lambda i: (
+            '/api/auth/login', None, {'json': {'username': synthetic.username(ctx.user()), 'password': synthetic.PASSWORD}}
+        )),
+        # 写接口
+        send('POST', '/api/auth/register', lambda i: (
+            '/api/auth/register', None, {'json': {'username': ctx.unique('bench-user'), 'password': synthetic.PASSWORD}}
+        )),
+        send('POST', '/api/words', lambda i: (
+            '/api/words', ctx.user(), {'json': {'word': ctx.unique('bench-word'), 'part_of_speech': 'n.', 'meaning': '基准测试'}}
+        )),
+        send('PUT', '/api/words/<int:word_id>', lambda i: (
+            f'/api/words/{ctx.word()}', ctx.user(), {'json': {'part_of_speech': ctx.rng.choice(synthetic.POS)}}
+        )),
+        send('POST', '/api/words/import', lambda i: (
+            '/api/words/import?format=csv', ctx.user(), {'data': csv_body(100)}
+        ), variant='100 rows'),
+        send('POST', '/api/learn', lambda i: (
+            '/api/learn', ctx.user(), {'json': {'word_id': ctx.word(), 'is_correct': ctx.rng.random() < 0.7}}
+        )),
+        send('POST', '/api/learn/batch', lambda i: (
+            '/api/learn/batch', ctx.user(),
+            {'json': {'answers': [{'word_id': ctx.word(), 'quality': ctx.rng.randint(0, 5)} for _ in range(10)]}}
+        ), variant='10 answers'),
+        send('POST', '/api/review-words', lambda i: (
+            '/api/review-words', ctx.user(), {'json': {'word_id': ctx.word(), 'quality': ctx.rng.randint(0, 5)}}
+        )),
+        send('POST', '/api/schedule-review', lambda i: (
+            '/api/schedule-review', ctx.user(), {'json': {'word_id': ctx.word(), 'days': 3}}
+        )),
+        send('POST', '/api/checkin', lambda i: (
+            '/api/checkin', ctx.scratch_user, {'json': {'date': ctx.unique_date().isoformat()}}
+        )),
+        send('POST', '/api/reset-progress', lambda i: ('/api/reset-progress', ctx.scratch_user, {})),
+        send('DELETE', '/api/words/<int:word_id>', lambda i: (f'/api/words/{ctx.new_word_id()}', ctx.user(), {})),
+    ]
+
+
+def measure(c, min_calls, max_calls, budget):
+    """
+    计时一个用例：先预热一次，之后至少调用 min_calls 次、至多 max_calls 次，
+    达到 min_calls 后累计耗时超过 budget 秒即停止
+    """
+    times = []
+    statuses = Counter()
+    try:
+        args = c.setup(-1) if c.setup else ()
+        c.call(*args)
+        spent = 0.0
+        i = 0
+        while i < max_calls and (i < min_calls or spent < budget):
+            args = c.setup(i) if c.setup else ()
+            start = time.perf_counter()
+            result = c.call(*args)
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            spent += elapsed
+            if c.covers.split(' ')[0] in ('GET', 'POST', 'PUT', 'DELETE'):
+                statuses[str(result)] += 1
+            i += 1
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}', 'calls': len(times)}
+
+    times.sort()
+    n = len(times)
+    result = {
+        'calls': n,
+        'mean_ms': round(sum(times) / n * 1000, 4),
+        'p50_ms': round(times[n // 2] * 1000, 4),
+        'p95_ms': round(times[min(n - 1, int(n * 0.95))] * 1000, 4),
+        'min_ms': round(times[0] * 1000, 4),
+        'max_ms': round(times[-1] * 1000, 4),
+    }
+    if statuses:
+        result['statuses'] = dict(statuses)
+    return result
+
+
+def import_app(tmpdir):
+    """
+    导入 app 模块
+
+    app 在导入时按环境变量打开数据库并配置日志，这里先指向一个临时数据库，
+    关闭请求日志；每个规模再通过 bind_app 切换到对应的合成数据库
+    """
+    os.environ.setdefault('DATABASE_PATH', os.path.join(tmpdir, 'app-placeholder.db'))
+    # 出错的接口由结果中的状态码体现，不输出日志
+    os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+    os.environ.setdefault('REQUEST_LOG_SAMPLE_RATE', '0')
+    os.environ.setdefault('CHECKIN_DIAGNOSTICS', '1')
+    import app as app_module
+    return app_module
+
+
+def bind_app(app_module, db):
+    """让 app 的各接口使用指定的 Database，并清空进程内缓存"""
+    app_module.db.close()
+    app_module.db = db
+    app_module.word_sampler = WordSampler(db)
+    app_module.principal_cache.clear()
+    app_module.token_claims_cache.clear()
+    app_module.analytics_cache.clear()
+
+
+def uncovered(cases_by_group, app_module):
+    """没有基准测试用例的 Database 公开方法和 API 接口"""
+    covered = {c.covers for cases in cases_by_group for c in cases}
+    methods = sorted(
+        name for name, _ in inspect.getmembers(Database, inspect.isfunction)
+        if not name.startswith('_') and name not in EXCLUDED_METHODS and name not in covered
+    )
+    endpoints = sorted(
+        f'{method} {rule.rule}'
+        for rule in app_module.app.url_map.iter_rules() if rule.rule.startswith('/api/')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if f'{method} {rule.rule}' not in covered and _handles(app_module.app, rule, method)
+    )
+    return {'database': methods, 'resources': endpoints}
+
+
+def _handles(app, rule, method):
+    """
+    Resource 注册在多个 URL 上时，每个 URL 都会列出全部方法；
+    只有处理函数的参数与 URL 中的变量一致时才算实际存在的接口
+    """
+    view_class = getattr(app.view_functions[rule.endpoint], 'view_class', None)
+    handler = getattr(view_class, method.lower(), None)
+    if handler is None:
+        return view_class is None
+    params = set(inspect.signature(inspect.unwrap(handler)).parameters) - {'self', 'current_user'}
+    return params == set(rule.arguments)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    与基准结果比较中位数耗时
+
+    :return: 回退列表，每项为 (规模, 用例, 基准 p50, 当前 p50)
+    """
+    regressions = []
+    for scale_name, scale in results['scales'].items():
+        base_scale = baseline.get('scales', {}).get(scale_name)
+        if not base_scale:
+            continue
+        for group in ('database', 'resources'):
+            for name, current in scale[group].items():
+                base = base_scale.get(group, {}).get(name)
+                if not base or 'p50_ms' not in base or 'p50_ms' not in current:
+                    continue
+                if (current['p50_ms'] > base['p50_ms'] * threshold
+                        and current['p50_ms'] - base['p50_ms'] > min_delta_ms):
+                    regressions.append((scale_name, name, base['p50_ms'], current['p50_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database 方法与 API 接口的基准测试套件')
+    parser.add_argument('--scales', default='small,medium',
+                        help=f"逗号分隔的预设规模（{', '.join(synthetic.SCALES)}）或 custom")
+    parser.add_argument('--users', type=int, default=100, help='custom 规模的用户数量')
+    parser.add_argument('--words', type=int, default=10_000, help='custom 规模的单词数量')
+    parser.add_argument('--records-per-user', type=int, default=200, help='custom 规模每个用户的学习记录数量')
+    parser.add_argument('--backend', choices=STORAGE_BACKENDS, default='sqlite',
+                        help='存储后端，两种后端的结果可以用 --baseline 对比')
+    parser.add_argument('--only', default=None, help='只运行名称匹配该正则表达式的用例')
+    parser.add_argument('--min-calls', type=int, default=5, help='每个用例最少调用次数')
+    parser.add_argument('--max-calls', type=int, default=200, help='每个用例最多调用次数')
+    parser.add_argument('--budget', type=float, default=0.5, help='每个用例的计时预算（秒）')
+    parser.add_argument('--output', default='bench_results.json', help='结果 JSON 文件路径')
+    parser.add_argument('--baseline', default=None, help='用于比较的历史结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=1.5, help='中位数变为基准的多少倍视为回退')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='忽略小于该毫秒数的变化')
+    args = parser.parse_args()
+
+    scales = {}
+    for name in args.scales.split(','):
+        name = name.strip()
+        if name == 'custom':
+            scales[name] = synthetic.Scale(args.users, args.words, args.records_per_user)
+        elif name in synthetic.SCALES:
+            scales[name] = synthetic.SCALES[name]
+        else:
+            parser.error(f'未知规模：{name}')
+    only = re.compile(args.only) if args.only else None
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'numpy': scheduler.np is not None,
+        'backend': args.backend,
+        'settings': {'min_calls': args.min_calls, 'max_calls': args.max_calls, 'budget': args.budget},
+        'scales': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app_module = import_app(tmpdir)
+        client = app_module.app.test_client()
+        coverage = None
+        for scale_name, scale in scales.items():
+            db_path = os.path.join(tmpdir, f'{scale_name}.db')
+            seconds = synthetic.generate(db_path, *scale)
+            print(f"[{scale_name}] generated {scale.users:,} users, {scale.words:,} words, "
+                  f"{scale.users * scale.records_per_user:,} learning records in {seconds:.1f}s")
+
+            db = create_database(args.backend, db_path, instrument=app_module.app.config['METRICS_ENABLED'])
+            bind_app(app_module, db)
+            ctx = Context(db, scale)
+            groups = {'database': database_cases(ctx), 'resources': resource_cases(ctx, client, app_module)}
+            if coverage is None:
+                coverage = uncovered(groups.values(), app_module)
+
+            scale_result = {**scale._asdict(), 'generate_seconds': round(seconds, 2)}
+            for group, cases in groups.items():
+                scale_result[group] = {}
+                for c in cases:
+                    if only and not only.search(c.name):
+                        continue
+                    stats = measure(c, args.min_calls, args.max_calls, args.budget)
+                    scale_result[group][c.name] = stats
+                    if 'error' in stats:
+                        print(f"  {c.name:<52} ERROR {stats['error']}")
+                    else:
+                        status = ' '.join(f'{code}x{count}' for code, count in stats.get('statuses', {}).items())
+                        print(f"  {c.name:<52}{stats['p50_ms']:>10.3f} ms p50{stats['p95_ms']:>10.3f} ms p95  {status}")
+            results['scales'][scale_name] = scale_result
+            db.close()
+
+    results['uncovered'] = coverage
+    for group, names in coverage.items():
+        if names:
+            print(f"uncovered {group}: {', '.join(names)}")
+
+    with open(args.output, 'w', encoding='utf-8') as fp:
+        json.dump(results, fp, ensure_ascii=False, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for scale_name, name, before, after in regressions:
+            print(f"REGRESSION [{scale_name}] {name}: {before:.3f} ms -> {after:.3f} ms ({after / before:.1f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
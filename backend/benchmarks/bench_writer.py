@@ -0,0 +1,151 @@
+"""
+多进程写入的负载测试：各进程直接写入与交给单写入者组提交的对比
+
+在合成数据（见 synthetic.py）上启动 --processes 个进程模拟 gunicorn worker，
+每个进程用若干线程不断调用 Database.record_answer（答题接口的写路径：学习记录、
+单词统计、用户分数和复习进度）。direct 模式下各进程各自提交事务，writer 模式下
+写操作发给 writer.py 的写入进程组提交。记录每秒完成的写操作数、确认延迟的
+p50/p99，以及失败（如 database is locked）的次数::
+
+    python benchmarks/bench_writer.py --scale small --processes 4 --threads 1,4,16
+    python benchmarks/bench_writer.py --batch-ms 1 --duration 10 --output writer.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+import writer  # noqa: E402
+from database import Database  # noqa: E402
+
+
+def _worker(db_path, address, scale, threads, start_at, duration, seed, results):
+    """一个 worker 进程：threads 个线程在 [start_at, start_at + duration) 内不断写入"""
+    import threading
+
+    db = Database(db_path, writer=writer.WriterClient(address) if address else None)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def run(thread_seed):
+        rng = random.Random(thread_seed)
+        local_latencies, local_errors = [], []
+        while time.time() < start_at:
+            time.sleep(0.001)
+        end = start_at + duration
+        while True:
+            begin = time.time()
+            if begin >= end:
+                break
+            user_id = rng.randint(1, scale.users)
+            word_id = rng.randint(1, scale.words)
+            is_correct = rng.random() < 0.7
+            try:
+                db.record_answer(user_id, word_id, is_correct, 8 if is_correct else 0, quality=4 if is_correct else 1)
+            except Exception as e:
+                local_errors.append(type(e).__name__)
+                continue
+            local_latencies.append(time.time() - begin)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    pool = [threading.Thread(target=run, args=(seed * 1000 + i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    db.close()
+    results.put((latencies, errors))
+
+
+def run_mode(db_path, address, scale, processes, threads, duration):
+    """启动 processes 个 worker 进程写入 duration 秒，返回汇总"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    start_at = time.time() + 1.0
+    workers = [
+        context.Process(target=_worker, args=(db_path, address, scale, threads, start_at, duration, i, results))
+        for i in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    latencies, errors = [], []
+    for _ in workers:
+        worker_latencies, worker_errors = results.get()
+        latencies.extend(worker_latencies)
+        errors.extend(worker_errors)
+    for p in workers:
+        p.join()
+
+    latencies.sort()
+    n = len(latencies)
+    summary = {'writes': n, 'writes_per_second': round(n / duration, 1), 'errors': len(errors)}
+    if errors:
+        summary['error_types'] = sorted(set(errors))
+    if n:
+        summary.update({
+            'p50_ms': round(latencies[n // 2] * 1000, 2),
+            'p99_ms': round(latencies[min(n - 1, int(n * 0.99))] * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程直接写入与单写入者组提交的对比')
+    parser.add_argument('--scale', choices=sorted(synthetic.SCALES), default='small', help='合成数据规模')
+    parser.add_argument('--processes', type=int, default=4, help='worker 进程数')
+    parser.add_argument('--threads', default='1,4,16', help='逗号分隔的每个进程的写入线程数，逐个测试')
+    parser.add_argument('--batch-ms', type=float, default=writer.DEFAULT_BATCH_WINDOW * 1000,
+                        help='写入进程的组提交时间窗口（毫秒）')
+    parser.add_argument('--duration', type=float, default=5.0, help='每轮测量时间（秒）')
+    parser.add_argument('--output', default=None, help='结果 JSON 文件路径')
+    args = parser.parse_args()
+
+    # 写入进程继承环境变量，不输出每次写入的 INFO 日志
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    thread_counts = [int(value) for value in args.threads.split(',')]
+    scale = synthetic.SCALES[args.scale]
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        address = os.path.join(tmpdir, 'writer.sock')
+        seconds = synthetic.generate(db_path, *scale)
+        print(f"[{args.scale}] generated {scale.users:,} users, {scale.words:,} words in {seconds:.1f}s")
+
+        for threads in thread_counts:
+            for mode in ('direct', 'writer'):
+                process = writer.spawn(db_path, address, args.batch_ms / 1000) if mode == 'writer' else None
+                try:
+                    summary = run_mode(db_path, address if process else None, scale,
+                                       args.processes, threads, args.duration)
+                finally:
+                    if process is not None:
+                        process.terminate()
+                        process.wait()
+                clients = args.processes * threads
+                results.append({'mode': mode, 'processes': args.processes, 'threads': threads, **summary})
+                print(f"  {mode:<7} {clients:>4} writers {summary['writes_per_second']:>9} writes/s"
+                      f"  p50 {summary.get('p50_ms', '-'):>8} ms  p99 {summary.get('p99_ms', '-'):>8} ms"
+                      f"  errors {summary['errors']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'scale': args.scale, 'processes': args.processes, 'batch_ms': args.batch_ms,
+                'duration': args.duration, 'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
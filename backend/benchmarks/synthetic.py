@@ -0,0 +1,161 @@
+"""
+基准测试用的合成数据
+
+generate 先通过 Database 建表并执行全部迁移，再用 executemany 在单个事务中批量
+写入用户、单词、学习记录、复习进度和打卡记录。写入学习记录时暂时去掉其上的
+INSERT 触发器，写完后按迁移中的回填逻辑一次性重算 user_word_state 和
+user_daily_stats，汇总表与逐条经过触发器写入的结果一致。
+
+    python benchmarks/synthetic.py bench.db --users 200 --words 20000 --records-per-user 500
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, TIMESTAMP_FORMAT  # noqa: E402
+import migrations  # noqa: E402
+
+Scale = namedtuple('Scale', ['users', 'words', 'records_per_user'])
+
+# 预设的数据规模
+SCALES = {
+    'small': Scale(users=20, words=2_000, records_per_user=100),
+    'medium': Scale(users=200, words=20_000, records_per_user=500),
+    'large': Scale(users=1_000, words=100_000, records_per_user=2_000),
+}
+
+PASSWORD = 'password'
+POS = ('n.', 'v.', 'adj.', 'adv.', 'prep.')
+# 最近多少天内的学习记录和打卡
+HISTORY_DAYS = 60
+CHECKIN_DAYS = 30
+
+
+def username(index):
+    return f'user{index}'
+
+
+def _learning_records(rng, user_id, words, count, now):
+    """一个用户按时间顺序的学习记录，集中在一部分常学的单词上"""
+    working_set = rng.sample(range(1, words + 1), min(words, max(10, count // 4)))
+    t = now - timedelta(days=HISTORY_DAYS)
+    step = HISTORY_DAYS * 86400 / max(count, 1)
+    for _ in range(count):
+        t += timedelta(seconds=rng.uniform(0, 2 * step))
+        quality = rng.randint(0, 5)
+        yield (user_id, rng.choice(working_set), quality >= 3, t.date(), t.strftime(TIMESTAMP_FORMAT), quality)
+
+
+def generate(db_path, users, words, records_per_user, seed=42):
+    """
+    生成合成数据库
+
+    :param db_path: 数据库文件路径，文件不应已存在
+    :param users: 用户数量，用户名为 user1..userN，密码均为 PASSWORD
+    :param words: 单词数量
+    :param records_per_user: 每个用户的学习记录数量
+    :param seed: 随机种子，相同参数生成相同的数据
+    :return: 生成耗时（秒）
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    db = Database(db_path)
+    db.bulk_insert_words(
+        ((f'word{i}', POS[i % len(POS)], f'释义{i}') for i in range(1, words + 1)), chunk_size=50_000
+    )
+    db.close()
+
+    now = datetime.now().replace(microsecond=0)
+    today = now.date()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('BEGIN')
+        triggers = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'learning_records' "
+            "AND sql LIKE '%AFTER INSERT%'"
+        ).fetchall()
+        for name, _ in triggers:
+            conn.execute(f'DROP TRIGGER {name}')
+        conn.executemany(
+            'INSERT INTO users (username, password) VALUES (?, ?)',
+            ((username(i), PASSWORD) for i in range(1, users + 1))
+        )
+        for user_id in range(1, users + 1):
+            records = list(_learning_records(rng, user_id, words, records_per_user, now))
+            conn.executemany(
+                'INSERT INTO learning_records (user_id, word_id, is_correct, date, created_at, quality) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                records
+            )
+            conn.execute(
+                'UPDATE users SET total_score = ? WHERE id = ?',
+                (sum(record[5] * 2 for record in records), user_id)
+            )
+            # 学过的单词都有复习进度，到期日分布在前后几周
+            studied = sorted({record[1] for record in records})
+            conn.executemany(
+                'INSERT INTO word_learning_progress (user_id, word_id, next_review_date, review_interval, ease_factor) '
+                'VALUES (?, ?, ?, ?, ?)',
+                ((user_id, word_id, (today + timedelta(days=rng.randint(-14, 30))).isoformat(),
+                  rng.choice((1, 6, 15, 38)), round(rng.uniform(1.3, 2.8), 2))
+                 for word_id in studied)
+            )
+            # 最近的打卡，偶尔中断
+            streak = 0
+            checkins = []
+            for offset in range(CHECKIN_DAYS, 0, -1):
+                if rng.random() < 0.2:
+                    streak = 0
+                    continue
+                streak += 1
+                checkins.append((user_id, (today - timedelta(days=offset)).isoformat(), streak))
+            conn.executemany(
+                'INSERT INTO checkin_records (user_id, checkin_date, streak_days) VALUES (?, ?, ?)',
+                checkins
+            )
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO user_word_state (user_id, word_id, net_score, answer_count)
+            SELECT user_id, word_id, SUM(CASE WHEN is_correct = 1 THEN 1 ELSE -1 END), COUNT(*)
+            FROM learning_records
+            GROUP BY user_id, word_id
+        ''')
+        migrations.backfill_daily_stats(cursor)
+        migrations.backfill_checkin_state(cursor)
+        for _, sql in triggers:
+            conn.execute(sql)
+        conn.commit()
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试用的合成数据库')
+    parser.add_argument('path', help='输出的数据库文件路径')
+    parser.add_argument('--scale', choices=sorted(SCALES), default=None, help='使用预设规模')
+    parser.add_argument('--users', type=int, default=200, help='用户数量')
+    parser.add_argument('--words', type=int, default=20_000, help='单词数量')
+    parser.add_argument('--records-per-user', type=int, default=500, help='每个用户的学习记录数量')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        parser.error(f'{args.path} 已存在')
+    scale = SCALES[args.scale] if args.scale else Scale(args.users, args.words, args.records_per_user)
+    seconds = generate(args.path, *scale, seed=args.seed)
+    print(f"generated {scale.users:,} users, {scale.words:,} words, "
+          f"{scale.users * scale.records_per_user:,} learning records in {seconds:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+进程内缓存
+
+TTLCache 是带容量上限和过期时间的 LRU 缓存，线程安全，用于缓存 JWT 解码结果、
+已验证的用户等读多写少的数据；UserCache 按用户分组缓存统计结果，按估算的
+内存占用淘汰，由写入事件显式失效。多进程部署时每个进程各有一份：TTLCache 的
+过期时间限定了其他进程修改数据后本进程读到旧值的最长时间；UserCache 可以在每次
+命中前读取该用户在数据库中的版本号，其他进程的写入也会立即生效。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """容量有限、条目带过期时间的 LRU 缓存"""
+
+    def __init__(self, maxsize=1024, ttl=60, timer=time.monotonic):
+        """
+        :param maxsize: 最多缓存的条目数，超出时淘汰最久未使用的条目
+        :param ttl: 默认过期时间（秒）
+        :param timer: 单调时钟，便于替换
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """获取未过期的缓存值，并标记为最近使用"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """
+        写入缓存
+
+        :param ttl: 该条目的过期时间（秒），默认使用缓存的 ttl；不大于 0 时不缓存
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self.timer() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """删除一个条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """返回命中/未命中次数和当前条目数"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+
+class UserCache:
+    """
+    按用户分组的 LRU 缓存，按估算的内存占用淘汰
+
+    每个用户一个条目，条目内按 key 保存多个计算结果（如学习统计、趋势）。
+    用户的数据发生写入时调用 invalidate 清空该用户的全部结果；每个条目带有
+    代数，计算期间发生失效时计算结果不会被写回，避免缓存旧数据。
+
+    设置 version_source 时，每个结果记录计算前读取的用户数据版本号，命中前再读取
+    一次，版本号变化（包括其他进程的写入）时视为未命中并重新计算。
+    """
+
+    # 每个用户条目本身的估算开销（字节）
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=300, timer=time.monotonic, version_source=None):
+        """
+        :param max_bytes: 缓存结果的估算总大小上限
+        :param ttl: 结果的过期时间（秒）
+        :param timer: 单调时钟，便于替换
+        :param version_source: version_source(user_id) 返回该用户数据的当前版本号，如
+                               Database.get_user_data_version；为 None 时只依靠 invalidate 和 ttl
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timer = timer
+        self.version_source = version_source
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._bytes = 0
+        # user_id -> {'generation': int, 'values': {key: (value, size, expires_at, data_version)}}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size(value):
+        """按 JSON 序列化后的长度估算结果占用的内存"""
+        return len(json.dumps(value, ensure_ascii=False, default=str)) * 2
+
+    def _entry_size(self, entry):
+        return self.ENTRY_OVERHEAD + sum(cached[1] for cached in entry['values'].values())
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(entry)
+            self.evictions += 1
+
+    def get_or_compute(self, user_id, key, compute):
+        """
+        获取用户的缓存结果，未命中时调用 compute() 计算并写入
+
+        :param user_id: 用户ID
+        :param key: 结果名称，可以是包含参数的元组
+        :param compute: 无参数的计算函数，抛出异常时不缓存
+        """
+        # 先读版本号再计算，计算期间的写入会让写回的结果在下次读取时失效
+        data_version = self.version_source(user_id) if self.version_source is not None else None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                cached = entry['values'].get(key)
+                if cached is not None and cached[2] > self.timer() and cached[3] == data_version:
+                    self.hits += 1
+                    return cached[0]
+            else:
+                # 计算开始前建立条目，计算期间的 invalidate 通过代数通知本次计算
+                entry = {'generation': 0, 'values': {}}
+                self._entries[user_id] = entry
+                self._bytes += self.ENTRY_OVERHEAD
+                self._evict()
+            generation = entry['generation']
+            self.misses += 1
+
+        value = compute()
+        size = self.estimate_size(value)
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry['generation'] != generation:
+                # 计算期间条目已被淘汰（无法确认是否失效）或该用户的数据已被修改
+                return value
+            old = entry['values'].get(key)
+            if old is not None:
+                self._bytes -= old[1]
+            entry['values'][key] = (value, size, self.timer() + self.ttl, data_version)
+            self._bytes += size
+            self._entries.move_to_end(user_id)
+            self._evict()
+        return value
+
+    def invalidate(self, user_id):
+        """清空用户的全部缓存结果，正在进行的计算也不会写回；没有条目的用户无需处理"""
+        with self._lock:
+            self.invalidations += 1
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            self._bytes -= sum(cached[1] for cached in entry['values'].values())
+            entry['generation'] += 1
+            entry['values'] = {}
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry['generation'] += 1
+                entry['values'] = {}
+            self._bytes = self.ENTRY_OVERHEAD * len(self._entries)
+
+    def stats(self):
+        """返回命中/未命中、淘汰、失效次数和当前占用"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'users': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+        }
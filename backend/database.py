@@ -1,26 +1,353 @@
 import sqlite3
+import os
+import threading
+import weakref
 from datetime import datetime, date, timedelta
 from contextlib import contextmanager
 import logging
+import functools
 import hashlib
+import itertools
+import time
+from urllib.request import pathname2url
+import migrations
+import scheduler
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# 连接建立时执行一次的 PRAGMA 默认配置
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',       # 读写互不阻塞
+    'synchronous': 'NORMAL',     # WAL 模式下安全且只在检查点时 fsync
+    'cache_size': -20000,        # 负值单位为 KiB，约 20MB 页缓存
+    'mmap_size': 268435456,      # 256MB 内存映射读取
+    'temp_store': 'MEMORY',      # 排序、临时表放在内存中
+    'busy_timeout': 5000,        # 遇到写锁时最多等待 5 秒
+}
+
+PRAGMA_ENV_PREFIX = 'SQLITE_PRAGMA_'
+
+# 只读连接不执行的 PRAGMA（需要写数据库文件）
+READ_WRITE_PRAGMAS = ('journal_mode',)
+
+# 开启 SQL 统计时，每执行这么多条虚拟机指令调用一次进度回调
+PROGRESS_INTERVAL = 1000
+
+# 时间戳列（learning_records.created_at、words.updated_at）统一使用本地时间的该格式
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 可选的存储后端，见 create_database
+STORAGE_BACKENDS = ('sqlite', 'sqlalchemy')
+
+# words 表中允许按需返回的字段，顺序与表结构一致
+WORD_FIELDS = ('id', 'word', 'part_of_speech', 'meaning', 'frequency', 'correct_times', 'wrong_times', 'updated_at')
+# 未指定字段时返回的字段，与旧版 GET /api/words 一致；updated_at 只在导出或显式指定时返回
+DEFAULT_WORD_FIELDS = WORD_FIELDS[:-1]
+
+
+def pragmas_from_env(environ=None):
+    """
+    从环境变量读取 PRAGMA 覆盖配置
+
+    例如 SQLITE_PRAGMA_CACHE_SIZE=-64000 会覆盖 cache_size。
+
+    :param environ: 环境变量字典，默认为 os.environ
+    :return: PRAGMA 名称到值的字典
+    """
+    environ = os.environ if environ is None else environ
+    return {
+        key[len(PRAGMA_ENV_PREFIX):].lower(): value
+        for key, value in environ.items()
+        if key.startswith(PRAGMA_ENV_PREFIX)
+    }
+
+
+class WriterUnavailable(ConnectionError):
+    """连不上写入进程，写操作没有发出"""
+
+
+def queued_write(method):
+    """
+    标记可以交给写入者组提交的写操作（见 writer.py）
+
+    Database 设置了 writer 时，调用转发给 writer.submit 并等待确认；写入者自己
+    使用的 Database 没有 writer，直接执行。连不上写入进程时改为直接执行。
+    被标记的方法必须只通过 transaction() 写入，由写入者的外层事务统一提交。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.writer is None:
+            return method(self, *args, **kwargs)
+        try:
+            return self.writer.submit(method.__name__, args, kwargs)
+        except WriterUnavailable as e:
+            logger.warning(f"{e}; writing {method.__name__} directly")
+            return method(self, *args, **kwargs)
+
+    wrapper.queued_write = True
+    return wrapper
+
+
+def snapshot_read(method):
+    """
+    标记在只读快照上执行的分析查询
+
+    调用在 read_transaction() 中执行：不在事务中时使用当前线程的只读连接和一个
+    显式的读事务，整个方法读取同一个 WAL 快照；已在事务中时加入该事务。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.read_transaction():
+            return method(self, *args, **kwargs)
+
+    wrapper.snapshot_read = True
+    return wrapper
+
+
+class _PooledConnection(sqlite3.Connection):
+    """可被弱引用的连接，线程结束后连接随线程局部变量一起释放"""
+
+
+class QueryStats:
+    """
+    一个线程上累计的 SQL 统计
+
+    statements 由 trace 回调计数，包含触发器中执行的语句；vm_steps 由进度回调
+    按 PROGRESS_INTERVAL 条虚拟机指令计数；seconds 是最外层 get_connection
+    上下文内的耗时，包括语句执行和逐行读取结果。
+    """
+
+    __slots__ = ('statements', 'vm_steps', 'seconds')
+
+    def __init__(self):
+        self.statements = 0
+        self.vm_steps = 0
+        self.seconds = 0.0
+
+    def on_statement(self, sql):
+        self.statements += 1
+
+    def on_progress(self):
+        self.vm_steps += PROGRESS_INTERVAL
+        return 0
+
+    def snapshot(self):
+        """返回 (statements, vm_steps, seconds)，两次快照相减即为期间的增量"""
+        return self.statements, self.vm_steps, self.seconds
+
+
 class Database:
-    def __init__(self, db_path='vocabulary.db'):
-        """初始化数据库连接并创建必要的表"""
+    def __init__(self, db_path='vocabulary.db', pragmas=None, instrument=False, writer=None, snapshot_reads=True):
+        """
+        初始化数据库连接池并创建必要的表
+
+        :param db_path: SQLite 数据库文件路径
+        :param pragmas: 覆盖 DEFAULT_PRAGMAS 的连接配置
+        :param instrument: 是否在连接上安装 trace/progress 回调，按线程统计 SQL，见 query_stats
+        :param writer: 写入者（writer.WriteQueue 或 writer.WriterClient），设置后
+                       @queued_write 标记的写操作交给它组提交
+        :param snapshot_reads: read_transaction() 和 @snapshot_read 标记的分析查询是否使用
+                               单独的只读连接（mode=ro、query_only），内存数据库不使用
+        """
         self.db_path = db_path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.instrument = instrument
+        self.writer = writer
+        self.snapshot_reads = snapshot_reads and db_path != ':memory:'
+        # 累计打开的连接数，包括 fork 之前父进程打开的
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._inherited = []
         self._create_tables()
+        # SQLite 3.34 以下没有 words_fts，此时 search_words 使用 LIKE 查询
+        with self.get_connection() as conn:
+            self.words_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_fts'"
+            ).fetchone() is not None
+
+    def _connect(self, readonly=False):
+        """
+        创建一个新连接并应用 PRAGMA 配置
+
+        :param readonly: 以 mode=ro 打开并设置 query_only，用于 read_transaction
+        """
+        # 连接只会被创建它的线程使用，关闭时可能由其他线程执行
+        if readonly:
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=_PooledConnection)
+            pragmas = {name: value for name, value in self.pragmas.items() if name not in READ_WRITE_PRAGMAS}
+            pragmas['query_only'] = 1
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=_PooledConnection)
+            pragmas = self.pragmas
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not str(value).lstrip('-').isalnum():
+                raise ValueError(f"Invalid pragma: {name}={value}")
+            conn.execute(f'PRAGMA {name} = {value}')
+        if self.instrument:
+            stats = self.query_stats()
+            conn.set_trace_callback(stats.on_statement)
+            conn.set_progress_handler(stats.on_progress, PROGRESS_INTERVAL)
+        with self._connections_lock:
+            self.connections_opened += 1
+            self._connections.add(conn)
+        logger.debug(f"Opened pooled {'read-only ' if readonly else ''}connection to {self.db_path} "
+                     f"(pid {os.getpid()}, thread {threading.get_ident()})")
+        return conn
+
+    def _thread_local(self):
+        """当前线程的连接状态，fork 之后先丢弃父进程的连接"""
+        if os.getpid() != self._pid:
+            self._after_fork()
+        return self._local
+
+    def _after_fork(self):
+        """fork 之后不能复用也不能关闭父进程的连接，只保留引用防止被回收"""
+        with self._connections_lock:
+            self._inherited = list(self._connections)
+            self._pid = os.getpid()
+            self._connections = weakref.WeakSet()
+            self._local = threading.local()
+
+    def _acquire(self):
+        """获取当前线程的池化连接，必要时创建"""
+        local = self._thread_local()
+        # read_transaction 期间，块内的查询都使用只读连接
+        snapshot = getattr(local, 'snapshot', None)
+        if snapshot is not None:
+            return snapshot
+
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = self._connect()
+        return conn
+
+    def _release(self, conn):
+        """最外层 get_connection 退出时调用；连接一直属于当前线程，不需要归还"""
+
+    def _in_transaction(self):
+        """当前线程的写连接是否处于事务中"""
+        conn = getattr(self._thread_local(), 'conn', None)
+        return conn is not None and conn.in_transaction
+
+    def _readonly_connection(self):
+        """当前线程的池化只读连接，无法以只读方式打开时返回 None"""
+        conn = getattr(self._local, 'readonly_conn', None)
+        if conn is None:
+            try:
+                conn = self._local.readonly_conn = self._connect(readonly=True)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Cannot open read-only connection to {self.db_path}, "
+                               f"using the read-write connection: {e}")
+                self.snapshot_reads = False
+        return conn
+
+    def _release_readonly(self, conn):
+        """read_transaction 结束时调用；只读连接同样属于当前线程"""
 
     @contextmanager
     def get_connection(self):
-        """创建数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_path)
+        """
+        获取当前线程池化连接的上下文管理器
+
+        同一线程内复用同一个已配置好的连接，嵌套调用共享该连接。
+        最外层退出时回滚未提交的事务，保证连接归还时处于干净状态。
+        """
+        conn = self._acquire()
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        start = time.perf_counter() if depth == 0 and self.instrument else None
+        local.depth = depth + 1
         try:
             yield conn
         finally:
-            conn.close()
+            local.depth -= 1
+            if local.depth == 0:
+                if conn.in_transaction:
+                    conn.rollback()
+                if conn is not getattr(local, 'snapshot', None):
+                    self._release(conn)
+            if start is not None:
+                self.query_stats().seconds += time.perf_counter() - start
+
+    def query_stats(self):
+        """
+        当前线程的 SQL 统计
+
+        只有 instrument=True 时才会更新。请求开始和结束时各取一次 snapshot，
+        差值就是该请求执行的语句数、虚拟机指令数和数据库耗时。
+        """
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            stats = self._local.stats = QueryStats()
+        return stats
+
+    @contextmanager
+    def transaction(self):
+        """
+        写事务上下文管理器
+
+        以 BEGIN IMMEDIATE 开启事务，块内语句全部成功后一次提交，出错时整体回滚。
+        嵌套使用时加入外层事务，由最外层负责提交。
+        """
+        with self.get_connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def read_transaction(self):
+        """
+        只读事务上下文管理器
+
+        块内（包括嵌套调用的其他方法）的查询共用当前线程的只读连接（mode=ro、
+        query_only），在一个显式的读事务中读取同一个 WAL 快照；只读连接与写连接
+        分开，分析查询不占用写连接也不阻塞写入。已处于事务中（包括写事务）时直接
+        加入，能读到本事务尚未提交的写入。
+        """
+        local = self._thread_local()
+        readonly = None
+        if self.snapshot_reads and getattr(local, 'snapshot', None) is None and not self._in_transaction():
+            readonly = self._readonly_connection()
+        if readonly is not None:
+            local.snapshot = readonly
+        try:
+            with self.get_connection() as conn:
+                if conn.in_transaction:
+                    yield conn
+                    return
+                conn.execute('BEGIN')
+                try:
+                    yield conn
+                finally:
+                    if conn.in_transaction:
+                        conn.rollback()
+        finally:
+            if readonly is not None:
+                local.snapshot = None
+                self._release_readonly(readonly)
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        with self._connections_lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+            self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing pooled connection: {e}")
 
     def _create_tables(self):
         """创建所需的数据库表"""
@@ -97,6 +424,9 @@ class Database:
 
             conn.commit()
 
+            # 索引等后续结构变更由版本化迁移维护
+            migrations.migrate(conn)
+
     def register_user(self, username, password):
         """注册新用户"""
         try:
@@ -126,29 +456,81 @@ class Database:
             return None
 
     def add_word(self, word, part_of_speech, meaning):
-        """添加新单词"""
+        """
+        添加新单词
+
+        :return: 新单词的ID，单词已存在或出错时返回 None
+        """
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                # 检查单词是否已存在
-                cursor.execute('SELECT * FROM words WHERE word = ?', (word,))
-                existing_word = cursor.fetchone()
-                
-                if existing_word:
-                    logger.warning(f"Word already exists: {word}")
-                    return False
-                
-                # 插入新单词
-                cursor.execute(
-                    'INSERT INTO words (word, part_of_speech, meaning, frequency, correct_times, wrong_times) VALUES (?, ?, ?, 0, 0, 0)',
-                    (word, part_of_speech, meaning)
-                )
+                # 插入新单词，由 words(word) 唯一索引去重
+                cursor.execute('''
+                    INSERT INTO words (word, part_of_speech, meaning, frequency, correct_times, wrong_times, updated_at)
+                    VALUES (?, ?, ?, 0, 0, 0, ?)
+                    ON CONFLICT(word) DO NOTHING
+                ''', (word, part_of_speech, meaning, datetime.now().strftime(TIMESTAMP_FORMAT)))
                 conn.commit()
+
+                if cursor.rowcount == 0:
+                    logger.warning(f"Word already exists: {word}")
+                    return None
+
                 logger.info(f"Added new word: {word}")
-                return True
+                return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"Error adding word: {e}")
-            return False
+            return None
+
+    def bulk_insert_words(self, rows, chunk_size=10000, update_existing=False):
+        """
+        批量导入单词
+
+        rows 可以是任意可迭代对象（例如逐行读取文件的生成器），按 chunk_size 分块，
+        每块先写入临时表，再用一条 INSERT ... SELECT 写入 words，每块一个事务；单词
+        重复时由 words(word) 唯一索引去重。整块一条语句可以让 words_fts 在触发器中
+        积累的索引数据在块结束时一次写出，逐行插入时每行都会单独写出一个索引段。
+
+        :param rows: (word, part_of_speech, meaning) 元组的可迭代对象
+        :param chunk_size: 每个事务写入的行数
+        :param update_existing: 单词已存在时是否用新的词性和释义覆盖
+        :return: (read, inserted) 读取的行数和新增（或更新）的行数
+        """
+        if update_existing:
+            conflict = '''DO UPDATE SET
+                part_of_speech = excluded.part_of_speech,
+                meaning = excluded.meaning
+            WHERE part_of_speech IS NOT excluded.part_of_speech OR meaning != excluded.meaning'''
+        else:
+            conflict = 'DO NOTHING'
+        # WHERE true 避免 ON CONFLICT 被解析为 SELECT 的联接约束
+        sql = f'''
+            INSERT INTO words (word, part_of_speech, meaning, frequency, correct_times, wrong_times, updated_at)
+            SELECT word, part_of_speech, meaning, 0, 0, 0, ?
+            FROM temp.word_import
+            WHERE true
+            ORDER BY rowid
+            ON CONFLICT(word) {conflict}
+        '''
+
+        read = inserted = 0
+        rows = iter(rows)
+        while True:
+            updated_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('CREATE TEMP TABLE IF NOT EXISTS word_import (word, part_of_speech, meaning)')
+                cursor.executemany('INSERT INTO temp.word_import VALUES (?, ?, ?)', chunk)
+                cursor.execute(sql, (updated_at,))
+                inserted += cursor.rowcount
+                cursor.execute('DELETE FROM temp.word_import')
+            read += len(chunk)
+
+        logger.info(f"Bulk imported words: read {read}, inserted {inserted}")
+        return read, inserted
 
     def get_all_words(self):
         """获取所有单词"""
@@ -157,6 +539,150 @@ class Database:
             cursor.execute('SELECT * FROM words')
             return cursor.fetchall()
 
+    def iter_words(self, after_id=0, limit=None, fields=None, part_of_speech=None,
+                   updated_since=None, batch_size=500):
+        """
+        按 id 顺序逐批读取单词（键集分页）
+
+        :param after_id: 只返回 id 大于该值的单词
+        :param limit: 最多返回的单词数量，None 表示不限制
+        :param fields: 需要返回的字段，必须属于 WORD_FIELDS，默认为 DEFAULT_WORD_FIELDS
+        :param part_of_speech: 按词性筛选
+        :param updated_since: 只返回该时间（TIMESTAMP_FORMAT 字符串）之后新增或修改的单词
+        :param batch_size: 每次从游标读取的行数
+        :return: 生成器，逐个产出单词字典
+        """
+        fields = list(fields) if fields else list(DEFAULT_WORD_FIELDS)
+        invalid = [field for field in fields if field not in WORD_FIELDS]
+        if invalid:
+            raise ValueError(f"Invalid word fields: {', '.join(invalid)}")
+
+        conditions = ['id > ?']
+        params = [after_id or 0]
+        if part_of_speech is not None:
+            conditions.append('part_of_speech = ?')
+            params.append(part_of_speech)
+        if updated_since is not None:
+            conditions.append('updated_at > ?')
+            params.append(updated_since)
+        sql = f"SELECT {', '.join(fields)} FROM words WHERE {' AND '.join(conditions)} ORDER BY id"
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(fields, row))
+
+    def count_words(self, part_of_speech=None):
+        """
+        获取单词数量，读取由触发器维护的 word_counts 计数器而不是扫描 words 表
+
+        :param part_of_speech: 按词性统计，None 表示全部单词
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if part_of_speech is None:
+                cursor.execute('SELECT COALESCE(SUM(word_count), 0) FROM word_counts')
+            else:
+                cursor.execute(
+                    'SELECT word_count FROM word_counts WHERE part_of_speech = ?',
+                    (part_of_speech,)
+                )
+            result = cursor.fetchone()
+            return result[0] if result else 0
+
+    def search_words(self, query, limit=20, offset=0):
+        """
+        按单词和释义搜索，结果按相关度排序
+
+        不少于 3 个字符的查询通过 words_fts 三元组索引做子串匹配，依次按单词完全
+        匹配、单词前缀匹配、其他匹配排序，同一档内按 bm25（单词列权重更高）排序。
+        1-2 个字符的查询无法使用三元组索引（没有 words_fts 时所有查询都是如此）：先按
+        words(word) 索引返回单词前缀匹配（区分大小写，按字母序），再按 id 顺序扫描单词和
+        释义中的子串匹配，凑够一页即停止。
+
+        :param query: 查询字符串，不区分 ASCII 大小写
+        :param limit: 每页数量
+        :param offset: 跳过的结果数
+        :return: (items, has_more)，items 为 {id, word, part_of_speech, meaning} 字典列表
+        """
+        query = query.strip()
+        if not query:
+            return [], False
+        # LIKE 的转义字符为 !
+        escaped = query.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        params = {'query': query, 'limit': limit + 1, 'offset': offset}
+        if len(query) >= 3 and self.words_fts:
+            # 整个查询作为一个短语，三元组分词后即为子串匹配
+            params['match'] = '"' + query.replace('"', '""') + '"'
+            params['prefix'] = escaped + '%'
+            sql = '''
+                SELECT w.id, w.word, w.part_of_speech, w.meaning
+                FROM words_fts f
+                JOIN words w ON w.id = f.rowid
+                WHERE words_fts MATCH :match
+                ORDER BY CASE WHEN w.word = :query COLLATE NOCASE THEN 0
+                              WHEN w.word LIKE :prefix ESCAPE '!' THEN 1
+                              ELSE 2 END,
+                         f.rank, w.id
+                LIMIT :limit OFFSET :offset
+            '''
+        else:
+            # 前缀匹配转换为索引上的范围查询 [query, upper)
+            params['upper'] = query[:-1] + chr(min(ord(query[-1]) + 1, 0x10FFFF))
+            params['substring'] = '%' + escaped + '%'
+            sql = '''
+                SELECT * FROM (
+                    SELECT id, word, part_of_speech, meaning FROM words
+                    WHERE word >= :query AND word < :upper
+                    ORDER BY word
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT id, word, part_of_speech, meaning FROM words
+                    WHERE (word LIKE :substring ESCAPE '!' OR meaning LIKE :substring ESCAPE '!')
+                      AND NOT (word >= :query AND word < :upper)
+                    ORDER BY id
+                )
+                LIMIT :limit OFFSET :offset
+            '''
+
+        fields = ('id', 'word', 'part_of_speech', 'meaning')
+        with self.get_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(zip(fields, row)) for row in rows[:limit]], len(rows) > limit
+
+    def get_data_version(self, name):
+        """
+        获取表内容的版本号，由触发器在内容变化时递增
+
+        :param name: data_versions 中登记的表名，如 'words'
+        :return: 版本号，未登记时返回 0
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version FROM data_versions WHERE name = ?', (name,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+
+    def get_user_data_version(self, user_id):
+        """
+        获取用户学习数据的版本号，学习记录或打卡记录有增删时由触发器递增
+
+        :param user_id: 用户ID
+        :return: 版本号，没有任何记录的用户返回 0
+        """
+        with self.get_connection() as conn:
+            result = conn.execute('SELECT version FROM user_data_versions WHERE user_id = ?', (user_id,)).fetchone()
+            return result[0] if result else 0
+
     def get_wrong_words(self, user_id):
         """获取用户的错词本"""
         with self.get_connection() as conn:
@@ -168,55 +694,146 @@ class Database:
             ''', (user_id,))
             return cursor.fetchall()
 
-    def update_word_stats(self, word_id, is_correct):
-        """更新单词的统计信息，支持多种学习场景"""
+    def get_user_wrong_words(self, user_id, limit=20):
+        """
+        获取用户答过的单词中错误次数多于正确次数的单词
+
+        :param user_id: 用户ID
+        :param limit: 最多返回的单词数量
+        :return: 单词字典列表，按错误次数降序
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            try:
-                # 增加总频率
-                cursor.execute(
-                    'UPDATE words SET frequency = frequency + 1 WHERE id = ?',
-                    (word_id,)
-                )
-                
-                # 根据正确性更新统计
-                if is_correct:
-                    cursor.execute(
-                        'UPDATE words SET correct_times = correct_times + 1 WHERE id = ?',
-                        (word_id,)
-                    )
-                else:
-                    cursor.execute(
-                        'UPDATE words SET wrong_times = wrong_times + 1 WHERE id = ?',
-                        (word_id,)
-                    )
-                
-                conn.commit()
-                logger.info(f"Updated word stats for word_id {word_id}: is_correct = {is_correct}")
-            except sqlite3.Error as e:
-                conn.rollback()
-                logger.error(f"Error updating word stats: {e}")
-                raise
+            cursor.execute('''
+                SELECT w.id, w.word, w.part_of_speech, w.meaning, w.correct_times, w.wrong_times, w.frequency
+                FROM user_word_state s
+                JOIN words w ON w.id = s.word_id
+                WHERE s.user_id = ? AND w.wrong_times > w.correct_times
+                ORDER BY w.wrong_times DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            fields = ('id', 'word', 'part_of_speech', 'meaning', 'correct_times', 'wrong_times', 'frequency')
+            return [dict(zip(fields, row)) for row in cursor.fetchall()]
 
-    def update_user_score(self, user_id, score_change):
-        """更新用户分数"""
-        # Ensure user_id and score_change are valid
-        if not isinstance(user_id, int):
-            raise ValueError(f"Invalid user_id: {user_id}. Must be an integer.")
-        
-        if not isinstance(score_change, (int, float)):
-            raise ValueError(f"Invalid score_change: {score_change}. Must be a number.")
-        
+    def get_unmastered_words(self, user_id, limit=10):
+        """
+        获取用户答过但尚未掌握（净正确次数不大于 0）的单词
+
+        通过 user_word_state(user_id, net_score) 索引范围扫描，耗时与学习记录数量无关。
+
+        :param user_id: 用户ID
+        :param limit: 最多返回的单词数量
+        :return: 单词字典列表，按净正确次数升序（最薄弱的在前）
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT w.id, w.word, w.part_of_speech, w.meaning, w.correct_times, w.wrong_times
+                FROM user_word_state s
+                JOIN words w ON w.id = s.word_id
+                WHERE s.user_id = ? AND s.net_score <= 0
+                ORDER BY s.net_score
+                LIMIT ?
+            ''', (user_id, limit))
+            fields = ('id', 'word', 'part_of_speech', 'meaning', 'correct_times', 'wrong_times')
+            return [dict(zip(fields, row)) for row in cursor.fetchall()]
+
+    def get_mastered_word_ids(self, user_id, word_ids):
+        """
+        筛选出用户已掌握（净正确次数大于 0）的单词
+
+        :param user_id: 用户ID
+        :param word_ids: 待检查的单词ID
+        :return: 已掌握的单词ID集合
+        """
+        word_ids = list(word_ids)
+        if not word_ids:
+            return set()
+        placeholders = ','.join('?' * len(word_ids))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT word_id FROM user_word_state
+                WHERE user_id = ? AND word_id IN ({placeholders}) AND net_score > 0
+            ''', [user_id, *word_ids])
+            return {row[0] for row in cursor.fetchall()}
+
+    def get_words_by_ids(self, word_ids):
+        """
+        按主键批量获取单词
+
+        :param word_ids: 单词ID列表
+        :return: 单词字典列表，顺序与 word_ids 一致，不存在的ID被忽略
+        """
+        word_ids = list(word_ids)
+        if not word_ids:
+            return []
+        placeholders = ','.join('?' * len(word_ids))
+        fields = ('id', 'word', 'part_of_speech', 'meaning', 'correct_times', 'wrong_times')
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'UPDATE users SET total_score = total_score + ? WHERE id = ?',
-                (int(score_change), user_id)
+                f"SELECT {', '.join(fields)} FROM words WHERE id IN ({placeholders})",
+                word_ids
             )
-            conn.commit()
-            
-            # Optional: Log score change
-            logger.info(f"User {user_id} score updated by {score_change}")
+            rows = {row[0]: dict(zip(fields, row)) for row in cursor.fetchall()}
+        return [rows[word_id] for word_id in word_ids if word_id in rows]
+
+    def _apply_word_stats(self, cursor, word_id, is_correct):
+        """在当前事务中累加单词的答题统计（频率与正确/错误次数一条语句完成）"""
+        self._apply_word_deltas(cursor, [(1, 1 if is_correct else 0, 0 if is_correct else 1, word_id)])
+
+    def _apply_word_deltas(self, cursor, deltas):
+        """
+        在当前事务中批量累加单词的答题统计
+
+        :param deltas: (frequency, correct_times, wrong_times, word_id) 增量列表
+        """
+        cursor.executemany('''
+            UPDATE words SET
+                frequency = frequency + ?,
+                correct_times = correct_times + ?,
+                wrong_times = wrong_times + ?
+            WHERE id = ?
+        ''', deltas)
+
+    @queued_write
+    def update_word_stats(self, word_id, is_correct):
+        """更新单词的统计信息，支持多种学习场景"""
+        try:
+            with self.transaction() as conn:
+                self._apply_word_stats(conn.cursor(), word_id, is_correct)
+            logger.info(f"Updated word stats for word_id {word_id}: is_correct = {is_correct}")
+        except sqlite3.Error as e:
+            logger.error(f"Error updating word stats: {e}")
+            raise
+
+    def _validate_score_change(self, user_id, score_change):
+        """校验分数变更参数"""
+        if not isinstance(user_id, int):
+            raise ValueError(f"Invalid user_id: {user_id}. Must be an integer.")
+
+        if not isinstance(score_change, (int, float)):
+            raise ValueError(f"Invalid score_change: {score_change}. Must be a number.")
+
+    def _apply_user_score(self, cursor, user_id, score_change):
+        """在当前事务中累加用户分数"""
+        cursor.execute(
+            'UPDATE users SET total_score = total_score + ? WHERE id = ?',
+            (int(score_change), user_id)
+        )
+
+    @queued_write
+    def update_user_score(self, user_id, score_change):
+        """更新用户分数"""
+        # Ensure user_id and score_change are valid
+        self._validate_score_change(user_id, score_change)
+
+        with self.transaction() as conn:
+            self._apply_user_score(conn.cursor(), user_id, score_change)
+
+        # Optional: Log score change
+        logger.info(f"User {user_id} score updated by {score_change}")
 
     def get_user_score(self, user_id):
         """获取用户总分"""
@@ -226,15 +843,29 @@ class Database:
             result = cursor.fetchone()
             return result[0] if result else 0
 
+    def _insert_learning_record(self, cursor, user_id, word_id, is_correct, quality=None):
+        """在当前事务中插入一条学习记录"""
+        now = datetime.now()
+        self._insert_learning_records(
+            cursor, [(user_id, word_id, is_correct, now.date(), now.strftime(TIMESTAMP_FORMAT), quality)]
+        )
+
+    def _insert_learning_records(self, cursor, records):
+        """
+        在当前事务中批量插入学习记录
+
+        :param records: (user_id, word_id, is_correct, date, created_at, quality) 列表
+        """
+        cursor.executemany(
+            'INSERT INTO learning_records (user_id, word_id, is_correct, date, created_at, quality) VALUES (?, ?, ?, ?, ?, ?)',
+            records
+        )
+
+    @queued_write
     def add_learning_record(self, user_id, word_id, is_correct):
         """添加学习记录"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO learning_records (user_id, word_id, is_correct, date) VALUES (?, ?, ?, ?)',
-                (user_id, word_id, is_correct, datetime.now().date())
-            )
-            conn.commit()
+        with self.transaction() as conn:
+            self._insert_learning_record(conn.cursor(), user_id, word_id, is_correct)
 
     def get_word_details(self, word_id):
         """获取特定单词的详细信息"""
@@ -292,24 +923,62 @@ class Database:
         :param quality: 回答质量 (0-5)
         :return: (new_interval, new_ease_factor)
         """
-        if quality < 3:
-            # 如果回答质量低于3，重置间隔
-            return 1, max(1.3, ease_factor - 0.2)
+        return scheduler.next_interval(current_interval, ease_factor, quality)
+
+    def _apply_word_progress(self, cursor, user_id, word_id, quality):
+        """
+        在当前事务中按回答质量更新单词学习进度
+
+        :return: (new_interval, new_ease_factor, next_review_date)
+        """
+        # 获取当前进度
+        current_interval, current_ease = self._load_word_progress(cursor, user_id, [word_id]).get(word_id, (1, 2.5))
         
-        # 更新简易度因子
-        new_ease_factor = ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        new_ease_factor = max(1.3, new_ease_factor)  # 确保简易度因子不小于1.3
+        # 计算新的间隔和简易度
+        new_interval, new_ease = self.calculate_next_interval(
+            current_interval, current_ease, quality
+        )
         
-        # 计算新间隔
-        if current_interval == 1:
-            new_interval = 6
-        elif current_interval == 6:
-            new_interval = 1
-        else:
-            new_interval = round(current_interval * new_ease_factor)
+        # 计算下次复习日期
+        next_review = (datetime.now().date() + 
+                     timedelta(days=new_interval))
         
-        return new_interval, new_ease_factor
+        # 更新或插入进度记录
+        self._upsert_word_progress(cursor, [(user_id, word_id, next_review, new_interval, new_ease)])
+
+        return new_interval, new_ease, next_review
+
+    def _load_word_progress(self, cursor, user_id, word_ids):
+        """
+        在当前事务中读取单词的复习进度
 
+        :return: {word_id: (review_interval, ease_factor)}，没有进度的单词不在其中
+        """
+        placeholders = ','.join('?' * len(word_ids))
+        cursor.execute(f'''
+            SELECT word_id, review_interval, ease_factor
+            FROM word_learning_progress
+            WHERE user_id = ? AND word_id IN ({placeholders})
+        ''', [user_id, *word_ids])
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    def _upsert_word_progress(self, cursor, rows):
+        """
+        在当前事务中批量写入复习进度，已有的进度被覆盖
+
+        :param rows: (user_id, word_id, next_review_date, review_interval, ease_factor) 列表
+        """
+        cursor.executemany('''
+            INSERT INTO word_learning_progress
+                (user_id, word_id, next_review_date, review_interval, ease_factor)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, word_id) DO UPDATE SET
+                next_review_date = excluded.next_review_date,
+                review_interval = excluded.review_interval,
+                ease_factor = excluded.ease_factor
+        ''', rows)
+
+    @queued_write
     def update_word_progress(self, user_id, word_id, quality):
         """
         更新单词学习进度
@@ -318,59 +987,191 @@ class Database:
         :param word_id: 单词ID
         :param quality: 回答质量 (0-5)
         """
-        with self.get_connection() as conn:
+        with self.transaction() as conn:
+            self._apply_word_progress(conn.cursor(), user_id, word_id, quality)
+
+    @queued_write
+    def record_answer(self, user_id, word_id, is_correct, score_change, quality=None):
+        """
+        记录一次答题结果
+
+        学习记录、单词统计、用户分数以及（提供 quality 时的）复习进度
+        在同一个事务中写入并只提交一次，要么全部成功要么全部回滚。
+
+        :param user_id: 用户ID
+        :param word_id: 单词ID
+        :param is_correct: 是否回答正确
+        :param score_change: 分数变化
+        :param quality: 回答质量 (0-5)，为 None 时不更新复习进度
+        """
+        self._validate_score_change(user_id, score_change)
+
+        with self.transaction() as conn:
             cursor = conn.cursor()
-            
-            # 获取当前进度
-            cursor.execute('''
-                SELECT review_interval, ease_factor 
-                FROM word_learning_progress 
-                WHERE user_id = ? AND word_id = ?
-            ''', (user_id, word_id))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                current_interval, current_ease = result
-            else:
-                current_interval, current_ease = 1, 2.5
-            
-            # 计算新的间隔和简易度
+            if quality is not None:
+                self._apply_word_progress(cursor, user_id, word_id, quality)
+            self._insert_learning_record(cursor, user_id, word_id, is_correct, quality)
+            self._apply_word_stats(cursor, word_id, is_correct)
+            self._apply_user_score(cursor, user_id, score_change)
+
+        logger.info(f"Recorded answer for user {user_id}, word {word_id}: is_correct = {is_correct}, score_change = {score_change}")
+
+    @queued_write
+    def record_answers(self, user_id, answers):
+        """
+        批量记录答题结果
+
+        学习记录通过 executemany 一次插入；单词计数和用户分数先在内存中按
+        单词/用户聚合，再各执行一组 UPDATE；整批在同一个事务中只提交一次。
+
+        :param user_id: 用户ID
+        :param answers: 按作答顺序排列的字典列表，每项包含 word_id、is_correct、
+                        score_change、quality（可为 None）和 answered_at（本地时间的 datetime，
+                        可为 None 表示当前时间）
+        :return: 本批次的总分数变化
+        """
+        self._validate_score_change(user_id, 0)
+        now = datetime.now()
+
+        records = []
+        word_deltas = {}
+        reviews = []
+        total_score = 0
+        for answer in answers:
+            word_id = answer['word_id']
+            is_correct = bool(answer['is_correct'])
+            answered_at = answer.get('answered_at') or now
+            answered_on = answered_at.date()
+            self._validate_score_change(user_id, answer['score_change'])
+
+            records.append((user_id, word_id, is_correct, answered_on, answered_at.strftime(TIMESTAMP_FORMAT),
+                            answer.get('quality')))
+
+            frequency, correct, wrong = word_deltas.get(word_id, (0, 0, 0))
+            word_deltas[word_id] = (frequency + 1, correct + is_correct, wrong + (not is_correct))
+
+            total_score += int(answer['score_change'])
+
+            if answer.get('quality') is not None:
+                reviews.append((word_id, answer['quality'], answered_on))
+
+        if not records:
+            return 0
+
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            self._insert_learning_records(cursor, records)
+            self._apply_word_deltas(cursor, [(f, c, w, word_id) for word_id, (f, c, w) in word_deltas.items()])
+            if total_score:
+                self._apply_user_score(cursor, user_id, total_score)
+            if reviews:
+                self._apply_word_progress_batch(cursor, user_id, reviews)
+
+        logger.info(f"Recorded {len(records)} answers for user {user_id} across {len(word_deltas)} words, score_change = {total_score}")
+        return total_score
+
+    def _apply_word_progress_batch(self, cursor, user_id, reviews):
+        """
+        在当前事务中按顺序重放一批复习结果并写回最终进度
+
+        :param reviews: (word_id, quality, answered_on) 列表，按作答顺序排列
+        """
+        word_ids = list({word_id for word_id, _, _ in reviews})
+        state = {
+            word_id: (interval, ease, None)
+            for word_id, (interval, ease) in self._load_word_progress(cursor, user_id, word_ids).items()
+        }
+
+        for word_id, quality, answered_on in reviews:
+            current_interval, current_ease, _ = state.get(word_id, (1, 2.5, None))
             new_interval, new_ease = self.calculate_next_interval(
                 current_interval, current_ease, quality
             )
-            
-            # 计算下次复习日期
-            next_review = (datetime.now().date() + 
-                         timedelta(days=new_interval))
-            
-            # 更新或插入进度记录
-            cursor.execute('''
-                INSERT INTO word_learning_progress 
-                    (user_id, word_id, next_review_date, review_interval, ease_factor)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, word_id) DO UPDATE SET
-                    next_review_date = excluded.next_review_date,
-                    review_interval = excluded.review_interval,
-                    ease_factor = excluded.ease_factor
-            ''', (user_id, word_id, next_review, new_interval, new_ease))
-            
-            conn.commit()
+            state[word_id] = (new_interval, new_ease, answered_on + timedelta(days=new_interval))
+
+        self._upsert_word_progress(cursor, [
+            (user_id, word_id, next_review, interval, ease)
+            for word_id, (interval, ease, next_review) in state.items()
+            if next_review is not None
+        ])
+
+    def iter_review_history(self, user_id=None, assumed_quality=None, batch_size=100000):
+        """
+        按 (用户, 单词, 作答时间) 顺序逐批读取用于重放复习进度的学习记录
+
+        使用独立的连接在一个读快照中完成整个扫描，期间可以通过连接池写入。
+
+        :param user_id: 只读取该用户的记录，None 表示全部用户
+        :param assumed_quality: (答对, 答错) 时假定的回答质量，用于没有 quality 的旧记录；
+                                None 表示跳过这些记录
+        :param batch_size: 每批的行数
+        :return: 生成器，逐批产出 (user_id, word_id, quality, day) 元组列表，
+                 day 为作答日期距 1970-01-01 的天数
+        """
+        conditions = ['user_id IS NOT NULL', 'word_id IS NOT NULL', 'date IS NOT NULL']
+        params = []
+        if assumed_quality is None:
+            quality = 'quality'
+            conditions.append('quality IS NOT NULL')
+        else:
+            quality = 'COALESCE(quality, CASE WHEN is_correct = 1 THEN ? ELSE ? END)'
+            params.extend(assumed_quality)
+        if user_id is not None:
+            conditions.append('user_id = ?')
+            params.append(user_id)
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            cursor = conn.execute(f'''
+                SELECT user_id, word_id, {quality}, CAST(julianday(date) - 2440587.5 AS INTEGER)
+                FROM learning_records
+                WHERE {' AND '.join(conditions)}
+                ORDER BY user_id, word_id, created_at, id
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def save_review_progress(self, progress, batch_size=10000):
+        """
+        批量写入复习进度
+
+        :param progress: (user_id, word_id, next_review_date, review_interval, ease_factor) 的可迭代对象
+        :param batch_size: 每个事务写入的行数
+        :return: 写入的行数
+        """
+        progress = iter(progress)
+        written = 0
+        for batch in iter(lambda: list(itertools.islice(progress, batch_size)), []):
+            with self.transaction() as conn:
+                self._upsert_word_progress(conn.cursor(), batch)
+            written += len(batch)
+        return written
 
     def get_words_for_review(self, user_id, limit=10):
         """
         获取需要复习的单词
-        
+
+        先通过 (user_id, next_review_date) 索引按到期先后取已到期的单词，
+        不足 limit 时再从该用户的新单词游标之后按 id 顺序补充从未学过的单词，
+        两部分都只读取实际需要的行，耗时与词库大小无关。
+
         :param user_id: 用户ID
         :param limit: 返回单词数量限制
         :return: 需要复习的单词列表
         """
+        today = datetime.now().date().isoformat()
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
+
             # 获取今天需要复习的单词
             cursor.execute('''
-                SELECT 
+                SELECT
                     w.id,
                     w.word,
                     w.part_of_speech,
@@ -379,22 +1180,18 @@ class Database:
                     w.wrong_times,
                     wlp.next_review_date,
                     wlp.review_interval
-                FROM words w
-                LEFT JOIN word_learning_progress wlp 
-                    ON w.id = wlp.word_id AND wlp.user_id = ?
-                WHERE 
-                    wlp.next_review_date <= date('now')
-                    OR wlp.next_review_date IS NULL
-                ORDER BY 
-                    CASE 
-                        WHEN wlp.next_review_date IS NULL THEN 1
-                        ELSE 0 
-                    END,
-                    wlp.next_review_date ASC
+                FROM word_learning_progress wlp
+                JOIN words w ON w.id = wlp.word_id
+                WHERE wlp.user_id = ? AND wlp.next_review_date <= ?
+                ORDER BY wlp.next_review_date ASC
                 LIMIT ?
-            ''', (user_id, limit))
-            
+            ''', (user_id, today, limit))
             words = cursor.fetchall()
+
+            # 到期单词不足时补充新单词
+            if len(words) < limit:
+                words.extend(self._take_new_words(cursor, user_id, limit - len(words)))
+
             return [{
                 'id': w[0],
                 'word': w[1],
@@ -406,22 +1203,233 @@ class Database:
                 'review_interval': w[7]
             } for w in words]
 
-    def get_learning_details(self, user_id):
-        """获取用户学习详情"""
+    def _take_new_words(self, cursor, user_id, limit):
+        """
+        从用户的新单词游标之后取还没有复习进度的单词
+
+        游标之前的单词都已有进度，扫描过的已学单词会让游标前移，
+        因此每个单词对每个用户最多被跳过一次。
+
+        :return: 与 get_words_for_review 查询列相同的元组列表
+        """
+        cursor.execute(
+            'SELECT last_new_word_id FROM user_review_cursors WHERE user_id = ?',
+            (user_id,)
+        )
+        row = cursor.fetchone()
+        last_new_word_id = row[0] if row else 0
+
+        # 先确定扫描上界，之后新增的单词 id 更大，不会被游标越过
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM words')
+        max_word_id = cursor.fetchone()[0]
+
+        cursor.execute('''
+            SELECT
+                w.id,
+                w.word,
+                w.part_of_speech,
+                w.meaning,
+                w.correct_times,
+                w.wrong_times,
+                NULL,
+                NULL
+            FROM words w
+            WHERE w.id > ? AND w.id <= ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM word_learning_progress wlp
+                    WHERE wlp.user_id = ? AND wlp.word_id = w.id
+                )
+            ORDER BY w.id
+            LIMIT ?
+        ''', (last_new_word_id, max_word_id, user_id, limit))
+        words = cursor.fetchall()
+
+        # 第一个新单词之前的都已学过；没有新单词时上界之前的都已学过
+        new_cursor = words[0][0] - 1 if words else max_word_id
+        if new_cursor > last_new_word_id:
+            # 游标只是优化，写锁竞争时跳过，下次读取时再前移，不让读请求因此失败
+            try:
+                self.advance_review_cursor(user_id, last_new_word_id, new_cursor)
+            except (sqlite3.OperationalError, ConnectionError) as e:
+                logger.warning(f"Skipped advancing review cursor for user {user_id}: {e}")
+
+        return words
+
+    @queued_write
+    def advance_review_cursor(self, user_id, expected, new_cursor):
+        """
+        前移用户的新单词游标
+
+        只在游标仍为 expected 时前移，游标已被并发修改（如进度被删除后触发器回退）时不变。
+
+        :param user_id: 用户ID
+        :param expected: 读取到的游标位置
+        :param new_cursor: 新的游标位置
+        """
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO user_review_cursors (user_id, last_new_word_id)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    last_new_word_id = excluded.last_new_word_id
+                WHERE last_new_word_id = ?
+            ''', (user_id, new_cursor, expected))
+
+    @snapshot_read
+    def get_learning_stats(self, user_id):
+        """
+        获取用户学习统计：学过的单词数、正确率和最近学习日期
+
+        读取 user_word_state 和按天汇总的 user_daily_stats，不扫描学习记录
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM user_word_state WHERE user_id = ?', (user_id,))
+            total_learned = cursor.fetchone()[0]
             cursor.execute('''
                 SELECT 
-                    date(created_at) as learning_date,
-                    COUNT(CASE WHEN is_new = 1 THEN 1 END) as new_words,
-                    COUNT(CASE WHEN is_new = 0 THEN 1 END) as review_words,
-                    AVG(CASE WHEN is_correct = 1 THEN 1.0 ELSE 0.0 END) as correct_rate,
-                    SUM(study_time) as total_study_time,
-                    MAX(streak_days) as streak
-                FROM learning_records
+                    ROUND(SUM(correct) * 1.0 / SUM(answered), 2) as correct_rate,
+                    MAX(day) as last_learning_date
+                FROM user_daily_stats
                 WHERE user_id = ?
-                GROUP BY date(created_at)
-                ORDER BY learning_date DESC
+            ''', (user_id,))
+            stats = cursor.fetchone()
+            return {
+                'totalLearned': total_learned or 0,
+                'correctRate': stats[0] or 0,
+                'lastLearningDate': stats[1]
+            }
+
+    @snapshot_read
+    def get_learning_trend(self, user_id, weeks=4):
+        """
+        获取用户最近几周的学习趋势
+
+        由 user_daily_stats 按周汇总；wordsLearned 为每天学习的不同单词数之和
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH weeks AS (
+                    SELECT 
+                        strftime('%Y-%W', day) AS week,
+                        SUM(distinct_words) AS words_learned,
+                        ROUND(SUM(correct) * 1.0 / SUM(answered), 2) AS weekly_accuracy
+                    FROM user_daily_stats
+                    WHERE user_id = ?
+                    GROUP BY week
+                    ORDER BY week DESC
+                    LIMIT ?
+                )
+                SELECT 
+                    week, 
+                    words_learned, 
+                    weekly_accuracy
+                FROM weeks
+                ORDER BY week
+            ''', (user_id, weeks))
+            return [
+                {
+                    'week': row[0],
+                    'wordsLearned': row[1],
+                    'accuracy': row[2]
+                } for row in cursor.fetchall()
+            ]
+
+    def get_daily_stats(self, user_id, day):
+        """
+        获取用户某一天的答题汇总
+
+        :param user_id: 用户ID
+        :param day: 日期（date 或 'YYYY-MM-DD'）
+        :return: 包含 answered、correct、wrong、distinct_words、new_words、study_seconds 的字典
+        """
+        fields = ('answered', 'correct', 'wrong', 'distinct_words', 'new_words', 'study_seconds')
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(fields)} FROM user_daily_stats WHERE user_id = ? AND day = ?",
+                (user_id, str(day))
+            )
+            row = cursor.fetchone()
+            return dict(zip(fields, row)) if row else dict.fromkeys(fields, 0)
+
+    def rebuild_daily_stats(self, user_id=None):
+        """
+        由学习记录重新计算按天汇总的统计（用于修复或导入历史数据后）
+
+        :param user_id: 只重算该用户，None 表示全部用户
+        """
+        with self.transaction() as conn:
+            migrations.backfill_daily_stats(conn.cursor(), user_id)
+        logger.info(f"Rebuilt daily stats for {'all users' if user_id is None else f'user {user_id}'}")
+
+    @snapshot_read
+    def get_review_forecast(self, user_id=None, days=14, start=None):
+        """
+        预测未来每天到期的复习数量
+
+        单个用户在 (user_id, next_review_date) 索引上按日期分组计数，全站读取由触发器维护的
+        review_due_counts，都不需要把复习进度读入内存。
+
+        :param user_id: 用户ID，None 表示全站
+        :param days: 预测的天数（含起始日）
+        :param start: 起始日期，默认为今天
+        :return: 包含 start、days、overdue（起始日之前已到期未复习的数量）和逐日 forecast 的字典
+        """
+        start = start or date.today()
+        end = start + timedelta(days=days - 1)
+        if user_id is None:
+            source = 'SELECT day AS due_date, due AS count FROM review_due_counts WHERE day <= ?'
+            params = [end]
+        else:
+            source = '''
+                SELECT next_review_date AS due_date, COUNT(*) AS count
+                FROM word_learning_progress
+                WHERE user_id = ? AND next_review_date <= ?
+                GROUP BY next_review_date
+            '''
+            params = [user_id, end]
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT CASE WHEN due_date < ? THEN NULL ELSE due_date END AS day, SUM(count)
+                FROM ({source})
+                GROUP BY day
+            ''', [start, *params])
+            counts = dict(cursor.fetchall())
+
+        overdue = counts.pop(None, 0)
+        forecast = []
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            forecast.append({'date': day, 'due': counts.get(day, 0)})
+        return {
+            'start': start.isoformat(),
+            'days': days,
+            'overdue': overdue,
+            'forecast': forecast
+        }
+
+    @snapshot_read
+    def get_learning_details(self, user_id):
+        """获取用户最近 30 个学习日的详情，读取按天汇总的 user_daily_stats"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 
+                    s.day as learning_date,
+                    s.new_words,
+                    s.distinct_words - s.new_words as review_words,
+                    s.correct * 1.0 / s.answered as correct_rate,
+                    s.study_seconds as total_study_time,
+                    c.streak_days as streak
+                FROM user_daily_stats s
+                LEFT JOIN checkin_records c
+                    ON c.user_id = s.user_id AND c.checkin_date = s.day
+                WHERE s.user_id = ?
+                ORDER BY s.day DESC
                 LIMIT 30
             ''', (user_id,))
             
@@ -432,9 +1440,10 @@ class Database:
                 'reviewWords': row[2],
                 'correctRate': row[3],
                 'studyTime': row[4],
-                'streak': row[5]
+                'streak': row[5] or 0
             } for row in rows]
 
+    @snapshot_read
     def get_time_distribution(self, user_id):
         """获取用户学习时间分布"""
         with self.get_connection() as conn:
@@ -455,20 +1464,21 @@ class Database:
                 'count': row[1]
             } for row in rows]
 
+    @snapshot_read
     def get_mastery_distribution(self, user_id):
-        """获取用户单词掌握度分布"""
+        """获取用户单词掌握度分布，按 user_word_state 中每个单词的净正确次数分级"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
                     CASE 
-                        WHEN correct_times = 0 THEN '未掌握'
-                        WHEN correct_times <= 2 THEN '初步掌握'
-                        WHEN correct_times <= 5 THEN '较好掌握'
+                        WHEN net_score <= 0 THEN '未掌握'
+                        WHEN net_score <= 2 THEN '初步掌握'
+                        WHEN net_score <= 5 THEN '较好掌握'
                         ELSE '完全掌握'
                     END as mastery_level,
                     COUNT(*) as count
-                FROM word_learning_progress
+                FROM user_word_state
                 WHERE user_id = ?
                 GROUP BY mastery_level
                 ORDER BY 
@@ -486,15 +1496,19 @@ class Database:
                 'count': row[1]
             } for row in rows]
 
+    @snapshot_read
     def get_learning_history(self, user_id, limit=50):
-        """获取用户学习历史"""
+        """获取用户学习历史，isNew 表示该记录是用户第一次回答这个单词"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT 
                     w.word,
                     lr.is_correct,
-                    lr.is_new,
+                    NOT EXISTS (
+                        SELECT 1 FROM learning_records earlier
+                        WHERE earlier.user_id = lr.user_id AND earlier.word_id = lr.word_id AND earlier.id < lr.id
+                    ) as is_new,
                     lr.created_at,
                     w.part_of_speech,
                     w.meaning
@@ -515,6 +1529,49 @@ class Database:
                 'meaning': row[5]
             } for row in rows]
 
+    def iter_learning_history(self, user_id, since=None, batch_size=1000):
+        """
+        按时间顺序逐批读取用户的全部学习记录，用于导出
+
+        :param user_id: 用户ID
+        :param since: 只返回该时间（TIMESTAMP_FORMAT 字符串）之后的记录
+        :param batch_size: 每次从游标读取的行数
+        :return: 生成器，逐个产出学习记录字典
+        """
+        fields = ('id', 'word_id', 'word', 'part_of_speech', 'meaning', 'is_correct', 'date', 'created_at')
+        params = [user_id]
+        since_condition = ''
+        if since is not None:
+            since_condition = 'AND lr.created_at > ?'
+            params.append(since)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT
+                    lr.id,
+                    lr.word_id,
+                    w.word,
+                    w.part_of_speech,
+                    w.meaning,
+                    lr.is_correct,
+                    lr.date,
+                    lr.created_at
+                FROM learning_records lr
+                LEFT JOIN words w ON lr.word_id = w.id
+                WHERE lr.user_id = ? {since_condition}
+                ORDER BY lr.created_at, lr.id
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(fields, row))
+                    record['is_correct'] = bool(record['is_correct'])
+                    yield record
+
+    @queued_write
     def schedule_word_review(self, user_id, word_id, days):
         """
         安排单词复习时间
@@ -523,24 +1580,12 @@ class Database:
         :param word_id: 单词ID
         :param days: 几天后复习
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
+        with self.transaction() as conn:
             # 计算下次复习日期
             next_review = (datetime.now().date() + timedelta(days=days))
             
             # 更新或插入进度记录
-            cursor.execute('''
-                INSERT INTO word_learning_progress 
-                    (user_id, word_id, next_review_date, review_interval, ease_factor)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, word_id) DO UPDATE SET
-                    next_review_date = excluded.next_review_date,
-                    review_interval = excluded.review_interval,
-                    ease_factor = excluded.ease_factor
-            ''', (user_id, word_id, next_review, days, 2.5))
-            
-            conn.commit()
+            self._upsert_word_progress(conn.cursor(), [(user_id, word_id, next_review, days, 2.5)])
 
     def delete_word(self, word_id):
         """删除指定ID的单词"""
@@ -561,151 +1606,72 @@ class Database:
             logger.error(f"Error deleting word: {e}")
             return False
 
-    def get_checkin_status(self, user_id, date=None):
-        """
-        获取用户指定日期的打卡状态
-        
-        :param user_id: 用户ID
-        :param date: 指定日期，默认为今天
-        :return: 打卡记录信息，如果没有则返回默认状态
+    def get_checkin_summary(self, user_id, day=None):
         """
-        import logging
-        from datetime import date as dt_date
-        logger = logging.getLogger(__name__)
-
-        try:
-            # 如果没有提供日期，使用今天的日期
-            if date is None:
-                date = dt_date.today()
-            else:
-                date = self._parse_date(date)
-            
-            logger.info(f"Getting checkin status for user {user_id} on {date}")
+        获取用户指定日期的打卡状态和打卡统计
 
-            # 首先检查用户是否存在
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-                user_exists = cursor.fetchone()
-                
-                if not user_exists:
-                    logger.warning(f"User {user_id} not found")
-                    return None
-
-                # 查询今日打卡记录
-                cursor.execute('''
-                    SELECT id, checkin_type, words_learned, correct_count, 
-                           wrong_count, streak_days, created_at, checkin_date
-                    FROM checkin_records 
-                    WHERE user_id = ? AND checkin_date = ?
-                ''', (user_id, date))
-                
-                result = cursor.fetchone()
-                if result:
-                    logger.info(f"Checkin status found for user {user_id} on {date}")
-                    
-                    # 解析日期
-                    created_at = self._parse_date(result[6])
-                    checkin_date = self._parse_date(result[7])
-                    
-                    return {
-                        'id': result[0],
-                        'checkin_type': result[1],
-                        'words_learned': result[2],
-                        'correct_count': result[3],
-                        'wrong_count': result[4],
-                        'streak_days': result[5],
-                        'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None,
-                        'checkin_date': checkin_date.strftime('%Y-%m-%d') if checkin_date else None
-                    }
-                
-                # 如果没有今日打卡记录，返回默认状态
-                logger.info(f"No checkin status found for user {user_id} on {date}")
-                return {
-                    'checkin_type': 'not_checked_in',
-                    'words_learned': 0,
-                    'correct_count': 0,
-                    'wrong_count': 0,
-                    'streak_days': 0,
-                    'created_at': None,
-                    'checkin_date': date.strftime('%Y-%m-%d')
-                }
-        
-        except Exception as e:
-            logger.error(f"Error getting checkin status for user {user_id} on {date}: {str(e)}", exc_info=True)
-            raise
+        统计来自 user_checkin_state 计数器，当天的打卡记录通过 (user_id, checkin_date)
+        唯一索引关联，一次主键查询完成。
 
-    def get_checkin_stats(self, user_id):
-        """
-        获取用户的打卡统计信息
-        
         :param user_id: 用户ID
-        :return: 打卡统计信息，如果没有记录则返回默认状态
+        :param day: 指定日期，默认为今天
+        :return: {'today_status': ..., 'stats': ...}，没有打卡记录时返回默认状态
         """
-        import logging
-        logger = logging.getLogger(__name__)
+        day = self._parse_date(day) if day is not None else date.today()
 
-        try:
-            logger.info(f"Getting checkin stats for user {user_id}")
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                SELECT s.total_days, s.current_streak, s.max_streak, s.last_checkin_date,
+                       c.id, c.checkin_type, c.words_learned, c.correct_count,
+                       c.wrong_count, c.streak_days, c.created_at
+                FROM user_checkin_state s
+                LEFT JOIN checkin_records c
+                    ON c.user_id = s.user_id AND c.checkin_date = ?
+                WHERE s.user_id = ?
+            ''', (day, user_id)).fetchone()
 
-            # 首先检查用户是否存在
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-                user_exists = cursor.fetchone()
-                
-                if not user_exists:
-                    logger.warning(f"User {user_id} not found")
-                    return None
+        if row is None:
+            row = (0, 0, 0, None) + (None,) * 7
 
-                # 获取总打卡天数
-                cursor.execute('''
-                    SELECT COUNT(DISTINCT checkin_date) 
-                    FROM checkin_records 
-                    WHERE user_id = ?
-                ''', (user_id,))
-                total_days_result = cursor.fetchone()
-                total_days = total_days_result[0] if total_days_result else 0
-                
-                # 获取最长连续打卡天数
-                cursor.execute('''
-                    SELECT MAX(streak_days) 
-                    FROM checkin_records 
-                    WHERE user_id = ?
-                ''', (user_id,))
-                max_streak_result = cursor.fetchone()
-                max_streak = max_streak_result[0] if max_streak_result else 0
-                
-                # 获取当前连续打卡天数和最后打卡日期
-                cursor.execute('''
-                    SELECT streak_days, checkin_date
-                    FROM checkin_records 
-                    WHERE user_id = ? 
-                    ORDER BY checkin_date DESC 
-                    LIMIT 1
-                ''', (user_id,))
-                last_record = cursor.fetchone()
-                
-                current_streak = last_record[0] if last_record else 0
-                last_checkin_date = self._parse_date(last_record[1]) if last_record else None
-                
-                logger.info(f"Checkin stats for user {user_id}: total_days={total_days}, max_streak={max_streak}, current_streak={current_streak}")
-                
-                return {
-                    'total_days': total_days,
-                    'max_streak': max_streak,
-                    'current_streak': current_streak,
-                    'last_checkin': last_checkin_date.strftime('%Y-%m-%d') if last_checkin_date else None
-                }
-        
-        except Exception as e:
-            logger.error(f"Error getting checkin stats for user {user_id}: {str(e)}", exc_info=True)
-            raise
+        if row[4] is not None:
+            today_status = {
+                'id': row[4],
+                'checkin_type': row[5],
+                'words_learned': row[6],
+                'correct_count': row[7],
+                'wrong_count': row[8],
+                'streak_days': row[9],
+                'created_at': row[10],
+                'checkin_date': day.strftime('%Y-%m-%d')
+            }
+        else:
+            today_status = {
+                'checkin_type': 'not_checked_in',
+                'words_learned': 0,
+                'correct_count': 0,
+                'wrong_count': 0,
+                'streak_days': 0,
+                'created_at': None,
+                'checkin_date': day.strftime('%Y-%m-%d')
+            }
 
+        return {
+            'today_status': today_status,
+            'stats': {
+                'total_days': row[0],
+                'max_streak': row[2],
+                'current_streak': row[1],
+                'last_checkin': row[3]
+            }
+        }
+
+    @queued_write
     def submit_checkin(self, user_id, checkin_date=None, checkin_type='normal'):
         """
         提交打卡记录
-        
+
+        在同一事务中插入打卡记录并更新 user_checkin_state 计数器。
+
         :param user_id: 用户ID
         :param checkin_date: 打卡日期，默认为今天
         :param checkin_type: 打卡类型（normal/makeup）
@@ -717,10 +1683,10 @@ class Database:
         if checkin_date is None:
             checkin_date = date.today()
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            try:
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+
                 # 检查是否已经打卡
                 cursor.execute('''
                     SELECT id FROM checkin_records 
@@ -731,44 +1697,41 @@ class Database:
                     logger.warning(f"User {user_id} already checked in on {checkin_date}")
                     raise Exception('今日已打卡')
                 
-                # 获取今日学习数据
+                # 获取今日学习数据（按天汇总表的一行）
                 cursor.execute('''
-                    SELECT COUNT(*) as total,
-                           SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) as correct,
-                           SUM(CASE WHEN is_correct = 0 THEN 1 ELSE 0 END) as wrong
-                    FROM learning_records
-                    WHERE user_id = ? AND date = ?
-                ''', (user_id, checkin_date))
+                    SELECT answered, correct, wrong
+                    FROM user_daily_stats
+                    WHERE user_id = ? AND day = ?
+                ''', (user_id, str(checkin_date)))
                 
-                stats = cursor.fetchone()
+                stats = cursor.fetchone() or (0, 0, 0)
                 logger.info(f"Learning stats for user {user_id} on {checkin_date}: {stats}")
                 
                 words_learned = stats[0] or 0
                 correct_count = stats[1] or 0
                 wrong_count = stats[2] or 0
                 
-                # 计算连续打卡天数
+                # 计算连续打卡天数：由最近一次打卡的日期和连续天数推算
                 cursor.execute('''
-                    SELECT checkin_date, streak_days 
-                    FROM checkin_records 
-                    WHERE user_id = ? 
-                    ORDER BY checkin_date DESC 
-                    LIMIT 1
+                    SELECT last_checkin_date, current_streak
+                    FROM user_checkin_state
+                    WHERE user_id = ?
                 ''', (user_id,))
                 
-                last_record = cursor.fetchone()
+                state = cursor.fetchone()
                 streak_days = 1
+                last_date = None
                 
-                if last_record:
-                    last_date = datetime.strptime(last_record[0], '%Y-%m-%d').date()
+                if state and state[0]:
+                    last_date = datetime.strptime(state[0], '%Y-%m-%d').date()
                     logger.info(f"Last checkin date: {last_date}, Current checkin date: {checkin_date}")
                     
                     if (checkin_date - last_date).days == 1:
                         # 连续打卡
-                        streak_days = last_record[1] + 1
+                        streak_days = state[1] + 1
                     elif (checkin_date - last_date).days > 1 and checkin_type == 'makeup':
                         # 补打卡，连续天数延续
-                        streak_days = last_record[1] + 1
+                        streak_days = state[1] + 1
                 
                 logger.info(f"Calculated streak days: {streak_days}")
                 
@@ -780,83 +1743,33 @@ class Database:
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (user_id, checkin_date, checkin_type, words_learned,
                       correct_count, wrong_count, streak_days))
-                
-                conn.commit()
-                
-                logger.info(f"Checkin successful for user {user_id} on {checkin_date}")
-                
-                return {
-                    'checkin_date': checkin_date.strftime('%Y-%m-%d'),  # 转换为字符串
-                    'checkin_type': checkin_type,
-                    'words_learned': words_learned,
-                    'correct_count': correct_count,
-                    'wrong_count': wrong_count,
-                    'streak_days': streak_days
-                }
-            
-            except Exception as e:
-                logger.error(f"Error in submit_checkin: {str(e)}")
-                conn.rollback()
-                raise
-
-    def debug_checkin_records(self, user_id):
-        """
-        调试方法：检查用户的打卡记录
-        
-        :param user_id: 用户ID
-        :return: 打卡记录详情
-        """
-        import logging
-        logger = logging.getLogger(__name__)
-
-        try:
-            logger.info(f"Debugging checkin records for user {user_id}")
-
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # 检查是否有任何打卡记录
-                cursor.execute('''
-                    SELECT COUNT(*) 
-                    FROM checkin_records 
-                    WHERE user_id = ?
-                ''', (user_id,))
-                total_records = cursor.fetchone()[0]
-                logger.info(f"Total checkin records for user {user_id}: {total_records}")
 
-                # 获取最近的打卡记录
+                # 更新打卡状态计数器；早于最近一次打卡的记录不改变当前连续天数
+                is_latest = last_date is None or checkin_date > last_date
                 cursor.execute('''
-                    SELECT id, user_id, checkin_date, checkin_type, words_learned, 
-                           correct_count, wrong_count, streak_days, created_at
-                    FROM checkin_records 
-                    WHERE user_id = ?
-                    ORDER BY checkin_date DESC
-                    LIMIT 5
-                ''', (user_id,))
-                recent_records = cursor.fetchall()
-
-                # 格式化最近记录
-                formatted_records = []
-                for record in recent_records:
-                    formatted_records.append({
-                        'id': record[0],
-                        'user_id': record[1],
-                        'checkin_date': record[2].strftime('%Y-%m-%d') if record[2] else None,
-                        'checkin_type': record[3],
-                        'words_learned': record[4],
-                        'correct_count': record[5],
-                        'wrong_count': record[6],
-                        'streak_days': record[7],
-                        'created_at': record[8].strftime('%Y-%m-%d %H:%M:%S') if record[8] else None
-                    })
+                    INSERT INTO user_checkin_state
+                        (user_id, total_days, current_streak, max_streak, last_checkin_date)
+                    VALUES (?, 1, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        total_days = total_days + 1,
+                        current_streak = CASE WHEN ? THEN excluded.current_streak ELSE current_streak END,
+                        max_streak = MAX(max_streak, excluded.max_streak),
+                        last_checkin_date = CASE WHEN ? THEN excluded.last_checkin_date ELSE last_checkin_date END
+                ''', (user_id, streak_days, streak_days, checkin_date, is_latest, is_latest))
 
-                return {
-                    'total_records': total_records,
-                    'recent_records': formatted_records
-                }
+            logger.info(f"Checkin successful for user {user_id} on {checkin_date}")
+            
+            return {
+                'checkin_date': checkin_date.strftime('%Y-%m-%d'),  # 转换为字符串
+                'checkin_type': checkin_type,
+                'words_learned': words_learned,
+                'correct_count': correct_count,
+                'wrong_count': wrong_count,
+                'streak_days': streak_days
+            }
         
         except Exception as e:
-            logger.error(f"Error debugging checkin records for user {user_id}: {str(e)}", exc_info=True)
+            logger.error(f"Error in submit_checkin: {str(e)}")
             raise
 
     def reset_user_checkin_progress(self, user_id):
@@ -872,7 +1785,10 @@ class Database:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                
+
+                # 先删除打卡状态，删除打卡记录时触发器不再逐行重算
+                cursor.execute('DELETE FROM user_checkin_state WHERE user_id = ?', (user_id,))
+
                 # 删除用户的所有打卡记录
                 cursor.execute('''
                     DELETE FROM checkin_records 
@@ -889,6 +1805,24 @@ class Database:
             logger.error(f"Error resetting checkin progress for user {user_id}: {str(e)}", exc_info=True)
             return False
 
+    @queued_write
+    def reset_user_progress(self, user_id):
+        """
+        重置用户的全部学习进度
+
+        在一个事务中删除学习记录、复习进度、打卡记录以及由它们汇总的掌握度、每日统计、
+        打卡状态和新单词游标，并将总分清零。汇总表先删除，删除明细时触发器的扣减不再有工作，
+        打卡状态已删除时打卡记录的删除触发器也不会按剩余记录重算。
+
+        :param user_id: 用户ID
+        """
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            for table in ('user_review_cursors', 'user_word_state', 'user_daily_stats', 'user_checkin_state',
+                          'learning_records', 'word_learning_progress', 'checkin_records'):
+                cursor.execute(f'DELETE FROM {table} WHERE user_id = ?', (user_id,))
+            cursor.execute('UPDATE users SET total_score = 0 WHERE id = ?', (user_id,))
+
     def _parse_date(self, date_value):
         """
         将不同格式的日期转换为日期对象
@@ -939,8 +1873,11 @@ class Database:
 
     def debug_checkin_records(self, user_id):
         """
-        调试方法：检查用户的打卡记录
-        
+        诊断方法：检查用户的打卡记录和打卡状态计数器
+
+        返回最近的打卡记录、user_checkin_state 中的计数器以及由打卡记录重新汇总的值，
+        两者不一致时说明计数器需要重算。
+
         :param user_id: 用户ID
         :return: 打卡记录详情
         """
@@ -991,11 +1928,49 @@ class Database:
                         'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None
                     })
 
+                state_columns = ('total_days', 'current_streak', 'max_streak', 'last_checkin_date')
+                cursor.execute('''
+                    SELECT total_days, current_streak, max_streak, last_checkin_date
+                    FROM user_checkin_state
+                    WHERE user_id = ?
+                ''', (user_id,))
+                state = cursor.fetchone()
+
+                cursor.execute(f'''
+                    {migrations.CHECKIN_STATE_SELECT}
+                    WHERE user_id = ?
+                    GROUP BY user_id
+                ''', (user_id,))
+                expected = cursor.fetchone()
+
                 return {
                     'total_records': total_records,
-                    'recent_records': formatted_records
+                    'recent_records': formatted_records,
+                    'state': dict(zip(state_columns, state)) if state else None,
+                    'expected_state': dict(zip(state_columns, expected[1:])) if expected else None
                 }
         
         except Exception as e:
             logger.error(f"Error debugging checkin records for user {user_id}: {str(e)}", exc_info=True)
             raise
+
+
+def create_database(backend='sqlite', db_path='vocabulary.db', pool_size=None, max_overflow=None, **options):
+    """
+    按名称创建存储后端，两种后端的公开方法相同
+
+    :param backend: 'sqlite'（每个线程一个 sqlite3 连接）或 'sqlalchemy'
+                    （SQLAlchemy Core 与 QueuePool，见 sa_database.py）
+    :param pool_size: sqlalchemy 后端连接池保持的连接数，默认见 sa_database；sqlite 后端忽略
+    :param max_overflow: sqlalchemy 后端连接池允许临时多开的连接数；sqlite 后端忽略
+    :param options: 传给 Database 的其他参数，如 pragmas、instrument、writer
+    """
+    if backend == 'sqlite':
+        return Database(db_path, **options)
+    if backend == 'sqlalchemy':
+        from sa_database import SQLAlchemyDatabase
+
+        pool_options = {name: value for name, value in (('pool_size', pool_size), ('max_overflow', max_overflow))
+                        if value is not None}
+        return SQLAlchemyDatabase(db_path, **pool_options, **options)
+    raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(STORAGE_BACKENDS)})")
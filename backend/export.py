@@ -0,0 +1,125 @@
+"""
+单词库与学习记录的流式导出
+
+导出内容按行生成 NDJSON 或 CSV 文本，数据通过 Database 的 iter_* 方法
+用 fetchmany 分批读取，内存占用与导出总量无关。既供 /api/export/* 接口
+作为流式响应使用，也可以在命令行中直接导出::
+
+    python export.py words --format csv --output words.csv
+    python export.py history --user-id 1 --since 2024-01-01 --output history.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+from database import Database, TIMESTAMP_FORMAT, WORD_FIELDS
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+HISTORY_FIELDS = ('id', 'word_id', 'word', 'part_of_speech', 'meaning', 'is_correct', 'date', 'created_at')
+
+# CSV 每攒够这么多行输出一次，减少小块写入
+CSV_CHUNK_ROWS = 500
+
+
+def parse_since(value):
+    """
+    解析增量导出的起始时间
+
+    :param value: ISO 8601 日期或时间字符串，带时区时转换为服务器本地时间
+    :return: TIMESTAMP_FORMAT 格式的字符串；value 为空时返回 None
+    :raises ValueError: 格式无法解析
+    """
+    if not value:
+        return None
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)
+    return since.strftime(TIMESTAMP_FORMAT)
+
+
+def iter_ndjson(rows):
+    """将字典逐行序列化为 NDJSON"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows, fields):
+    """将字典序列化为带表头的 CSV，按块产出文本"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= CSV_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def serialize(rows, fields, fmt):
+    """按导出格式序列化数据行"""
+    if fmt == 'csv':
+        return iter_csv(rows, fields)
+    if fmt == 'ndjson':
+        return iter_ndjson(rows)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def export_words(db, fmt='ndjson', since=None):
+    """导出单词库，since 为 TIMESTAMP_FORMAT 字符串时只导出之后新增或修改的单词"""
+    return serialize(db.iter_words(fields=WORD_FIELDS, updated_since=since), WORD_FIELDS, fmt)
+
+
+def export_history(db, user_id, fmt='ndjson', since=None):
+    """导出用户学习记录，since 为 TIMESTAMP_FORMAT 字符串时只导出之后的记录"""
+    return serialize(db.iter_learning_history(user_id, since=since), HISTORY_FIELDS, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式导出单词库或学习记录')
+    parser.add_argument('target', choices=['words', 'history'], help='导出内容')
+    parser.add_argument('--db', default='vocabulary.db', help='数据库文件路径')
+    parser.add_argument('--format', default='ndjson', choices=sorted(EXPORT_FORMATS), help='导出格式')
+    parser.add_argument('--since', default=None, help='增量导出的起始时间（ISO 8601）')
+    parser.add_argument('--user-id', type=int, default=None, help='导出学习记录时的用户ID')
+    parser.add_argument('--output', '-o', default=None, help='输出文件，默认为标准输出')
+    args = parser.parse_args()
+
+    if args.target == 'history' and args.user_id is None:
+        parser.error('导出学习记录需要 --user-id')
+
+    try:
+        since = parse_since(args.since)
+    except ValueError:
+        parser.error(f'无法解析的时间：{args.since}')
+
+    db = Database(args.db)
+    if args.target == 'words':
+        chunks = export_words(db, args.format, since)
+    else:
+        chunks = export_history(db, args.user_id, args.format, since)
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
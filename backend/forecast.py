@@ -0,0 +1,46 @@
+"""
+复习负载预测
+
+输出未来每天到期的复习数量，可以针对单个用户或全站，用于提前预热缓存、
+按复习高峰调整进程数::
+
+    python forecast.py --db vocabulary.db --days 30
+    python forecast.py --db vocabulary.db --user 42 --json
+"""
+import argparse
+import json
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预测未来每天到期的复习数量')
+    parser.add_argument('--db', default='vocabulary.db', help='数据库文件路径')
+    parser.add_argument('--days', type=int, default=14, help='预测的天数')
+    parser.add_argument('--user', type=int, default=None, help='只预测该用户，默认全站')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出')
+    args = parser.parse_args()
+
+    if args.days < 1:
+        parser.error('--days 必须大于 0')
+
+    db = Database(args.db)
+    try:
+        forecast = db.get_review_forecast(args.user, args.days)
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(forecast, ensure_ascii=False, indent=2))
+        return
+
+    scope = f'用户 {args.user}' if args.user is not None else '全站'
+    print(f"{scope}：已到期未复习 {forecast['overdue']:,}")
+    peak = max((item['due'] for item in forecast['forecast']), default=0)
+    for item in forecast['forecast']:
+        bar = '#' * round(item['due'] / peak * 40) if peak else ''
+        print(f"{item['date']}  {item['due']:>10,}  {bar}")
+
+
+if __name__ == '__main__':
+    main()
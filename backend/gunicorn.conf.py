@@ -0,0 +1,28 @@
+"""
+gunicorn 配置
+
+DB_WRITER 为写入进程地址时，由 gunicorn 主进程在启动 worker 之前启动写入进程
+（见 writer.py），退出时停止它。没有设置 DB_WRITER_AUTHKEY 时 writer.spawn 生成随机
+的连接认证密钥并写入主进程的环境变量，之后 fork 的 worker 继承它::
+
+    DB_WRITER=/tmp/vocabulary-writer.sock gunicorn -c gunicorn.conf.py -w 4 -b 0.0.0.0:5000 app:app
+"""
+import os
+
+import writer
+
+
+def on_starting(server):
+    address = os.environ.get('DB_WRITER', '')
+    if address and address != 'thread':
+        batch_window = float(os.environ.get('DB_WRITER_BATCH_MS', writer.DEFAULT_BATCH_WINDOW * 1000)) / 1000
+        server.db_writer = writer.spawn(os.environ.get('DATABASE_PATH', 'vocabulary.db'), address, batch_window)
+        server.log.info(f"Started database writer (pid {server.db_writer.pid}) on {address}")
+
+
+def on_exit(server):
+    process = getattr(server, 'db_writer', None)
+    if process is not None:
+        # worker 已经退出，写入进程执行完排队的操作后退出
+        process.terminate()
+        process.wait()
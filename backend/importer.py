@@ -0,0 +1,204 @@
+"""
+单词表批量导入
+
+支持 CSV、TSV 和 JSON（JSON 数组或每行一个对象的 NDJSON）格式的单词表。
+文件逐行/逐对象流式解析，交给 Database.bulk_insert_words 分块写入，
+内存占用与文件大小无关。CSV/TSV 可以带表头（word, part_of_speech, meaning），
+没有表头时按 单词、词性、释义 的列顺序读取::
+
+    python importer.py cet4.csv
+    python importer.py ielts.json --db vocabulary.db --update
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import time
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'tsv', 'json')
+
+# 表头中可识别的列名
+FIELD_ALIASES = {
+    'word': 'word',
+    'part_of_speech': 'part_of_speech',
+    'pos': 'part_of_speech',
+    'meaning': 'meaning',
+    'definition': 'meaning',
+}
+
+
+class ImportStats:
+    """统计导入过程中被跳过的无效行"""
+
+    def __init__(self):
+        self.invalid = 0
+
+    def clean(self, word, part_of_speech, meaning):
+        """规范化一行数据，单词或释义为空时返回 None 并计入无效行"""
+        word = (word or '').strip()
+        meaning = (meaning or '').strip()
+        part_of_speech = (part_of_speech or '').strip() or None
+        if not word or not meaning:
+            self.invalid += 1
+            return None
+        return word, part_of_speech, meaning
+
+
+def guess_format(filename):
+    """根据文件扩展名推断导入格式"""
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if ext in ('json', 'ndjson', 'jsonl'):
+        return 'json'
+    if ext in ('tsv', 'tab'):
+        return 'tsv'
+    if ext in ('csv', 'txt'):
+        return 'csv'
+    return None
+
+
+def iter_delimited(fp, delimiter, stats):
+    """逐行解析 CSV/TSV，产出 (word, part_of_speech, meaning)"""
+    reader = csv.reader(fp, delimiter=delimiter)
+    columns = None
+    for index, row in enumerate(reader):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if index == 0:
+            header = [FIELD_ALIASES.get(cell.strip().lower()) for cell in row]
+            if 'word' in header and 'meaning' in header:
+                columns = {name: i for i, name in enumerate(header) if name}
+                continue
+        if columns:
+            values = [row[columns[name]] if columns.get(name) is not None and columns[name] < len(row) else None
+                      for name in ('word', 'part_of_speech', 'meaning')]
+        else:
+            values = (row + [None, None, None])[:3]
+        cleaned = stats.clean(*values)
+        if cleaned:
+            yield cleaned
+
+
+def iter_json_objects(fp, chunk_size=65536):
+    """
+    增量解析 JSON 数组或 NDJSON 中的顶层对象
+
+    不一次性读入整个文件：按块读取，逐个用 raw_decode 解出对象，
+    对象之间的空白、逗号和数组括号直接跳过。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,[]')
+        if not buffer:
+            if eof:
+                return
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                return
+            buffer = chunk
+            continue
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        yield obj
+
+
+def iter_json(fp, stats):
+    """解析 JSON 单词表，产出 (word, part_of_speech, meaning)"""
+    for obj in iter_json_objects(fp):
+        if not isinstance(obj, dict):
+            stats.invalid += 1
+            continue
+        fields = {FIELD_ALIASES[key]: value for key, value in obj.items() if key in FIELD_ALIASES}
+        cleaned = stats.clean(fields.get('word'), fields.get('part_of_speech'), fields.get('meaning'))
+        if cleaned:
+            yield cleaned
+
+
+def iter_rows(fp, fmt, stats):
+    """按格式解析文本流"""
+    if fmt == 'csv':
+        return iter_delimited(fp, ',', stats)
+    if fmt == 'tsv':
+        return iter_delimited(fp, '\t', stats)
+    if fmt == 'json':
+        return iter_json(fp, stats)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def import_words(db, fp, fmt, chunk_size=10000, update_existing=False):
+    """
+    从文本流导入单词表
+
+    :param db: Database 实例
+    :param fp: 文本模式的文件对象
+    :param fmt: csv、tsv 或 json
+    :param chunk_size: 每个事务写入的行数
+    :param update_existing: 单词已存在时是否覆盖词性和释义
+    :return: 导入结果字典
+    """
+    stats = ImportStats()
+    start = time.perf_counter()
+    read, inserted = db.bulk_insert_words(
+        iter_rows(fp, fmt, stats), chunk_size=chunk_size, update_existing=update_existing
+    )
+    elapsed = time.perf_counter() - start
+    result = {
+        'read': read,
+        'inserted': inserted,
+        'skipped': read - inserted,
+        'invalid': stats.invalid,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(read / elapsed) if elapsed > 0 else read,
+    }
+    logger.info(f"Imported word list: {result}")
+    return result
+
+
+def open_text(binary_stream):
+    """把二进制流包装为 UTF-8 文本流（兼容带 BOM 的文件）"""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入单词表')
+    parser.add_argument('path', help='单词表文件路径')
+    parser.add_argument('--db', default='vocabulary.db', help='数据库文件路径')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, default=None, help='文件格式，默认按扩展名推断')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='每个事务写入的行数')
+    parser.add_argument('--update', action='store_true', help='单词已存在时覆盖词性和释义')
+    args = parser.parse_args()
+
+    fmt = args.format or guess_format(args.path)
+    if not fmt:
+        parser.error('无法根据扩展名推断文件格式，请指定 --format')
+
+    db = Database(args.db)
+    try:
+        with open(args.path, 'rb') as binary:
+            result = import_words(db, open_text(binary), fmt, args.chunk_size, args.update)
+    finally:
+        db.close()
+
+    print(f"读取 {result['read']} 行，新增 {result['inserted']} 个单词，"
+          f"跳过重复 {result['skipped']} 行，无效 {result['invalid']} 行")
+    print(f"耗时 {result['seconds']}s，{result['rows_per_second']:,} 行/秒")
+
+
+if __name__ == '__main__':
+    main()
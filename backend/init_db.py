@@ -17,8 +17,7 @@ def init_database():
         ('javascript', 'n.', 'JavaScript编程语言')
     ]
     
-    for word, pos, meaning in sample_words:
-        db.add_word(word, pos, meaning)
+    db.bulk_insert_words(sample_words)
     
     print("数据库初始化完成！")
     print("已添加示例单词，现在可以注册账号并开始使用了。")
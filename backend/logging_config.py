@@ -0,0 +1,133 @@
+"""
+日志配置与请求日志
+
+configure_logging 把根 logger 的输出改为 QueueHandler：请求线程只把日志记录
+放入队列，格式化和写文件/终端由后台的 QueueListener 线程完成。
+
+请求日志每个请求一条，包含方法、路径、状态码和耗时；可按比例抽样，
+请求体和响应体默认不记录，开启后也只截取前若干字节。相关配置均可通过
+环境变量设置::
+
+    LOG_LEVEL=INFO                 根 logger 级别
+    LOG_FORMAT=text                text 或 json
+    LOG_FILE=                      同时写入的日志文件
+    REQUEST_LOG_SAMPLE_RATE=1.0    请求日志抽样比例，5xx 响应总会记录
+    REQUEST_LOG_BODIES=0           是否记录请求体和响应体
+    REQUEST_LOG_BODY_MAX=2048      记录请求体/响应体时的最大字节数
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+# 请求日志记录中附加字段的属性名
+REQUEST_FIELD = 'request'
+
+# 记录请求体时需要隐藏的字段
+SENSITIVE_FIELDS = ('password', 'token')
+
+
+def _env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def settings_from_env():
+    """从环境变量读取日志配置"""
+    return {
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        'LOG_FORMAT': os.environ.get('LOG_FORMAT', 'text').lower(),
+        'LOG_FILE': os.environ.get('LOG_FILE') or None,
+        'REQUEST_LOG_SAMPLE_RATE': float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 1.0)),
+        'REQUEST_LOG_BODIES': _env_flag('REQUEST_LOG_BODIES'),
+        'REQUEST_LOG_BODY_MAX': int(os.environ.get('REQUEST_LOG_BODY_MAX', 2048)),
+    }
+
+
+class TextFormatter(logging.Formatter):
+    """普通文本格式，请求日志输出为一行摘要"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, REQUEST_FIELD, None)
+        if fields:
+            message += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON，请求日志的字段平铺在顶层（异常堆栈已由 QueueHandler 并入 message）"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, REQUEST_FIELD, None)
+        if fields:
+            entry.update(fields)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(settings):
+    """
+    为根 logger 配置队列日志
+
+    :param settings: settings_from_env() 格式的配置字典
+    :return: 已启动的 QueueListener，进程退出时自动停止
+    """
+    formatter = JsonFormatter() if settings['LOG_FORMAT'] == 'json' else TextFormatter()
+    handlers = [logging.StreamHandler()]
+    if settings['LOG_FILE']:
+        handlers.append(logging.FileHandler(settings['LOG_FILE'], encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(settings['LOG_LEVEL'])
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def should_sample(rate):
+    """按比例决定是否记录本次请求"""
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def truncate_body(data, limit):
+    """截取请求体/响应体的前 limit 字节并解码为文本"""
+    if not data:
+        return None
+    text = data[:limit].decode('utf-8', errors='replace')
+    if len(data) > limit:
+        text += f'...({len(data)} bytes)'
+    return text
+
+
+def mask_json_body(data, limit):
+    """隐藏 JSON 请求体中的敏感字段后截取"""
+    try:
+        body = json.loads(data)
+    except ValueError:
+        return truncate_body(data, limit)
+    if isinstance(body, dict):
+        body = {key: '****' if key in SENSITIVE_FIELDS else value for key, value in body.items()}
+    return truncate_body(json.dumps(body, ensure_ascii=False).encode('utf-8'), limit)
@@ -0,0 +1,175 @@
+"""
+进程内指标与 Prometheus 文本格式输出
+
+Counter 和 Histogram 带标签、线程安全，Registry 汇总后按 Prometheus 文本格式
+（version 0.0.4）输出；连接数、缓存命中等已经由其他对象计数的值，通过
+Registry.add_collector 注册的回调在抓取时读取。多进程部署时每个进程各有一份，
+由 Prometheus 按实例分别抓取。
+"""
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 请求耗时（秒）的默认分桶
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        :param name: 指标名称
+        :param documentation: HELP 说明
+        :param labelnames: 标签名称，observe/inc 时按关键字参数传入对应的值
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        """清空全部标签组合的值"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        """返回 [(名称, 标签列表, 值)]"""
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, list(zip(self.labelnames, key)), value) for key, value in sorted(items)]
+
+
+class Histogram(_Metric):
+    """分桶计数的观测值分布，输出累计的 _bucket、_sum 和 _count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: 递增的分桶上界，不含 +Inf
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets)
+        if list(self.buckets) != sorted(set(self.buckets)):
+            raise ValueError(f"{name} buckets must be strictly increasing")
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # 最后一个位置是超出所有上界的观测值，对应 +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        result = []
+        for key, counts, total in sorted(items):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                result.append((f'{self.name}_bucket', labels + [('le', _format_value(bound))], cumulative))
+            result.append((f'{self.name}_sum', labels, total))
+            result.append((f'{self.name}_count', labels, cumulative))
+        return result
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """创建并注册一个 Counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """创建并注册一个 Histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """
+        注册抓取时调用的回调
+
+        :param collect: 无参数函数，返回 [(名称, 类型, 说明, [(标签字典, 值), ...]), ...]，
+                        类型为 'counter' 或 'gauge'
+        """
+        with self._lock:
+            self._collectors.append(collect)
+
+    def clear(self):
+        """清空所有 Counter/Histogram 的值，回调读取的值不受影响"""
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self):
+        """按 Prometheus 文本格式输出全部指标"""
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self._metrics]
+        for collect in self._collectors:
+            for name, kind, documentation, values in collect():
+                samples = [(name, sorted(labels.items()), value) for labels, value in values]
+                families.append((name, kind, documentation, samples))
+
+        lines = []
+        for name, kind, documentation, samples in families:
+            help_text = documentation.replace('\\', r'\\').replace('\n', r'\n')
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
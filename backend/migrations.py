@@ -0,0 +1,743 @@
+"""
+数据库结构迁移
+
+每个迁移由版本号、说明和一个接收 cursor 的函数组成，按版本号顺序在各自的
+事务中执行。已应用的版本记录在 PRAGMA user_version 中，Database 初始化时
+会自动执行尚未应用的迁移，也可以通过命令行对已有数据库手动执行::
+
+    python migrations.py --db vocabulary.db
+    python migrations.py --db vocabulary.db --status
+    python migrations.py --db vocabulary.db --rebuild-daily-stats
+"""
+import argparse
+import logging
+import sqlite3
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+Migration = namedtuple('Migration', ['version', 'description', 'apply'])
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """注册一个迁移函数"""
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+def get_version(conn):
+    """获取数据库当前的结构版本"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def latest_version():
+    """获取已注册迁移中的最高版本"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def migrate(conn, target=None):
+    """
+    执行所有未应用的迁移
+
+    :param conn: sqlite3 连接，调用时不能处于事务中
+    :param target: 迁移到的目标版本，默认为最新版本
+    :return: 本次应用的迁移列表
+    """
+    target = latest_version() if target is None else target
+    current = get_version(conn)
+    applied = []
+
+    for m in MIGRATIONS:
+        if m.version <= current or m.version > target:
+            continue
+
+        logger.info(f"Applying migration {m.version}: {m.description}")
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 并发启动的进程可能已经完成了这个迁移
+            if get_version(conn) >= m.version:
+                conn.rollback()
+                continue
+            m.apply(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {int(m.version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {m.version} failed", exc_info=True)
+            raise
+        applied.append(m)
+
+    ensure_words_fts(conn)
+
+    if applied:
+        # 更新查询规划器使用的统计信息
+        conn.execute('ANALYZE')
+        conn.commit()
+
+    return applied
+
+
+@migration(1, '热点查询索引与单词唯一约束')
+def _add_hot_path_indexes(cursor):
+    # 合并重复的单词：学习记录和进度指向保留的最小 id，计数累加到保留行
+    cursor.execute('''
+        CREATE TEMP TABLE word_duplicates AS
+        SELECT w.id AS duplicate_id, k.keep_id
+        FROM words w
+        JOIN (
+            SELECT word, MIN(id) AS keep_id
+            FROM words
+            GROUP BY word
+            HAVING COUNT(*) > 1
+        ) k ON w.word = k.word
+        WHERE w.id != k.keep_id
+    ''')
+    cursor.execute('''
+        UPDATE words SET
+            frequency = frequency + (SELECT SUM(d.frequency) FROM words d
+                JOIN temp.word_duplicates wd ON d.id = wd.duplicate_id WHERE wd.keep_id = words.id),
+            correct_times = correct_times + (SELECT SUM(d.correct_times) FROM words d
+                JOIN temp.word_duplicates wd ON d.id = wd.duplicate_id WHERE wd.keep_id = words.id),
+            wrong_times = wrong_times + (SELECT SUM(d.wrong_times) FROM words d
+                JOIN temp.word_duplicates wd ON d.id = wd.duplicate_id WHERE wd.keep_id = words.id)
+        WHERE id IN (SELECT keep_id FROM temp.word_duplicates)
+    ''')
+    cursor.execute('''
+        UPDATE learning_records
+        SET word_id = (SELECT keep_id FROM temp.word_duplicates WHERE duplicate_id = word_id)
+        WHERE word_id IN (SELECT duplicate_id FROM temp.word_duplicates)
+    ''')
+    cursor.execute('''
+        UPDATE OR IGNORE word_learning_progress
+        SET word_id = (SELECT keep_id FROM temp.word_duplicates WHERE duplicate_id = word_id)
+        WHERE word_id IN (SELECT duplicate_id FROM temp.word_duplicates)
+    ''')
+    cursor.execute('''
+        DELETE FROM word_learning_progress
+        WHERE word_id IN (SELECT duplicate_id FROM temp.word_duplicates)
+    ''')
+    cursor.execute('DELETE FROM words WHERE id IN (SELECT duplicate_id FROM temp.word_duplicates)')
+    cursor.execute('DROP TABLE temp.word_duplicates')
+
+    # add_word 去重和按单词查找
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_words_word ON words(word)')
+
+    # 错词本、随机单词的掌握度聚合、学习统计
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learning_records_user_word
+        ON learning_records(user_id, word_id, is_correct)
+    ''')
+    # 学习趋势、打卡当日统计
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learning_records_user_date
+        ON learning_records(user_id, date)
+    ''')
+    # delete_word 按单词清理学习记录
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_learning_records_word ON learning_records(word_id)')
+
+    # 待复习单词
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_word_progress_user_next_review
+        ON word_learning_progress(user_id, next_review_date)
+    ''')
+    # delete_word 按单词清理复习进度
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_word_progress_word ON word_learning_progress(word_id)')
+
+
+@migration(2, '按词性缓存的单词数量计数器')
+def _add_word_counts(cursor):
+    # 每个词性一行（词性为空时记为 ''），由触发器随 words 的增删改同步维护
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS word_counts (
+            part_of_speech TEXT PRIMARY KEY,
+            word_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('DELETE FROM word_counts')
+    cursor.execute('''
+        INSERT INTO word_counts (part_of_speech, word_count)
+        SELECT COALESCE(part_of_speech, ''), COUNT(*) FROM words
+        GROUP BY COALESCE(part_of_speech, '')
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_count_insert AFTER INSERT ON words
+        BEGIN
+            INSERT INTO word_counts (part_of_speech, word_count)
+            VALUES (COALESCE(new.part_of_speech, ''), 1)
+            ON CONFLICT(part_of_speech) DO UPDATE SET word_count = word_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_count_delete AFTER DELETE ON words
+        BEGIN
+            UPDATE word_counts SET word_count = word_count - 1
+            WHERE part_of_speech = COALESCE(old.part_of_speech, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_count_update AFTER UPDATE OF part_of_speech ON words
+        WHEN COALESCE(old.part_of_speech, '') != COALESCE(new.part_of_speech, '')
+        BEGIN
+            UPDATE word_counts SET word_count = word_count - 1
+            WHERE part_of_speech = COALESCE(old.part_of_speech, '');
+            INSERT INTO word_counts (part_of_speech, word_count)
+            VALUES (COALESCE(new.part_of_speech, ''), 1)
+            ON CONFLICT(part_of_speech) DO UPDATE SET word_count = word_count + 1;
+        END
+    ''')
+    # 按词性筛选单词列表时的键集分页
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_pos_id ON words(part_of_speech, id)')
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    """表中不存在该列时添加（旧数据库可能已手工加过同名列）"""
+    columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})').fetchall()}
+    if column not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+@migration(3, '学习记录与单词的时间戳，用于增量导出')
+def _add_timestamps(cursor):
+    # 时间戳均为本地时间 'YYYY-MM-DD HH:MM:SS'，与 learning_records.date 保持一致
+    _add_column_if_missing(cursor, 'learning_records', 'created_at', 'TIMESTAMP')
+    cursor.execute('''
+        UPDATE learning_records SET created_at = date || ' 00:00:00'
+        WHERE created_at IS NULL AND date IS NOT NULL
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learning_records_user_created
+        ON learning_records(user_id, created_at)
+    ''')
+
+    _add_column_if_missing(cursor, 'words', 'updated_at', 'TIMESTAMP')
+    cursor.execute("UPDATE words SET updated_at = datetime('now', 'localtime') WHERE updated_at IS NULL")
+    # 只在单词内容变化时更新，答题计数的更新不会触发
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_touch_updated_at
+        AFTER UPDATE OF word, part_of_speech, meaning ON words
+        BEGIN
+            UPDATE words SET updated_at = datetime('now', 'localtime') WHERE id = new.id;
+        END
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_updated_at ON words(updated_at)')
+
+
+@migration(4, '单词表版本号，供进程内单词缓存判断是否需要重新加载')
+def _add_data_versions(cursor):
+    # 每张被缓存的表一行，表内容变化时由触发器递增 version
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('words', 0)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_version_insert AFTER INSERT ON words
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = 'words';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_version_delete AFTER DELETE ON words
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = 'words';
+        END
+    ''')
+    # 答题计数的更新不影响缓存内容，只关注单词和释义
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_version_update AFTER UPDATE OF word, meaning ON words
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = 'words';
+        END
+    ''')
+
+
+@migration(5, '每个用户每个单词的掌握度（净正确次数）')
+def _add_user_word_state(cursor):
+    # net_score 为答对次数减答错次数，大于 0 视为已掌握；answer_count 为 0 时删除该行
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_word_state (
+            user_id INTEGER NOT NULL,
+            word_id INTEGER NOT NULL,
+            net_score INTEGER NOT NULL DEFAULT 0,
+            answer_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, word_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('DELETE FROM user_word_state')
+    cursor.execute('''
+        INSERT INTO user_word_state (user_id, word_id, net_score, answer_count)
+        SELECT user_id, word_id, SUM(CASE WHEN is_correct = 1 THEN 1 ELSE -1 END), COUNT(*)
+        FROM learning_records
+        WHERE user_id IS NOT NULL AND word_id IS NOT NULL
+        GROUP BY user_id, word_id
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_learning_records_state_insert AFTER INSERT ON learning_records
+        BEGIN
+            INSERT INTO user_word_state (user_id, word_id, net_score, answer_count)
+            VALUES (new.user_id, new.word_id, CASE WHEN new.is_correct = 1 THEN 1 ELSE -1 END, 1)
+            ON CONFLICT(user_id, word_id) DO UPDATE SET
+                net_score = net_score + excluded.net_score,
+                answer_count = answer_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_learning_records_state_delete AFTER DELETE ON learning_records
+        BEGIN
+            UPDATE user_word_state SET
+                net_score = net_score - CASE WHEN old.is_correct = 1 THEN 1 ELSE -1 END,
+                answer_count = answer_count - 1
+            WHERE user_id = old.user_id AND word_id = old.word_id;
+            DELETE FROM user_word_state
+            WHERE user_id = old.user_id AND word_id = old.word_id AND answer_count <= 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_state_delete AFTER DELETE ON words
+        BEGIN
+            DELETE FROM user_word_state WHERE word_id = old.id;
+        END
+    ''')
+    # 随机单词接口按掌握度取未掌握的单词
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_word_state_user_score
+        ON user_word_state(user_id, net_score)
+    ''')
+    # 删除单词时按 word_id 清理
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_word_state_word ON user_word_state(word_id)')
+
+
+@migration(6, '复习队列中新单词的按用户游标')
+def _add_review_cursors(cursor):
+    # last_new_word_id 之前（含）的单词都已有该用户的复习进度，新单词从其后按 id 顺序取
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_review_cursors (
+            user_id INTEGER PRIMARY KEY,
+            last_new_word_id INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # 复习进度被删除（重置、删除单词）时该单词重新成为新单词，游标回退到它之前
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_word_progress_cursor_delete AFTER DELETE ON word_learning_progress
+        BEGIN
+            UPDATE user_review_cursors SET last_new_word_id = old.word_id - 1
+            WHERE user_id = old.user_id AND last_new_word_id >= old.word_id;
+        END
+    ''')
+
+
+# 两次答题间隔不超过该秒数时计入学习时长，超过视为新的学习时段
+STUDY_SESSION_GAP = 300
+
+
+def backfill_daily_stats(cursor, user_id=None):
+    """
+    由 learning_records 重新计算 user_daily_stats
+
+    :param cursor: 处于事务中的 cursor
+    :param user_id: 只重算该用户，None 表示全部用户
+    """
+    condition = 'WHERE user_id = ?' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+    cursor.execute(f'DELETE FROM user_daily_stats {condition}', params)
+    cursor.execute(f'''
+        INSERT INTO user_daily_stats
+            (user_id, day, answered, correct, wrong, distinct_words, new_words, study_seconds)
+        SELECT
+            user_id,
+            day,
+            COUNT(*),
+            SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN is_correct = 1 THEN 0 ELSE 1 END),
+            SUM(CASE WHEN nth_on_day = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN nth_ever = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN gap BETWEEN 0 AND {STUDY_SESSION_GAP} THEN gap ELSE 0 END)
+        FROM (
+            SELECT
+                user_id,
+                date AS day,
+                is_correct,
+                ROW_NUMBER() OVER (PARTITION BY user_id, word_id, date ORDER BY created_at, id) AS nth_on_day,
+                ROW_NUMBER() OVER (PARTITION BY user_id, word_id ORDER BY created_at, id) AS nth_ever,
+                CAST(strftime('%s', created_at) AS INTEGER) - CAST(strftime('%s', LAG(created_at) OVER (
+                    PARTITION BY user_id ORDER BY created_at, id
+                )) AS INTEGER) AS gap
+            FROM learning_records
+            WHERE user_id IS NOT NULL AND word_id IS NOT NULL AND date IS NOT NULL
+            {'AND user_id = ?' if user_id is not None else ''}
+        )
+        GROUP BY user_id, day
+    ''', params)
+
+
+@migration(7, '按用户按天汇总的学习统计')
+def _add_user_daily_stats(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_daily_stats (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            answered INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            wrong INTEGER NOT NULL DEFAULT 0,
+            distinct_words INTEGER NOT NULL DEFAULT 0,
+            new_words INTEGER NOT NULL DEFAULT 0,
+            study_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    ''')
+    backfill_daily_stats(cursor)
+
+    # 每条学习记录写入时在同一事务中累加当天的汇总：
+    # distinct_words/new_words 判断该单词当天/此前是否答过，study_seconds 累加与上一次答题的间隔
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_learning_records_daily_insert AFTER INSERT ON learning_records
+        WHEN new.user_id IS NOT NULL AND new.word_id IS NOT NULL AND new.date IS NOT NULL
+        BEGIN
+            INSERT INTO user_daily_stats
+                (user_id, day, answered, correct, wrong, distinct_words, new_words, study_seconds)
+            VALUES (
+                new.user_id,
+                new.date,
+                1,
+                CASE WHEN new.is_correct = 1 THEN 1 ELSE 0 END,
+                CASE WHEN new.is_correct = 1 THEN 0 ELSE 1 END,
+                NOT EXISTS (
+                    SELECT 1 FROM learning_records
+                    WHERE user_id = new.user_id AND word_id = new.word_id
+                        AND date = new.date AND id != new.id
+                ),
+                NOT EXISTS (
+                    SELECT 1 FROM learning_records
+                    WHERE user_id = new.user_id AND word_id = new.word_id AND id != new.id
+                ),
+                COALESCE((
+                    SELECT CASE WHEN gap BETWEEN 0 AND {STUDY_SESSION_GAP} THEN gap ELSE 0 END
+                    FROM (
+                        SELECT CAST(strftime('%s', new.created_at) AS INTEGER)
+                             - CAST(strftime('%s', MAX(created_at)) AS INTEGER) AS gap
+                        FROM learning_records
+                        WHERE user_id = new.user_id AND created_at <= new.created_at AND id != new.id
+                    )
+                ), 0)
+            )
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                answered = answered + excluded.answered,
+                correct = correct + excluded.correct,
+                wrong = wrong + excluded.wrong,
+                distinct_words = distinct_words + excluded.distinct_words,
+                new_words = new_words + excluded.new_words,
+                study_seconds = study_seconds + excluded.study_seconds;
+        END
+    ''')
+    # 删除学习记录时扣减计数；new_words 和 study_seconds 保留历史值，全天记录删完时删除该行
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_learning_records_daily_delete AFTER DELETE ON learning_records
+        WHEN old.user_id IS NOT NULL AND old.date IS NOT NULL
+        BEGIN
+            UPDATE user_daily_stats SET
+                answered = answered - 1,
+                correct = correct - CASE WHEN old.is_correct = 1 THEN 1 ELSE 0 END,
+                wrong = wrong - CASE WHEN old.is_correct = 1 THEN 0 ELSE 1 END,
+                distinct_words = distinct_words - NOT EXISTS (
+                    SELECT 1 FROM learning_records
+                    WHERE user_id = old.user_id AND word_id = old.word_id AND date = old.date
+                )
+            WHERE user_id = old.user_id AND day = old.date;
+            DELETE FROM user_daily_stats
+            WHERE user_id = old.user_id AND day = old.date AND answered <= 0;
+        END
+    ''')
+
+
+# 由 checkin_records 汇总一个用户的打卡状态；current_streak 取最近一次打卡的连续天数
+CHECKIN_STATE_SELECT = '''
+    SELECT
+        user_id,
+        COUNT(*),
+        (
+            SELECT streak_days FROM checkin_records latest
+            WHERE latest.user_id = c.user_id
+            ORDER BY latest.checkin_date DESC
+            LIMIT 1
+        ),
+        MAX(streak_days),
+        MAX(checkin_date)
+    FROM checkin_records c
+'''
+
+
+def backfill_checkin_state(cursor, user_id=None):
+    """
+    由 checkin_records 重新计算 user_checkin_state
+
+    :param cursor: 处于事务中的 cursor
+    :param user_id: 只重算该用户，None 表示全部用户
+    """
+    condition = 'WHERE user_id = ?' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+    cursor.execute(f'DELETE FROM user_checkin_state {condition}', params)
+    cursor.execute(f'''
+        INSERT INTO user_checkin_state
+            (user_id, total_days, current_streak, max_streak, last_checkin_date)
+        {CHECKIN_STATE_SELECT}
+        {condition}
+        GROUP BY user_id
+    ''', params)
+
+
+@migration(8, '按用户的打卡状态计数器')
+def _add_user_checkin_state(cursor):
+    # 由 Database.submit_checkin 在插入打卡记录的同一事务中更新
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_checkin_state (
+            user_id INTEGER PRIMARY KEY,
+            total_days INTEGER NOT NULL DEFAULT 0,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            max_streak INTEGER NOT NULL DEFAULT 0,
+            last_checkin_date DATE
+        )
+    ''')
+    backfill_checkin_state(cursor)
+
+    # 打卡记录很少被删除（重置进度），删除时按剩余记录重算该用户的状态，删完时不保留该行
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_checkin_records_state_delete AFTER DELETE ON checkin_records
+        BEGIN
+            DELETE FROM user_checkin_state WHERE user_id = old.user_id;
+            INSERT INTO user_checkin_state
+                (user_id, total_days, current_streak, max_streak, last_checkin_date)
+            {CHECKIN_STATE_SELECT}
+            WHERE user_id = old.user_id
+            GROUP BY user_id;
+        END
+    ''')
+
+
+@migration(9, '学习记录的回答质量，用于按历史记录重放复习进度')
+def _add_learning_record_quality(cursor):
+    # 旧记录没有回答质量（为 NULL），只有带 quality 提交的答题才会更新复习进度
+    _add_column_if_missing(cursor, 'learning_records', 'quality', 'INTEGER')
+    # scheduler.py 按 (用户, 单词, 时间) 顺序流式读取带回答质量的记录
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learning_records_replay
+        ON learning_records(user_id, word_id, created_at)
+        WHERE quality IS NOT NULL
+    ''')
+
+
+@migration(10, '按日期汇总的到期复习数量，用于全站复习负载预测')
+def _add_review_due_counts(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS review_due_counts (
+            day DATE PRIMARY KEY,
+            due INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO review_due_counts (day, due)
+        SELECT next_review_date, COUNT(*)
+        FROM word_learning_progress
+        WHERE next_review_date IS NOT NULL
+        GROUP BY next_review_date
+    ''')
+
+    # 复习进度写入、改期、删除时在同一事务中调整对应日期的计数，计数为 0 的日期不保留
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_word_progress_due_insert AFTER INSERT ON word_learning_progress
+        WHEN new.next_review_date IS NOT NULL
+        BEGIN
+            INSERT INTO review_due_counts (day, due) VALUES (new.next_review_date, 1)
+            ON CONFLICT(day) DO UPDATE SET due = due + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_word_progress_due_update AFTER UPDATE OF next_review_date ON word_learning_progress
+        WHEN old.next_review_date IS NOT new.next_review_date
+        BEGIN
+            UPDATE review_due_counts SET due = due - 1 WHERE day = old.next_review_date;
+            DELETE FROM review_due_counts WHERE day = old.next_review_date AND due <= 0;
+            INSERT INTO review_due_counts (day, due)
+            SELECT new.next_review_date, 1 WHERE new.next_review_date IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET due = due + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_word_progress_due_delete AFTER DELETE ON word_learning_progress
+        WHEN old.next_review_date IS NOT NULL
+        BEGIN
+            UPDATE review_due_counts SET due = due - 1 WHERE day = old.next_review_date;
+            DELETE FROM review_due_counts WHERE day = old.next_review_date AND due <= 0;
+        END
+    ''')
+
+
+# trigram 分词器需要的最低 SQLite 版本
+FTS_TRIGRAM_MIN_SQLITE = (3, 34, 0)
+
+
+def create_words_fts(cursor):
+    """
+    创建 words_fts 三元组全文索引及同步触发器，并由 words 表填充
+
+    :param cursor: 处于事务中的 cursor，SQLite 需要 3.34 以上
+    """
+    # 外部内容表，不重复保存单词和释义，只保存索引
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+            word, meaning,
+            content='words', content_rowid='id',
+            tokenize='trigram'
+        )
+    ''')
+    cursor.execute("INSERT INTO words_fts (words_fts) VALUES ('rebuild')")
+    # rank 列按 bm25 计算，单词列命中的权重高于释义
+    cursor.execute("INSERT INTO words_fts (words_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+
+    # 答题只更新 frequency 等计数列，只有单词或释义变化时才更新索引
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_fts_insert AFTER INSERT ON words
+        BEGIN
+            INSERT INTO words_fts (rowid, word, meaning) VALUES (new.id, new.word, new.meaning);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_fts_update AFTER UPDATE OF word, meaning ON words
+        BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, meaning) VALUES ('delete', old.id, old.word, old.meaning);
+            INSERT INTO words_fts (rowid, word, meaning) VALUES (new.id, new.word, new.meaning);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_words_fts_delete AFTER DELETE ON words
+        BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, meaning) VALUES ('delete', old.id, old.word, old.meaning);
+        END
+    ''')
+
+
+def ensure_words_fts(conn):
+    """
+    迁移 11 在 SQLite 3.34 以下跳过了 words_fts，升级 SQLite 后由此补建
+
+    :param conn: sqlite3 连接，调用时不能处于事务中
+    :return: 本次是否创建了 words_fts
+    """
+    if sqlite3.sqlite_version_info < FTS_TRIGRAM_MIN_SQLITE or get_version(conn) < 11:
+        return False
+    exists_sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_fts'"
+    if conn.execute(exists_sql).fetchone() is not None:
+        return False
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # 并发启动的进程可能已经补建
+        if conn.execute(exists_sql).fetchone() is not None:
+            conn.rollback()
+            return False
+        logger.info(f"SQLite {sqlite3.sqlite_version} supports the FTS5 trigram tokenizer, creating words_fts")
+        create_words_fts(conn.cursor())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        logger.error("Creating words_fts failed", exc_info=True)
+        raise
+    return True
+
+
+@migration(11, '单词和释义的 FTS5 三元组全文索引')
+def _add_words_fts(cursor):
+    # trigram 分词器对中文释义按任意连续三个字符建立索引；SQLite 版本较低时不建索引，
+    # Database.search_words 改用 LIKE 查询，升级 SQLite 后由 ensure_words_fts 补建
+    if sqlite3.sqlite_version_info < FTS_TRIGRAM_MIN_SQLITE:
+        logger.warning(f"SQLite {sqlite3.sqlite_version} does not support the FTS5 trigram tokenizer (3.34+), "
+                       f"skipping words_fts; word search will use LIKE")
+        return
+    create_words_fts(cursor)
+
+
+@migration(12, '按用户的数据版本号，供各进程的学习统计缓存判断是否需要重新计算')
+def _add_user_data_versions(cursor):
+    # 学习统计都由学习记录和打卡记录计算，两张表有增删时由触发器递增该用户的 version
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in ('learning_records', 'checkin_records'):
+        for event, row in (('insert', 'new'), ('delete', 'old')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_user_version_{event} AFTER {event.upper()} ON {table}
+                WHEN {row}.user_id IS NOT NULL
+                BEGIN
+                    INSERT INTO user_data_versions (user_id, version) VALUES ({row}.user_id, 1)
+                    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+                END
+            ''')
+
+
+@migration(13, '打卡记录删除触发器只在存在打卡状态时重算，重置进度时不再逐行重算')
+def _guard_checkin_state_delete(cursor):
+    # 重置进度先删除 user_checkin_state 再删除打卡记录，此时每删除一行都按剩余记录重算一次，
+    # 总耗时与打卡记录数的平方成正比；没有状态行时跳过，单独删除打卡记录时仍按剩余记录重算
+    cursor.execute('DROP TRIGGER IF EXISTS trg_checkin_records_state_delete')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_checkin_records_state_delete AFTER DELETE ON checkin_records
+        WHEN EXISTS (SELECT 1 FROM user_checkin_state WHERE user_id = old.user_id)
+        BEGIN
+            DELETE FROM user_checkin_state WHERE user_id = old.user_id;
+            INSERT INTO user_checkin_state
+                (user_id, total_days, current_streak, max_streak, last_checkin_date)
+            {CHECKIN_STATE_SELECT}
+            WHERE user_id = old.user_id
+            GROUP BY user_id;
+        END
+    ''')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='执行数据库结构迁移')
+    parser.add_argument('--db', default='vocabulary.db', help='数据库文件路径')
+    parser.add_argument('--target', type=int, default=None, help='目标版本，默认为最新版本')
+    parser.add_argument('--status', action='store_true', help='只显示当前版本，不执行迁移')
+    parser.add_argument('--rebuild-daily-stats', action='store_true',
+                        help='迁移后由学习记录重新计算 user_daily_stats')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    conn = sqlite3.connect(args.db)
+    try:
+        current = get_version(conn)
+        print(f"当前版本: {current}，最新版本: {latest_version()}")
+        if args.status:
+            for m in MIGRATIONS:
+                state = '已应用' if m.version <= current else '未应用'
+                print(f"  {m.version:>3} [{state}] {m.description}")
+            return
+        applied = migrate(conn, args.target)
+        print(f"已应用 {len(applied)} 个迁移，当前版本: {get_version(conn)}")
+        if args.rebuild_daily_stats:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                backfill_daily_stats(conn.cursor())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print('已重新计算 user_daily_stats')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+多选题生成
+
+WordSampler 在进程内保存单词 id、单词和释义的数组，出题时直接按随机下标取值，
+每次抽取是 O(1)，不再对 words 表做 ORDER BY RANDOM() 全表排序。数组通过
+data_versions 中由触发器维护的 'words' 版本号与数据库保持同步：每次出题前
+读取一次版本号（主键查询），发生变化时重新加载。
+"""
+import logging
+import random
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# 每道题的选项数量（1 个正确答案 + 3 个干扰项）
+OPTION_COUNT = 4
+
+
+class InsufficientWordsError(Exception):
+    """词库中的单词不足以生成题目"""
+
+
+class WordSampler:
+    """进程内的单词数组，用于 O(1) 随机抽题"""
+
+    def __init__(self, db, rng=None):
+        self.db = db
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = array('q')
+        self._words = []
+        self._meanings = []
+
+    def _load(self, version):
+        ids, words, meanings = array('q'), [], []
+        for row in self.db.iter_words(fields=('id', 'word', 'meaning'), batch_size=5000):
+            ids.append(row['id'])
+            words.append(row['word'])
+            meanings.append(row['meaning'])
+        self._ids, self._words, self._meanings = ids, words, meanings
+        self._version = version
+        logger.info(f"Loaded {len(ids)} words into sampler (version {version})")
+
+    def refresh(self):
+        """单词表版本变化时重新加载数组，返回当前快照 (ids, words, meanings)"""
+        version = self.db.get_data_version('words')
+        if version != self._version:
+            with self._lock:
+                # 先读版本号再读单词：加载期间若有写入，下次检查时会再次加载
+                if version != self._version:
+                    self._load(version)
+        return self._ids, self._words, self._meanings
+
+    def __len__(self):
+        return len(self.refresh()[0])
+
+    def sample_ids(self, count):
+        """随机抽取 count 个互不相同的单词ID，超过单词数量时返回全部"""
+        ids = self.refresh()[0]
+        return [ids[index] for index in self.rng.sample(range(len(ids)), min(count, len(ids)))]
+
+    def _distractors(self, meanings, correct_index, count):
+        """随机抽取与正确答案释义不同的干扰项，期望 O(1)"""
+        n = len(meanings)
+        correct = meanings[correct_index]
+        chosen = set()
+        options = []
+        # 拒绝采样；释义大量重复时限制尝试次数
+        for _ in range(count * 20):
+            index = self.rng.randrange(n)
+            meaning = meanings[index]
+            if index == correct_index or meaning == correct or meaning in chosen:
+                continue
+            chosen.add(meaning)
+            options.append(meaning)
+            if len(options) == count:
+                return options
+        # 退化为从随机位置开始顺序扫描
+        start = self.rng.randrange(n)
+        for offset in range(n):
+            meaning = meanings[(start + offset) % n]
+            if meaning == correct or meaning in chosen:
+                continue
+            chosen.add(meaning)
+            options.append(meaning)
+            if len(options) == count:
+                return options
+        raise InsufficientWordsError('Not enough distinct meanings for distractors')
+
+    def _question(self, snapshot, index):
+        ids, words, meanings = snapshot
+        options = self._distractors(meanings, index, OPTION_COUNT - 1)
+        options.append(meanings[index])
+        self.rng.shuffle(options)
+        return {
+            'id': ids[index],
+            'question': words[index],
+            'options': options,
+            'correct_answer': meanings[index]
+        }
+
+    def question(self):
+        """
+        生成一道多选题
+
+        :return: 包含 id、question、options、correct_answer 的字典，词库为空时返回 None
+        :raises InsufficientWordsError: 单词数量不足以生成干扰项
+        """
+        snapshot = self.refresh()
+        n = len(snapshot[0])
+        if n == 0:
+            return None
+        if n < OPTION_COUNT:
+            raise InsufficientWordsError(f'Need at least {OPTION_COUNT} words, got {n}')
+        return self._question(snapshot, self.rng.randrange(n))
+
+    def quiz(self, count):
+        """
+        生成一组多选题，正确答案不重复
+
+        :param count: 题目数量，超过单词数量时返回全部单词各一题
+        :return: 题目字典列表
+        :raises InsufficientWordsError: 单词数量不足以生成干扰项
+        """
+        snapshot = self.refresh()
+        n = len(snapshot[0])
+        if n == 0:
+            return []
+        if n < OPTION_COUNT:
+            raise InsufficientWordsError(f'Need at least {OPTION_COUNT} words, got {n}')
+        return [self._question(snapshot, index) for index in self.rng.sample(range(n), min(count, n))]
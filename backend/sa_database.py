@@ -0,0 +1,443 @@
+"""
+SQLAlchemy Core 存储后端
+
+SQLAlchemyDatabase 与 Database 的公开方法完全相同，资源类不需要区分后端::
+
+    db = create_database('sqlalchemy', 'vocabulary.db', pool_size=8)
+
+与默认后端的区别：
+
+- 连接由 SQLAlchemy 的 QueuePool 管理：最外层 get_connection 从连接池取出一个连接，
+  退出时归还，连接数由 pool_size + max_overflow 限定，不再随线程数增长；
+  read_transaction 使用另一个只读连接（mode=ro、query_only）的 QueuePool；
+- 热点路径（登录、用户与单词查询、学习统计、答题写入、复习进度写入）使用 Core 语句，
+  编译结果由 SQLAlchemy 的语句缓存复用；批量写入以参数列表执行，走 executemany；
+- 其他方法沿用 Database 中的 SQL，在连接池取出的同一个连接上执行。
+
+事务仍由 Database.transaction/read_transaction 控制（BEGIN IMMEDIATE / BEGIN），
+Core 语句和原有 SQL 共用同一个事务。DBAPI 异常按 sqlite3 的异常抛出，与默认后端一致。
+"""
+import logging
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, String, Table, bindparam, create_engine, func, insert,
+    literal_column, select, text, update,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import QueuePool
+
+from database import PROGRESS_INTERVAL, TIMESTAMP_FORMAT, Database, snapshot_read
+
+logger = logging.getLogger(__name__)
+
+# 每个连接池保持的连接数和允许临时多开的连接数
+DEFAULT_POOL_SIZE = 8
+DEFAULT_MAX_OVERFLOW = 8
+
+# Core 语句用到的表和列；日期和时间戳列按 TEXT 读写，与 sqlite3 的取值一致
+metadata = MetaData()
+
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String),
+    Column('password', String),
+    Column('total_score', Integer),
+)
+
+words = Table(
+    'words', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('word', String),
+    Column('part_of_speech', String),
+    Column('meaning', String),
+    Column('frequency', Integer),
+    Column('correct_times', Integer),
+    Column('wrong_times', Integer),
+    Column('updated_at', String),
+)
+
+word_counts = Table(
+    'word_counts', metadata,
+    Column('part_of_speech', String, primary_key=True),
+    Column('word_count', Integer),
+)
+
+learning_records = Table(
+    'learning_records', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer),
+    Column('word_id', Integer),
+    Column('is_correct', Integer),
+    Column('date', String),
+    Column('created_at', String),
+    Column('quality', Integer),
+)
+
+word_learning_progress = Table(
+    'word_learning_progress', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer),
+    Column('word_id', Integer),
+    Column('next_review_date', String),
+    Column('review_interval', Integer),
+    Column('ease_factor', Float),
+)
+
+user_word_state = Table(
+    'user_word_state', metadata,
+    Column('user_id', Integer, primary_key=True),
+    Column('word_id', Integer, primary_key=True),
+    Column('net_score', Integer),
+    Column('answer_count', Integer),
+)
+
+user_daily_stats = Table(
+    'user_daily_stats', metadata,
+    Column('user_id', Integer, primary_key=True),
+    Column('day', String, primary_key=True),
+    Column('answered', Integer),
+    Column('correct', Integer),
+    Column('wrong', Integer),
+    Column('distinct_words', Integer),
+    Column('new_words', Integer),
+    Column('study_seconds', Integer),
+)
+
+DAILY_STATS_FIELDS = ('answered', 'correct', 'wrong', 'distinct_words', 'new_words', 'study_seconds')
+
+
+def _ratio(numerator, denominator):
+    """SUM(numerator) * 1.0 / SUM(denominator)"""
+    return func.sum(numerator) * literal_column('1.0') / func.sum(denominator)
+
+
+# 预先构造的语句，执行时只绑定参数，编译结果由语句缓存复用
+INSERT_USER = insert(users).values(username=bindparam('username'), password=bindparam('password'))
+SELECT_LOGIN = select(users.c.id, users.c.password).where(users.c.username == bindparam('username'))
+SELECT_USER = select(users.c.id, users.c.username).where(users.c.id == bindparam('user_id'))
+SELECT_USER_SCORE = select(users.c.total_score).where(users.c.id == bindparam('user_id'))
+UPDATE_USER_SCORE = (
+    update(users).where(users.c.id == bindparam('user_id'))
+    .values(total_score=users.c.total_score + bindparam('score_change'))
+)
+
+COUNT_WORDS = select(func.coalesce(func.sum(word_counts.c.word_count), 0))
+COUNT_WORDS_BY_POS = select(word_counts.c.word_count).where(word_counts.c.part_of_speech == bindparam('part_of_speech'))
+SELECT_WORD_DETAILS = (
+    select(words.c.word, words.c.part_of_speech, words.c.meaning).where(words.c.id == bindparam('word_id'))
+)
+WORDS_BY_IDS_FIELDS = ('id', 'word', 'part_of_speech', 'meaning', 'correct_times', 'wrong_times')
+SELECT_WORDS_BY_IDS = (
+    select(*(words.c[name] for name in WORDS_BY_IDS_FIELDS))
+    .where(words.c.id.in_(bindparam('word_ids', expanding=True)))
+)
+# 与 UPSERT_WORD_PROGRESS 相同，ON CONFLICT 语句用 text() 才能缓存
+INSERT_WORD = text('''
+    INSERT INTO words (word, part_of_speech, meaning, frequency, correct_times, wrong_times, updated_at)
+    VALUES (:word, :part_of_speech, :meaning, 0, 0, 0, :updated_at)
+    ON CONFLICT(word) DO NOTHING
+''')
+UPDATE_WORD_STATS = (
+    update(words).where(words.c.id == bindparam('target_id'))
+    .values(
+        frequency=words.c.frequency + bindparam('d_frequency'),
+        correct_times=words.c.correct_times + bindparam('d_correct'),
+        wrong_times=words.c.wrong_times + bindparam('d_wrong'),
+    )
+)
+
+INSERT_LEARNING_RECORD = insert(learning_records)
+
+SELECT_WORD_PROGRESS = (
+    select(word_learning_progress.c.word_id, word_learning_progress.c.review_interval,
+           word_learning_progress.c.ease_factor)
+    .where(word_learning_progress.c.user_id == bindparam('user_id'),
+           word_learning_progress.c.word_id.in_(bindparam('word_ids', expanding=True)))
+)
+# sqlite 方言的 INSERT ... ON CONFLICT 构造（SQLAlchemy 2.0）不参与语句缓存，每次执行都要重新编译，
+# 这里用可缓存的 text() 语句
+UPSERT_WORD_PROGRESS = text('''
+    INSERT INTO word_learning_progress (user_id, word_id, next_review_date, review_interval, ease_factor)
+    VALUES (:user_id, :word_id, :next_review_date, :review_interval, :ease_factor)
+    ON CONFLICT(user_id, word_id) DO UPDATE SET
+        next_review_date = excluded.next_review_date,
+        review_interval = excluded.review_interval,
+        ease_factor = excluded.ease_factor
+''')
+
+COUNT_LEARNED = select(func.count()).select_from(user_word_state).where(user_word_state.c.user_id == bindparam('user_id'))
+SELECT_LEARNING_STATS = (
+    select(func.round(_ratio(user_daily_stats.c.correct, user_daily_stats.c.answered), 2),
+           func.max(user_daily_stats.c.day))
+    .where(user_daily_stats.c.user_id == bindparam('user_id'))
+)
+SELECT_DAILY_STATS = (
+    select(*(user_daily_stats.c[name] for name in DAILY_STATS_FIELDS))
+    .where(user_daily_stats.c.user_id == bindparam('user_id'), user_daily_stats.c.day == bindparam('day'))
+)
+_week = func.strftime('%Y-%W', user_daily_stats.c.day).label('week')
+_weeks = (
+    select(_week,
+           func.sum(user_daily_stats.c.distinct_words).label('words_learned'),
+           func.round(_ratio(user_daily_stats.c.correct, user_daily_stats.c.answered), 2).label('weekly_accuracy'))
+    .where(user_daily_stats.c.user_id == bindparam('user_id'))
+    .group_by(_week)
+    .order_by(_week.desc())
+    .limit(bindparam('weeks'))
+    .cte('weeks')
+)
+SELECT_LEARNING_TREND = select(_weeks.c.week, _weeks.c.words_learned, _weeks.c.weekly_accuracy).order_by(_weeks.c.week)
+_hour = func.strftime('%H', learning_records.c.created_at).label('hour')
+SELECT_TIME_DISTRIBUTION = (
+    select(_hour, func.count().label('count'))
+    .where(learning_records.c.user_id == bindparam('user_id'))
+    .group_by(_hour)
+    .order_by(_hour)
+)
+
+
+class SQLAlchemyDatabase(Database):
+    """使用 SQLAlchemy Core 和 QueuePool 的 Database"""
+
+    def __init__(self, db_path='vocabulary.db', pragmas=None, instrument=False, writer=None, snapshot_reads=True,
+                 pool_size=DEFAULT_POOL_SIZE, max_overflow=DEFAULT_MAX_OVERFLOW, pool_timeout=30):
+        """
+        :param pool_size: 每个连接池（读写、只读各一个）保持的连接数
+        :param max_overflow: 连接池满时最多临时多开的连接数，超过后等待归还
+        :param pool_timeout: 等待连接归还的最长时间（秒）
+
+        其他参数见 Database。
+        """
+        pool_options = {'poolclass': QueuePool, 'pool_size': pool_size, 'max_overflow': max_overflow,
+                        'pool_timeout': pool_timeout}
+        # 连接由 Database._connect 创建，PRAGMA 配置和连接计数与默认后端相同
+        self.engine = create_engine('sqlite://', creator=self._connect, **pool_options)
+        self.readonly_engine = create_engine('sqlite://', creator=lambda: self._connect(readonly=True),
+                                             **pool_options)
+        super().__init__(db_path, pragmas=pragmas, instrument=instrument, writer=writer,
+                         snapshot_reads=snapshot_reads)
+
+    def _bind_stats(self, conn):
+        # 连接在线程之间流转，取出时把 SQL 统计绑定到当前线程
+        if self.instrument:
+            stats = self.query_stats()
+            conn.set_trace_callback(stats.on_statement)
+            conn.set_progress_handler(stats.on_progress, PROGRESS_INTERVAL)
+
+    def _after_fork(self):
+        super()._after_fork()
+        # 父进程连接池中的连接留给父进程，子进程重新建立
+        self.engine.dispose(close=False)
+        self.readonly_engine.dispose(close=False)
+
+    def _acquire(self):
+        """从连接池取出连接，直到最外层 get_connection 退出时归还"""
+        local = self._thread_local()
+        snapshot = getattr(local, 'snapshot', None)
+        if snapshot is not None:
+            return snapshot
+
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            local.core = self.engine.connect()
+            conn = local.conn = local.core.connection.dbapi_connection
+            self._bind_stats(conn)
+        return conn
+
+    def _release(self, conn):
+        local = self._local
+        core, local.core, local.conn = local.core, None, None
+        core.close()
+
+    def _readonly_connection(self):
+        try:
+            core = self.readonly_engine.connect()
+        except DBAPIError as e:
+            logger.warning(f"Cannot open read-only connection to {self.db_path}, "
+                           f"using the read-write connection: {e.orig}")
+            self.snapshot_reads = False
+            return None
+        self._local.snapshot_core = core
+        conn = core.connection.dbapi_connection
+        self._bind_stats(conn)
+        return conn
+
+    def _release_readonly(self, conn):
+        local = self._local
+        core, local.snapshot_core = local.snapshot_core, None
+        core.close()
+
+    def close(self):
+        """关闭两个连接池中的连接"""
+        self.engine.dispose()
+        self.readonly_engine.dispose()
+        super().close()
+
+    def _execute(self, statement, parameters=None):
+        """
+        在当前 get_connection 取出的连接上执行 Core 语句
+
+        :param parameters: 参数字典，或字典列表（executemany）
+        """
+        local = self._local
+        core = local.snapshot_core if getattr(local, 'snapshot', None) is not None else local.core
+        try:
+            return core.execute(statement, parameters)
+        except DBAPIError as e:
+            raise e.orig from None
+
+    # 用户
+
+    def register_user(self, username, password):
+        """注册新用户"""
+        try:
+            with self.transaction():
+                self._execute(INSERT_USER, {'username': username, 'password': password})
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def login_user(self, username, password):
+        """用户登录验证"""
+        with self.get_connection():
+            result = self._execute(SELECT_LOGIN, {'username': username}).first()
+        if result and result[1] == password:
+            return result[0]
+        return None
+
+    def get_user_by_id(self, user_id):
+        """根据用户ID获取用户信息，未找到或出错时返回 None"""
+        try:
+            with self.get_connection():
+                result = self._execute(SELECT_USER, {'user_id': user_id}).first()
+        except Exception as e:
+            logger.error(f"Database error when retrieving user by ID {user_id}: {str(e)}")
+            return None
+        if result:
+            return {'id': result[0], 'username': result[1]}
+        logger.warning(f"No user found with ID: {user_id}")
+        return None
+
+    def get_user_score(self, user_id):
+        """获取用户总分"""
+        with self.get_connection():
+            result = self._execute(SELECT_USER_SCORE, {'user_id': user_id}).first()
+        return result[0] if result else 0
+
+    def _apply_user_score(self, cursor, user_id, score_change):
+        self._execute(UPDATE_USER_SCORE, {'user_id': user_id, 'score_change': int(score_change)})
+
+    # 单词
+
+    def add_word(self, word, part_of_speech, meaning):
+        """
+        添加新单词
+
+        :return: 新单词的ID，单词已存在或出错时返回 None
+        """
+        try:
+            with self.transaction():
+                result = self._execute(INSERT_WORD, {
+                    'word': word, 'part_of_speech': part_of_speech, 'meaning': meaning,
+                    'updated_at': datetime.now().strftime(TIMESTAMP_FORMAT),
+                })
+        except sqlite3.Error as e:
+            logger.error(f"Error adding word: {e}")
+            return None
+        if result.rowcount == 0:
+            logger.warning(f"Word already exists: {word}")
+            return None
+        logger.info(f"Added new word: {word}")
+        return result.lastrowid
+
+    def count_words(self, part_of_speech=None):
+        """获取单词数量，读取由触发器维护的 word_counts 计数器"""
+        with self.get_connection():
+            if part_of_speech is None:
+                result = self._execute(COUNT_WORDS).first()
+            else:
+                result = self._execute(COUNT_WORDS_BY_POS, {'part_of_speech': part_of_speech}).first()
+        return result[0] if result else 0
+
+    def get_word_details(self, word_id):
+        """获取特定单词的详细信息"""
+        with self.get_connection():
+            result = self._execute(SELECT_WORD_DETAILS, {'word_id': word_id}).first()
+        if result:
+            return {'word': result[0], 'part_of_speech': result[1], 'meaning': result[2]}
+        return None
+
+    def get_words_by_ids(self, word_ids):
+        """按主键批量获取单词，顺序与 word_ids 一致，不存在的ID被忽略"""
+        word_ids = list(word_ids)
+        if not word_ids:
+            return []
+        with self.get_connection():
+            rows = {
+                row[0]: dict(zip(WORDS_BY_IDS_FIELDS, row))
+                for row in self._execute(SELECT_WORDS_BY_IDS, {'word_ids': word_ids})
+            }
+        return [rows[word_id] for word_id in word_ids if word_id in rows]
+
+    def _apply_word_deltas(self, cursor, deltas):
+        self._execute(UPDATE_WORD_STATS, [
+            {'d_frequency': frequency, 'd_correct': correct, 'd_wrong': wrong, 'target_id': word_id}
+            for frequency, correct, wrong, word_id in deltas
+        ])
+
+    # 学习记录与复习进度
+
+    def _insert_learning_records(self, cursor, records):
+        self._execute(INSERT_LEARNING_RECORD, [
+            {'user_id': user_id, 'word_id': word_id, 'is_correct': is_correct, 'date': day,
+             'created_at': created_at, 'quality': quality}
+            for user_id, word_id, is_correct, day, created_at, quality in records
+        ])
+
+    def _load_word_progress(self, cursor, user_id, word_ids):
+        rows = self._execute(SELECT_WORD_PROGRESS, {'user_id': user_id, 'word_ids': list(word_ids)})
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def _upsert_word_progress(self, cursor, rows):
+        self._execute(UPSERT_WORD_PROGRESS, [
+            {'user_id': user_id, 'word_id': word_id, 'next_review_date': next_review,
+             'review_interval': interval, 'ease_factor': ease}
+            for user_id, word_id, next_review, interval, ease in rows
+        ])
+
+    # 学习统计
+
+    @snapshot_read
+    def get_learning_stats(self, user_id):
+        """获取用户学习统计：学过的单词数、正确率和最近学习日期"""
+        with self.get_connection():
+            total_learned = self._execute(COUNT_LEARNED, {'user_id': user_id}).scalar()
+            stats = self._execute(SELECT_LEARNING_STATS, {'user_id': user_id}).first()
+        return {
+            'totalLearned': total_learned or 0,
+            'correctRate': stats[0] or 0,
+            'lastLearningDate': stats[1]
+        }
+
+    @snapshot_read
+    def get_learning_trend(self, user_id, weeks=4):
+        """获取用户最近几周的学习趋势"""
+        with self.get_connection():
+            rows = self._execute(SELECT_LEARNING_TREND, {'user_id': user_id, 'weeks': weeks}).all()
+        return [{'week': row[0], 'wordsLearned': row[1], 'accuracy': row[2]} for row in rows]
+
+    def get_daily_stats(self, user_id, day):
+        """获取用户某一天的答题汇总"""
+        with self.get_connection():
+            row = self._execute(SELECT_DAILY_STATS, {'user_id': user_id, 'day': str(day)}).first()
+        return dict(zip(DAILY_STATS_FIELDS, row)) if row else dict.fromkeys(DAILY_STATS_FIELDS, 0)
+
+    @snapshot_read
+    def get_time_distribution(self, user_id):
+        """获取用户学习时间分布"""
+        with self.get_connection():
+            rows = self._execute(SELECT_TIME_DISTRIBUTION, {'user_id': user_id}).all()
+        return [{'hour': row[0], 'count': row[1]} for row in rows]
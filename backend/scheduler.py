@@ -0,0 +1,253 @@
+"""
+SM-2 复习间隔计算与批量重排
+
+next_interval 是单次答题后的 SM-2 更新，Database 在线答题时使用。修改 SM2Params
+之后，reschedule 按 (用户, 单词, 作答时间) 顺序流式读取 learning_records，
+对全部 (用户, 单词) 重放 SM-2 更新并分块写回 word_learning_progress::
+
+    python scheduler.py --db vocabulary.db
+    python scheduler.py --db vocabulary.db --user 42 --min-ease 1.5
+    python scheduler.py --db vocabulary.db --assume-quality 4 2
+
+安装了 NumPy 时每批记录按“第 k 次作答”分组，同一组内所有 (用户, 单词) 的更新
+用数组一次完成；没有 NumPy 时逐条计算，结果相同。
+
+只有带 quality 的学习记录会更新复习进度（与在线答题一致），迁移 9 之前的记录
+没有 quality，可以用 --assume-quality 指定答对/答错时假定的回答质量。重排期间
+新提交的答题可能被重放结果覆盖，建议在低峰期执行。
+"""
+import argparse
+import logging
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SM2Params = namedtuple('SM2Params', [
+    'initial_interval',  # 没有复习进度时的间隔（天）
+    'initial_ease',      # 没有复习进度时的简易度因子
+    'min_ease',          # 简易度因子下限
+    'lapse_penalty',     # 回答质量低于 3 时简易度因子的扣减
+    'second_interval',   # 间隔为 initial_interval 时答对后的间隔
+])
+
+DEFAULT_PARAMS = SM2Params(
+    initial_interval=1,
+    initial_ease=2.5,
+    min_ease=1.3,
+    lapse_penalty=0.2,
+    second_interval=6,
+)
+
+# 重放时 day 列的起点
+EPOCH = date(1970, 1, 1)
+
+
+def next_interval(current_interval, ease_factor, quality, params=DEFAULT_PARAMS):
+    """
+    计算下一次复习间隔
+
+    :param current_interval: 当前复习间隔（天）
+    :param ease_factor: 简易度因子
+    :param quality: 回答质量 (0-5)
+    :param params: SM-2 参数
+    :return: (new_interval, new_ease_factor)
+    """
+    if quality < 3:
+        # 如果回答质量低于3，重置间隔
+        return params.initial_interval, max(params.min_ease, ease_factor - params.lapse_penalty)
+
+    # 更新简易度因子
+    new_ease_factor = ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    new_ease_factor = max(params.min_ease, new_ease_factor)
+
+    # 计算新间隔
+    if current_interval == params.initial_interval:
+        new_interval = params.second_interval
+    elif current_interval == params.second_interval:
+        new_interval = params.initial_interval
+    else:
+        new_interval = round(current_interval * new_ease_factor)
+
+    return new_interval, new_ease_factor
+
+
+def _replay_python(rows, carry, params):
+    """
+    逐条重放一批记录
+
+    :param rows: 按 (user_id, word_id, 时间) 排序的 (user_id, word_id, quality, day) 列表
+    :param carry: 上一批最后一个 (用户, 单词) 的 ((user_id, word_id), interval, ease, last_day)，可为 None
+    :return: ([(user_id, word_id, last_day, interval, ease), ...], 本批最后一个 (用户, 单词) 的状态)
+             最后一个 (用户, 单词) 可能延续到下一批，不包含在结果列表中
+    """
+    results = []
+    key, interval, ease, last_day = carry if carry else (None, None, None, None)
+    for user_id, word_id, quality, day in rows:
+        if (user_id, word_id) != key:
+            if key is not None:
+                results.append((key[0], key[1], last_day, interval, ease))
+            key, interval, ease = (user_id, word_id), params.initial_interval, params.initial_ease
+        interval, ease = next_interval(interval, ease, quality, params)
+        last_day = day
+    return results, (key, interval, ease, last_day)
+
+
+def _replay_numpy(rows, carry, params):
+    """按作答序号分组，用数组重放一批记录，返回值与 _replay_python 相同"""
+    data = np.array(rows, dtype=np.int64)
+    users, words, quality, days = data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+    n = len(data)
+
+    # 每个 (用户, 单词) 的起始位置，以及每条记录是该 (用户, 单词) 在本批中的第几次作答
+    starts_mask = np.empty(n, dtype=bool)
+    starts_mask[0] = True
+    starts_mask[1:] = (users[1:] != users[:-1]) | (words[1:] != words[:-1])
+    starts = np.flatnonzero(starts_mask)
+    pair = np.cumsum(starts_mask) - 1
+    rank = np.arange(n) - starts[pair]
+
+    pairs = len(starts)
+    interval = np.full(pairs, params.initial_interval, dtype=np.float64)
+    ease = np.full(pairs, params.initial_ease, dtype=np.float64)
+    results = []
+    if carry:
+        if carry[0] == (int(users[0]), int(words[0])):
+            interval[0], ease[0] = carry[1], carry[2]
+        else:
+            key, carry_interval, carry_ease, carry_day = carry
+            results.append((key[0], key[1], carry_day, carry_interval, carry_ease))
+
+    # 第 k 组包含所有 (用户, 单词) 的第 k 次作答，组内互不相同，可以一次更新
+    order = np.argsort(rank, kind='stable')
+    bounds = np.cumsum(np.bincount(rank))
+    begin = 0
+    for end in bounds:
+        step = order[begin:end]
+        begin = end
+        p = pair[step]
+        q = quality[step]
+        current_interval = interval[p]
+        current_ease = ease[p]
+
+        lapse = q < 3
+        d = 5 - q
+        new_ease = np.where(lapse, current_ease - params.lapse_penalty,
+                            current_ease + (0.1 - d * (0.08 + d * 0.02)))
+        new_ease = np.maximum(params.min_ease, new_ease)
+        new_interval = np.where(
+            current_interval == params.initial_interval, params.second_interval,
+            np.where(current_interval == params.second_interval, params.initial_interval,
+                     np.round(current_interval * new_ease))
+        )
+        interval[p] = np.where(lapse, params.initial_interval, new_interval)
+        ease[p] = new_ease
+
+    last_day = days[np.append(starts[1:], n) - 1]
+    results.extend(zip(
+        users[starts[:-1]].tolist(),
+        words[starts[:-1]].tolist(),
+        last_day[:-1].tolist(),
+        interval[:-1].astype(np.int64).tolist(),
+        ease[:-1].tolist(),
+    ))
+    last = pairs - 1
+    carry = ((int(users[starts[last]]), int(words[starts[last]])),
+             int(interval[last]), float(ease[last]), int(last_day[last]))
+    return results, carry
+
+
+def _progress_rows(results, day_cache):
+    """把重放结果转换为 word_learning_progress 的行，next_review_date = 最后作答日期 + 间隔"""
+    for user_id, word_id, last_day, interval, ease in results:
+        due = last_day + interval
+        next_review = day_cache.get(due)
+        if next_review is None:
+            next_review = day_cache[due] = (EPOCH + timedelta(days=due)).isoformat()
+        yield user_id, word_id, next_review, interval, ease
+
+
+def reschedule(db, user_id=None, params=DEFAULT_PARAMS, assumed_quality=None,
+               chunk_size=200000, write_batch_size=50000, use_numpy=None):
+    """
+    按学习记录重新计算复习进度
+
+    :param db: Database 实例
+    :param user_id: 只重排该用户，None 表示全部用户
+    :param params: SM-2 参数
+    :param assumed_quality: (答对, 答错) 时假定的回答质量，用于没有 quality 的旧记录；None 表示跳过
+    :param chunk_size: 每批读取的学习记录数
+    :param write_batch_size: 每个写事务的行数
+    :param use_numpy: 是否使用 NumPy，None 表示已安装时使用
+    :return: 重排结果字典
+    """
+    if use_numpy and np is None:
+        raise RuntimeError('NumPy is not installed')
+    use_numpy = np is not None if use_numpy is None else use_numpy
+    replay = _replay_numpy if use_numpy else _replay_python
+
+    start = time.perf_counter()
+    records = 0
+    written = 0
+    carry = None
+    day_cache = {}
+    for rows in db.iter_review_history(user_id, assumed_quality, batch_size=chunk_size):
+        records += len(rows)
+        results, carry = replay(rows, carry, params)
+        written += db.save_review_progress(_progress_rows(results, day_cache), batch_size=write_batch_size)
+    if carry is not None:
+        key, interval, ease, last_day = carry
+        written += db.save_review_progress(
+            _progress_rows([(key[0], key[1], last_day, interval, ease)], day_cache)
+        )
+
+    elapsed = time.perf_counter() - start
+    result = {
+        'records': records,
+        'pairs': written,
+        'engine': 'numpy' if use_numpy else 'python',
+        'seconds': round(elapsed, 3),
+        'records_per_second': round(records / elapsed) if elapsed > 0 else records,
+    }
+    logger.info(f"Rescheduled review progress: {result}")
+    return result
+
+
+def main():
+    from database import Database
+
+    parser = argparse.ArgumentParser(description='按学习记录重新计算复习进度')
+    parser.add_argument('--db', default='vocabulary.db', help='数据库文件路径')
+    parser.add_argument('--user', type=int, default=None, help='只重排该用户')
+    parser.add_argument('--assume-quality', type=int, nargs=2, metavar=('CORRECT', 'WRONG'), default=None,
+                        help='没有 quality 的旧记录按答对/答错假定的回答质量，默认跳过这些记录')
+    parser.add_argument('--chunk-size', type=int, default=200000, help='每批读取的学习记录数')
+    parser.add_argument('--no-numpy', action='store_true', help='不使用 NumPy')
+    for field in SM2Params._fields:
+        value = getattr(DEFAULT_PARAMS, field)
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value,
+                            help=f'SM-2 参数 {field}（默认 {value}）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    params = SM2Params(**{field: getattr(args, field) for field in SM2Params._fields})
+    db = Database(args.db)
+    try:
+        result = reschedule(db, args.user, params, args.assume_quality, args.chunk_size,
+                            use_numpy=False if args.no_numpy else None)
+    finally:
+        db.close()
+
+    print(f"重放 {result['records']:,} 条学习记录，更新 {result['pairs']:,} 个复习进度"
+          f"（{result['engine']}，耗时 {result['seconds']}s，{result['records_per_second']:,} 条/秒）")
+
+
+if __name__ == '__main__':
+    main()
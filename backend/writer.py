@@ -0,0 +1,476 @@
+"""
+单写入者与组提交（group commit）
+
+SQLite 同一时刻只允许一个写事务。多个 gunicorn worker 各自提交小事务时，它们
+在数据库文件锁上排队，繁忙时只能靠 busy_timeout 反复重试，每次提交还各自写一次
+WAL。这里把写操作交给唯一的写入线程：调用方提交（Database 方法名，参数），写入
+线程把几毫秒内到达的写操作合并到一个 BEGIN IMMEDIATE 事务中依次执行、只提交一次，
+提交成功后才逐个确认，调用方得到方法的返回值或它抛出的异常。每个操作在各自的
+SAVEPOINT 中执行，一个操作失败只回滚它自己，不影响同批的其他操作。
+
+可以交给写入者的是 Database 中用 @queued_write 标记的方法。两种部署方式：
+
+- 进程内（DB_WRITER=thread）：进程内的所有线程共用一个写入线程，适合单进程部署
+  和 asyncio 模式；
+- 独立的写入进程（DB_WRITER=<socket 路径或 host:port>）：写入进程持有唯一的写
+  连接，各个 gunicorn worker 通过 WriterClient 把写操作发给它::
+
+      python writer.py --db vocabulary.db --address /tmp/vocabulary-writer.sock
+      DB_WRITER=/tmp/vocabulary-writer.sock gunicorn -w 4 app:app
+
+  也可以用 gunicorn.conf.py 由 gunicorn 主进程启动和停止写入进程。连不上写入进程
+  时（操作尚未发出），Database 记录警告后直接写入。
+
+连接上传输的是 pickle，能连上写入进程就能在其中执行代码，因此：Unix socket 以 0600
+权限创建，只有同一用户的进程可以连接；TCP 地址必须通过 DB_WRITER_AUTHKEY 设置认证
+密钥，否则写入进程拒绝启动。spawn() 在没有设置密钥时生成一个随机密钥，写入
+DB_WRITER_AUTHKEY 环境变量，之后 fork 的 worker 继承它。
+"""
+import argparse
+import functools
+import logging
+import os
+import queue
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, wait
+
+import logging_config
+from database import STORAGE_BACKENDS, Database, WriterUnavailable, create_database, pragmas_from_env
+
+logger = logging.getLogger(__name__)
+
+# 写入线程取到一个操作后，最多再等这么久（秒）收集同一批的操作
+DEFAULT_BATCH_WINDOW = 0.002
+# 一个事务中最多合并的操作数
+DEFAULT_MAX_BATCH = 256
+
+
+def is_queued_write(name):
+    """name 是否为可以交给写入者执行的 Database 方法"""
+    return getattr(getattr(Database, name, None), 'queued_write', False)
+
+
+def parse_address(value):
+    """'host:port' 解析为 TCP 地址，其余按 Unix socket 路径处理"""
+    host, sep, port = value.rpartition(':')
+    if sep and host and port.isdigit() and '/' not in value:
+        return host, int(port)
+    return value
+
+
+def authkey_from_env(environ=None):
+    """DB_WRITER_AUTHKEY 设置的连接认证密钥，未设置时为 None（不认证）"""
+    environ = os.environ if environ is None else environ
+    value = environ.get('DB_WRITER_AUTHKEY')
+    return value.encode() if value else None
+
+
+class WriteQueue:
+    """进程内的写入线程，把一个时间窗口内提交的写操作合并到一个事务中"""
+
+    def __init__(self, db, batch_window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        """
+        :param db: 写入线程使用的 Database，不能设置 writer
+        :param batch_window: 取到第一个操作后等待后续操作的时间（秒），0 表示只合并已排队的操作
+        :param max_batch: 一个事务中最多合并的操作数
+        """
+        if db.writer is not None:
+            raise ValueError("WriteQueue needs a Database without a writer")
+        self.db = db
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        # 已提交的事务数和其中的操作数
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                # fork 出的子进程中没有写入线程，重新启动，父进程排队的操作不会被复制执行
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def submit_async(self, name, args=(), kwargs=None):
+        """
+        提交一个写操作
+
+        :param name: 带 @queued_write 标记的 Database 方法名
+        :return: Future，所在事务提交后完成
+        """
+        if not is_queued_write(name):
+            raise ValueError(f"{name} is not a queued write")
+        self._ensure_started()
+        future = Future()
+        self._queue.put((name, tuple(args), dict(kwargs or {}), future))
+        return future
+
+    def submit(self, name, args=(), kwargs=None):
+        """提交一个写操作并等待确认，返回方法的返回值或抛出它的异常"""
+        return self.submit_async(name, args, kwargs).result()
+
+    def _collect(self):
+        """取一批操作，返回 (操作列表, 是否收到停止信号)"""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _execute(self, batch):
+        """在一个事务中执行一批操作，提交后再完成各自的 Future"""
+        outcomes = []
+        try:
+            with self.db.transaction() as conn:
+                for name, args, kwargs, future in batch:
+                    conn.execute('SAVEPOINT queued_write')
+                    try:
+                        outcomes.append((future, getattr(self.db, name)(*args, **kwargs), None))
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO queued_write')
+                        outcomes.append((future, None, e))
+                    conn.execute('RELEASE queued_write')
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._execute(batch)
+
+    def stats(self):
+        """返回 {'batches': 已提交的事务数, 'operations': 其中的操作数}"""
+        return {'batches': self.batches, 'operations': self.operations}
+
+    def close(self):
+        """执行完已排队的操作后停止写入线程"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            thread.join()
+
+
+class WriterClient:
+    """把写操作发给写入进程的客户端，每个线程使用各自的连接"""
+
+    def __init__(self, address, authkey=None):
+        """
+        :param address: 写入进程的地址，Unix socket 路径或 (host, port)
+        :param authkey: 连接认证密钥，默认读取 DB_WRITER_AUTHKEY
+        """
+        self.address = address
+        self.authkey = authkey or authkey_from_env()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # fork 之后不使用父进程的连接
+            self._pid = os.getpid()
+            self._local = threading.local()
+        conn = getattr(self._local, 'conn', None)
+        # 写入进程不会主动发送数据，空闲连接可读说明对端已关闭（例如写入进程重启）
+        if conn is not None and conn.poll():
+            self._drop()
+            conn = None
+        if conn is None:
+            try:
+                conn = self._local.conn = Client(self.address, authkey=self.authkey)
+            except (OSError, EOFError, AuthenticationError) as e:
+                raise WriterUnavailable(f"Cannot connect to writer at {self.address}: {e}") from e
+        return conn
+
+    def _drop(self):
+        conn, self._local.conn = self._local.conn, None
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    def submit(self, name, args=(), kwargs=None):
+        """
+        发送一个写操作并等待确认，返回方法的返回值或抛出它的异常
+
+        发送失败时抛出 WriterUnavailable；已经发出但没有收到确认时抛出
+        ConnectionError，此时操作可能已经提交，不能重试。
+        """
+        conn = self._connection()
+        try:
+            conn.send((name, tuple(args), dict(kwargs or {})))
+        except OSError as e:
+            self._drop()
+            raise WriterUnavailable(f"Cannot send to writer at {self.address}: {e}") from e
+        try:
+            status, value = conn.recv()
+        except (OSError, EOFError) as e:
+            self._drop()
+            raise ConnectionError(f"Lost acknowledgement from writer at {self.address}: {e}") from e
+        if status == 'error':
+            raise value
+        return value
+
+    def close(self):
+        """关闭当前线程的连接"""
+        if getattr(self._local, 'conn', None) is not None:
+            self._drop()
+
+
+class WriterServer:
+    """
+    接受 WriterClient 的连接，把收到的写操作交给 WriteQueue
+
+    一个线程接受连接，另一个线程用 multiprocessing.connection.wait 读取所有连接上
+    的请求；确认由写入线程在事务提交后直接发回。少量线程避免了与写入线程争抢 GIL。
+    """
+
+    def __init__(self, write_queue, address, authkey=None):
+        """
+        :param write_queue: 执行写操作的 WriteQueue
+        :param address: 监听地址，Unix socket 路径或 (host, port)
+        :param authkey: 连接认证密钥，默认读取 DB_WRITER_AUTHKEY；TCP 地址必须设置
+        """
+        self.write_queue = write_queue
+        self.address = address
+        authkey = authkey or authkey_from_env()
+        if isinstance(address, str):
+            _remove_stale_socket(address)
+            # socket 文件只允许当前用户连接
+            umask = os.umask(0o177)
+            try:
+                self.listener = Listener(address, authkey=authkey)
+            finally:
+                os.umask(umask)
+        else:
+            if not authkey:
+                raise ValueError(f"Writer address {address[0]}:{address[1]} is TCP; set DB_WRITER_AUTHKEY "
+                                 f"to a random secret shared with the workers")
+            self.listener = Listener(address, authkey=authkey)
+        self._closed = threading.Event()
+        self._connections = []
+        self._pending = queue.SimpleQueue()
+        # 新连接到来或关闭时唤醒读取线程
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._reader = threading.Thread(target=self._read_requests, name='db-writer-reader', daemon=True)
+
+    def serve_forever(self):
+        """接受连接直到 close"""
+        logger.info(f"Writer listening on {self.address}")
+        self._reader.start()
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                if self._closed.is_set():
+                    break
+                logger.warning(f"Rejected writer connection: {e}")
+                continue
+            self._pending.put(conn)
+            self._wakeup_send.send(b'\0')
+        self._reader.join()
+
+    def _read_requests(self):
+        while not self._closed.is_set():
+            for conn in wait(self._connections + [self._wakeup_recv]):
+                if conn is self._wakeup_recv:
+                    conn.recv(4096)
+                    while not self._pending.empty():
+                        self._connections.append(self._pending.get())
+                    continue
+                try:
+                    name, args, kwargs = conn.recv()
+                except (OSError, EOFError):
+                    self._drop_connection(conn)
+                    continue
+                except Exception as e:
+                    # 无法反序列化或格式不对的请求只关闭这个连接，读取线程继续服务其他连接
+                    logger.warning(f"Dropping writer connection after malformed request: {e!r}")
+                    self._drop_connection(conn)
+                    continue
+                try:
+                    future = self.write_queue.submit_async(name, args, kwargs)
+                except Exception as e:
+                    future = Future()
+                    future.set_exception(e)
+                future.add_done_callback(functools.partial(self._reply, conn))
+
+    def _drop_connection(self, conn):
+        self._connections.remove(conn)
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _reply(conn, future):
+        error = future.exception()
+        reply = ('ok', future.result()) if error is None else ('error', error)
+        try:
+            conn.send(reply)
+        except OSError:
+            # 客户端已断开，读取线程会关闭该连接
+            pass
+        except Exception:
+            # 返回值或异常无法序列化
+            status, value = reply
+            conn.send(('error', RuntimeError(f"{type(value).__name__}: {value}")))
+
+    def close(self):
+        """停止接受新连接和读取请求，已提交给 WriteQueue 的操作仍会确认"""
+        if not self._closed.is_set():
+            self._closed.set()
+            self.listener.close()
+            self._wakeup_send.send(b'\0')
+
+    def close_connections(self):
+        """关闭所有客户端连接"""
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+
+def _remove_stale_socket(path):
+    """删除上次异常退出留下的 socket 文件，已有写入进程在监听时报错"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"Another writer is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def create_writer(spec, db_path, pragmas=None, batch_window=DEFAULT_BATCH_WINDOW, backend='sqlite'):
+    """
+    按 DB_WRITER 配置创建 Database 的 writer
+
+    :param spec: 空字符串表示各自直接写入，'thread' 表示进程内写入线程，其他值为写入进程的地址
+    :param db_path: 数据库路径，进程内写入线程使用独立的 Database
+    :param pragmas: 进程内写入线程的 PRAGMA 配置
+    :param batch_window: 进程内写入线程的组提交时间窗口（秒）
+    :param backend: 进程内写入线程使用的存储后端，见 database.create_database
+    """
+    if not spec:
+        return None
+    if spec == 'thread':
+        return WriteQueue(create_database(backend, db_path, pragmas=pragmas), batch_window)
+    return WriterClient(parse_address(spec))
+
+
+def serve(db_path, address, pragmas=None, batch_window=DEFAULT_BATCH_WINDOW,
+          max_batch=DEFAULT_MAX_BATCH, authkey=None, backend='sqlite'):
+    """运行写入进程，收到 SIGTERM/SIGINT 后执行完已排队的操作再退出"""
+    db = create_database(backend, db_path, pragmas=pragmas)
+    write_queue = WriteQueue(db, batch_window, max_batch)
+    server = WriterServer(write_queue, address, authkey)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: server.close())
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
+        write_queue.close()
+        server.close_connections()
+        db.close()
+        stats = write_queue.stats()
+        logger.info(f"Writer stopped after {stats['operations']} writes in {stats['batches']} transactions")
+
+
+def _listening(address):
+    try:
+        Client(address, authkey=authkey_from_env()).close()
+        return True
+    except (OSError, EOFError):
+        return False
+
+
+def spawn(db_path, address, batch_window=DEFAULT_BATCH_WINDOW, timeout=10):
+    """
+    以子进程启动写入进程（python writer.py），开始监听后返回 subprocess.Popen
+
+    PRAGMA 覆盖、存储后端（DB_BACKEND）和认证密钥通过继承的环境变量传递。没有设置
+    DB_WRITER_AUTHKEY 时生成一个随机密钥写入当前进程的环境变量，之后 fork 的 worker
+    用它连接写入进程。
+    """
+    if not os.environ.get('DB_WRITER_AUTHKEY'):
+        os.environ['DB_WRITER_AUTHKEY'] = secrets.token_bytes(32).hex()
+    process = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), '--db', db_path, '--address', address,
+        '--batch-ms', str(batch_window * 1000),
+    ])
+    deadline = time.monotonic() + timeout
+    while not _listening(parse_address(address)):
+        if process.poll() is not None:
+            raise RuntimeError(f"Writer exited with status {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError(f"Writer did not start listening on {address} within {timeout}s")
+        time.sleep(0.05)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description='运行单写入者进程，组提交各 worker 发来的写操作')
+    parser.add_argument('--db', default=os.environ.get('DATABASE_PATH', 'vocabulary.db'), help='数据库文件路径')
+    parser.add_argument('--address', default=os.environ.get('DB_WRITER', '/tmp/vocabulary-writer.sock'),
+                        help='监听地址，Unix socket 路径或 host:port')
+    parser.add_argument('--batch-ms', type=float, default=DEFAULT_BATCH_WINDOW * 1000, help='组提交时间窗口（毫秒）')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help='一个事务中最多合并的操作数')
+    parser.add_argument('--backend', choices=STORAGE_BACKENDS, default=os.environ.get('DB_BACKEND', 'sqlite'),
+                        help='存储后端')
+    args = parser.parse_args()
+
+    logging_config.configure_logging(logging_config.settings_from_env())
+    serve(args.db, parse_address(args.address), pragmas_from_env(), args.batch_ms / 1000, args.max_batch,
+          backend=args.backend)
+
+
+if __name__ == '__main__':
+    main()
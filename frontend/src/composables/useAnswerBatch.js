@@ -0,0 +1,70 @@
+import { onBeforeUnmount } from 'vue'
+import axios from 'axios'
+
+const BATCH_URL = '/api/learn/batch'
+
+// 缓存答题结果，攒够一批或离开页面时通过 /api/learn/batch 一次性提交
+export default function useAnswerBatch({ flushSize = 20 } = {}) {
+  let pending = []
+  let flushing = null
+
+  const authHeaders = () => ({
+    Authorization: `Bearer ${localStorage.getItem('token')}`
+  })
+
+  const flush = async () => {
+    if (flushing) {
+      await flushing
+    }
+    if (pending.length === 0) {
+      return null
+    }
+
+    const answers = pending
+    pending = []
+    flushing = axios.post(BATCH_URL, answers, { headers: authHeaders() })
+      .catch((error) => {
+        // 提交失败时放回队列，下次再试
+        pending = answers.concat(pending)
+        throw error
+      })
+      .finally(() => {
+        flushing = null
+      })
+    return flushing
+  }
+
+  const add = (answer) => {
+    pending.push({ ...answer, answered_at: new Date().toISOString() })
+    if (pending.length >= flushSize) {
+      return flush()
+    }
+    return null
+  }
+
+  // 页面关闭时 axios 请求可能被取消，使用 keepalive 的 fetch 兜底
+  const flushOnUnload = () => {
+    if (pending.length === 0) {
+      return
+    }
+    fetch(BATCH_URL, {
+      method: 'POST',
+      keepalive: true,
+      headers: { ...authHeaders(), 'Content-Type': 'application/json' },
+      body: JSON.stringify(pending)
+    })
+    pending = []
+  }
+
+  window.addEventListener('pagehide', flushOnUnload)
+
+  onBeforeUnmount(() => {
+    window.removeEventListener('pagehide', flushOnUnload)
+    flush().catch((error) => console.error('提交答案失败:', error))
+  })
+
+  return {
+    add,
+    flush
+  }
+}
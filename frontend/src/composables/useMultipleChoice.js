@@ -1,6 +1,7 @@
 import { ref } from 'vue'
 import axios from 'axios'
 import { ElMessage } from 'element-plus'
+import useAnswerBatch from './useAnswerBatch'
 
 export default function useMultipleChoice() {
   const question = ref('')
@@ -11,22 +12,38 @@ export default function useMultipleChoice() {
   const isCorrect = ref(false)
   const loading = ref(false)
   const currentWordId = ref(null)
+  const answerBatch = useAnswerBatch({ flushSize: 10 })
+
+  // 一次请求一组题目，答完再取下一组
+  const QUIZ_SIZE = 10
+  const pendingQuestions = []
+
+  const showQuestion = (data) => {
+    currentWordId.value = data.id
+    question.value = data.question
+    options.value = data.options
+    correctAnswer.value = data.correct_answer
+    selectedOption.value = ''
+    feedback.value = ''
+    isCorrect.value = false
+  }
 
   const fetchNewQuestion = async () => {
+    if (pendingQuestions.length) {
+      showQuestion(pendingQuestions.shift())
+      return
+    }
+
     try {
       loading.value = true
       const token = localStorage.getItem('token')
       const response = await axios.get('/api/multiple-choice', {
+        params: { count: QUIZ_SIZE },
         headers: { Authorization: `Bearer ${token}` }
       })
 
-      currentWordId.value = response.data.id
-      question.value = response.data.question
-      options.value = response.data.options
-      correctAnswer.value = response.data.correct_answer
-      selectedOption.value = ''
-      feedback.value = ''
-      isCorrect.value = false
+      pendingQuestions.push(...response.data.questions)
+      showQuestion(pendingQuestions.shift())
     } catch (error) {
       console.error('获取题目失败:', error)
       ElMessage.error(error.response?.data?.message || '获取题目失败')
@@ -49,13 +66,10 @@ export default function useMultipleChoice() {
     isCorrect.value = selectedOption.value === correctAnswer.value
     
     try {
-      // 提交学习记录
-      const token = localStorage.getItem('token')
-      await axios.post('/api/learn', {
+      // 学习记录先放入队列，攒够一批后通过 /api/learn/batch 提交
+      await answerBatch.add({
         word_id: currentWordId.value,
         is_correct: isCorrect.value
-      }, {
-        headers: { Authorization: `Bearer ${token}` }
       })
 
       feedback.value = isCorrect.value ? '回答正确！' : `回答错误。正确答案是: ${correctAnswer.value}`